@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Iterable
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+
+from .constants import CRF, REQUISITION
+
+
+def get_metadata_cache() -> BaseCache:
+    """Returns the cache used by edc_metadata.
+
+    See also settings.EDC_METADATA_CACHE_ALIAS
+    """
+    return caches[getattr(settings, "EDC_METADATA_CACHE_ALIAS", "default")]
+
+
+visit_key_fields = [
+    "subject_identifier",
+    "visit_schedule_name",
+    "schedule_name",
+    "visit_code",
+    "visit_code_sequence",
+]
+
+
+class VisitMetadataCache:
+    """A read-through cache of the CRF and requisition metadata of
+    a visit.
+
+    Keyed by (subject_identifier, visit_schedule_name, schedule_name,
+    visit_code, visit_code_sequence) and a generation counter.
+    Writes to metadata invalidate the visit (see `MetadataQuerySet`
+    and `CrfMetadataModelMixin`); `invalidate_all` increments the
+    generation.
+
+    `hits` and `misses` are counted per process.
+
+    See also settings.EDC_METADATA_CACHE_ENABLED.
+    """
+
+    prefix = "edc_metadata:visit_metadata"
+    categories = [CRF, REQUISITION]
+    max_keys = 100
+
+    def __init__(self) -> None:
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(hits={self.hits}, misses={self.misses})"
+
+    @property
+    def generation(self) -> int:
+        return get_metadata_cache().get(f"{self.prefix}:generation", 0)
+
+    @staticmethod
+    def get_visit_key(instance: Any) -> tuple:
+        return tuple(getattr(instance, f) for f in visit_key_fields)
+
+    def get_key(self, category: str, visit_key: tuple, generation: int) -> str:
+        return ":".join([self.prefix, str(generation), category, *[str(v) for v in visit_key]])
+
+    def get(self, category: str, instance: Any, fetch: Callable[[], list]) -> list:
+        """Returns the cached list for the visit of `instance` or
+        fetches and caches it.
+        """
+        key = self.get_key(category, self.get_visit_key(instance), self.generation)
+        value = get_metadata_cache().get(key)
+        if value is None:
+            self.misses += 1
+            value = fetch()
+            get_metadata_cache().set(key, value)
+        else:
+            self.hits += 1
+        return value
+
+    def invalidate(self, visit_keys: Iterable[tuple]) -> None:
+        """Deletes the cached lists for the visit keys, now and on
+        commit.
+        """
+        generation = self.generation
+        keys = [
+            self.get_key(category, tuple(visit_key), generation)
+            for visit_key in set(visit_keys)
+            for category in self.categories
+        ]
+        if keys:
+            get_metadata_cache().delete_many(keys)
+            transaction.on_commit(lambda: get_metadata_cache().delete_many(keys))
+
+    def invalidate_all(self) -> None:
+        """Increments the generation, now and on commit, so no cached
+        list is read again.
+        """
+        self.increment_generation()
+        transaction.on_commit(self.increment_generation)
+
+    def increment_generation(self) -> None:
+        key = f"{self.prefix}:generation"
+        get_metadata_cache().add(key, 0)
+        try:
+            get_metadata_cache().incr(key)
+        except ValueError:
+            get_metadata_cache().set(key, 1)
+
+    def reset_counters(self) -> None:
+        self.hits = 0
+        self.misses = 0
+
+
+visit_metadata_cache = VisitMetadataCache()
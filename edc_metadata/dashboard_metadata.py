@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.apps import apps as django_apps
+from django.db.models import Case, CharField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast
+
+from .constants import KEYED
+from .form_plan import get_form_plan
+from .metadata_snapshot import MetadataSnapshot
+from .utils import get_crf_metadata, get_requisition_metadata
+
+if TYPE_CHECKING:
+    from django.db.models import Expression, Field, QuerySet
+    from edc_appointment.models import Appointment
+
+    from .models import CrfMetadata, RequisitionMetadata
+
+
+class DashboardMetadata:
+    """A class to fetch the CRF and requisition metadata of an
+    appointment for the subject dashboard.
+
+    `crfs` and `requisitions` are querysets. Each metadata object is
+    annotated with the pk of its keyed source model instance,
+    `source_pk`, or None, using one subquery per source model in
+    the visit's form plan. Fetching either takes one query whatever
+    the number of forms.
+
+    Pass `crf_metadata` / `requisition_metadata` to use a filtered
+    or ordered queryset instead of all metadata for the timepoint.
+    """
+
+    def __init__(
+        self,
+        appointment: Appointment,
+        crf_metadata: QuerySet[CrfMetadata] | None = None,
+        requisition_metadata: QuerySet[RequisitionMetadata] | None = None,
+    ) -> None:
+        self._crfs: QuerySet[CrfMetadata] | None = None
+        self._requisitions: QuerySet[RequisitionMetadata] | None = None
+        self.appointment = appointment
+        self.related_visit = getattr(appointment, "related_visit", None)
+        self.crf_metadata = (
+            get_crf_metadata(appointment).order_by("show_order")
+            if crf_metadata is None
+            else crf_metadata
+        )
+        self.requisition_metadata = (
+            get_requisition_metadata(appointment).order_by("show_order")
+            if requisition_metadata is None
+            else requisition_metadata
+        )
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.appointment})"
+
+    @property
+    def crfs(self) -> QuerySet[CrfMetadata]:
+        if self._crfs is None:
+            models = (
+                get_form_plan(self.related_visit).crf_models
+                if self.related_visit
+                else frozenset()
+            )
+            self._crfs = self.crf_metadata.annotate(source_pk=self.get_source_pk(models))
+        return self._crfs
+
+    @property
+    def requisitions(self) -> QuerySet[RequisitionMetadata]:
+        if self._requisitions is None:
+            models = (
+                get_form_plan(self.related_visit).requisition_models
+                if self.related_visit
+                else frozenset()
+            )
+            self._requisitions = self.requisition_metadata.annotate(
+                source_pk=self.get_source_pk(models, requisition=True)
+            )
+        return self._requisitions
+
+    @property
+    def snapshot(self) -> MetadataSnapshot:
+        """Returns a snapshot of the fetched metadata, for example,
+        for `NextFormGetter`.
+        """
+        return MetadataSnapshot.from_metadata(self.crfs, self.requisitions)
+
+    def get_source_pk(
+        self, models: frozenset[str], requisition: bool | None = None
+    ) -> Expression:
+        """Returns an expression for the pk of the keyed source model
+        instance of a metadata row.
+
+        If the source models do not share a pk field type, the pk is
+        cast to text.
+        """
+        subqueries: dict[str, Subquery] = {}
+        pk_fields: dict[str, Field] = {}
+        for model in sorted(models):
+            try:
+                model_cls = django_apps.get_model(model)
+            except LookupError:
+                continue
+            try:
+                related_visit_model_attr = model_cls.related_visit_model_attr()
+            except AttributeError:
+                related_visit_model_attr = "subject_visit"
+            queryset = model_cls.objects.filter(
+                **{f"{related_visit_model_attr}_id": self.related_visit.id}
+            )
+            if requisition:
+                queryset = queryset.filter(panel__name=OuterRef("panel_name"))
+            subqueries[model] = Subquery(queryset.values("pk").order_by()[:1])
+            pk_fields[model_cls._meta.pk.get_internal_type()] = model_cls._meta.pk
+        if not subqueries:
+            return Value(None, output_field=CharField())
+        if len(pk_fields) == 1:
+            output_field = list(pk_fields.values())[0].__class__()
+        else:
+            output_field = CharField()
+            subqueries = {
+                model: Cast(subquery, output_field=CharField())
+                for model, subquery in subqueries.items()
+            }
+        return Case(
+            *[
+                When(model=model, entry_status=KEYED, then=subquery)
+                for model, subquery in subqueries.items()
+            ],
+            default=None,
+            output_field=output_field,
+        )
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import TYPE_CHECKING
+
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+from edc_visit_schedule.visit import CrfCollection, RequisitionCollection
+from edc_visit_tracking.constants import MISSED_VISIT
+
+if TYPE_CHECKING:
+    from edc_visit_schedule.visit import Crf, Requisition, Visit
+    from edc_visit_tracking.model_mixins import VisitModelMixin as Base
+
+    from .model_mixins.creates import CreatesMetadataModelMixin
+
+    class RelatedVisitModel(CreatesMetadataModelMixin, Base):
+        pass
+
+
+class FormPlan:
+    """A compiled, read-only view of the CRFs and requisitions
+    expected for a visit.
+
+    The collections, sets and dictionaries are built once per
+    (visit_schedule, schedule, visit_code, unscheduled, missed).
+    Use `get_form_plan` instead of instantiating directly.
+
+    * missed: missed visit CRFs only;
+    * unscheduled: unscheduled + prn CRFs/requisitions;
+    * otherwise: scheduled + prn CRFs/requisitions.
+    """
+
+    def __init__(self, visit: Visit, unscheduled: bool, missed: bool) -> None:
+        self.visit = visit
+        self.unscheduled = unscheduled
+        self.missed = missed
+        self.crfs: CrfCollection = CrfCollection(*self._get_crfs(), name="crfs")
+        self.requisitions: RequisitionCollection = RequisitionCollection(
+            *self._get_requisitions(), name="requisitions"
+        )
+        crfs_by_model = {}
+        for crf in self.crfs:
+            crfs_by_model.setdefault(crf.model, crf)
+        requisitions_by_panel = {}
+        for requisition in self.requisitions:
+            requisitions_by_panel.setdefault(requisition.panel.name, requisition)
+        self.crfs_by_model: MappingProxyType[str, Crf] = MappingProxyType(crfs_by_model)
+        self.requisitions_by_panel: MappingProxyType[str, Requisition] = MappingProxyType(
+            requisitions_by_panel
+        )
+        self.crf_models: frozenset[str] = frozenset(crfs_by_model)
+        self.requisition_models: frozenset[str] = frozenset(
+            r.model for r in requisitions_by_panel.values()
+        )
+        self.panel_names: frozenset[str] = frozenset(requisitions_by_panel)
+        self.crf_required: MappingProxyType[str, bool] = MappingProxyType(
+            {k: bool(v.required) for k, v in crfs_by_model.items()}
+        )
+        self.requisition_required: MappingProxyType[str, bool] = MappingProxyType(
+            {k: bool(v.required) for k, v in requisitions_by_panel.items()}
+        )
+        self.crf_show_order: MappingProxyType[str, int] = MappingProxyType(
+            {k: v.show_order for k, v in crfs_by_model.items()}
+        )
+        self.requisition_show_order: MappingProxyType[str, int] = MappingProxyType(
+            {k: v.show_order for k, v in requisitions_by_panel.items()}
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}({self.visit}, unscheduled={self.unscheduled}, "
+            f"missed={self.missed})"
+        )
+
+    def _get_crfs(self) -> tuple[Crf, ...]:
+        if self.missed:
+            # missed visit CRFs only
+            crfs = self.visit.crfs_missed.forms
+        elif self.unscheduled:
+            # unscheduled + prn CRFs only
+            models = [crf.model for crf in self.visit.crfs_unscheduled]
+            crfs = self.visit.crfs_unscheduled.forms + tuple(
+                [f for f in self.visit.crfs_prn if f.model not in models]
+            )
+        else:
+            # scheduled + prn CRFs only
+            models = [crf.model for crf in self.visit.crfs]
+            crfs = self.visit.crfs.forms + tuple(
+                [f for f in self.visit.crfs_prn if f.model not in models]
+            )
+        return crfs
+
+    def _get_requisitions(self) -> tuple[Requisition, ...]:
+        if self.unscheduled:
+            # unscheduled + prn requisitions only
+            names = [f.name for f in self.visit.requisitions_unscheduled]
+            requisitions = self.visit.requisitions_unscheduled.forms + tuple(
+                [f for f in self.visit.requisitions_prn if f.name not in names]
+            )
+        elif self.missed:
+            # missed visit requisition only -- none
+            requisitions = ()
+        else:
+            # scheduled + prn requisitions only
+            names = [f.name for f in self.visit.requisitions]
+            requisitions = self.visit.requisitions.forms + tuple(
+                [f for f in self.visit.requisitions_prn if f.name not in names]
+            )
+        return requisitions
+
+
+_form_plans: dict[tuple[str, str, str, bool, bool], FormPlan] = {}
+
+
+def get_form_plan(related_visit: RelatedVisitModel, missed: bool | None = None) -> FormPlan:
+    """Returns a cached FormPlan for the related visit.
+
+    If `missed` is None, it is set from the related visit `reason`.
+    Rule groups pass `missed=False` since rules are evaluated
+    against the scheduled or unscheduled forms.
+
+    The plan is rebuilt if the `Visit` object for the key is not
+    the one used to build the cached plan, for example if the
+    visit schedule was re-registered.
+    """
+    missed = related_visit.reason == MISSED_VISIT if missed is None else missed
+    return _get_form_plan(
+        related_visit.visit,
+        related_visit.visit_schedule_name,
+        related_visit.schedule_name,
+        related_visit.visit_code,
+        related_visit.visit_code_sequence,
+        missed,
+    )
+
+
+def get_form_plan_for_visit_code(
+    visit_schedule_name: str,
+    schedule_name: str,
+    visit_code: str,
+    visit_code_sequence: int,
+    missed: bool,
+) -> FormPlan:
+    """Returns a cached FormPlan without a related visit model
+    instance, for example, when working with `values()` querysets.
+    """
+    visit = (
+        site_visit_schedules.get_visit_schedule(visit_schedule_name)
+        .schedules.get(schedule_name)
+        .visits.get(visit_code)
+    )
+    return _get_form_plan(
+        visit, visit_schedule_name, schedule_name, visit_code, visit_code_sequence, missed
+    )
+
+
+def _get_form_plan(
+    visit: Visit,
+    visit_schedule_name: str,
+    schedule_name: str,
+    visit_code: str,
+    visit_code_sequence: int,
+    missed: bool,
+) -> FormPlan:
+    key = (visit_schedule_name, schedule_name, visit_code, visit_code_sequence != 0, missed)
+    form_plan = _form_plans.get(key)
+    if not form_plan or form_plan.visit is not visit:
+        form_plan = FormPlan(visit, unscheduled=key[3], missed=missed)
+        _form_plans[key] = form_plan
+    return form_plan
+
+
+def clear_form_plans() -> None:
+    _form_plans.clear()
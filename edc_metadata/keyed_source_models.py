@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from collections import namedtuple
+from typing import TYPE_CHECKING
+
+from django.apps import apps as django_apps
+from django.db.models import CharField, F, Value
+
+from .form_plan import get_form_plan
+
+if TYPE_CHECKING:
+    from django.db.models import QuerySet
+    from edc_visit_tracking.model_mixins import VisitModelMixin as Base
+
+    from .form_plan import FormPlan
+    from .model_mixins.creates import CreatesMetadataModelMixin
+
+    class RelatedVisitModel(CreatesMetadataModelMixin, Base):
+        pass
+
+
+KeyedInstance = namedtuple("KeyedInstance", "pk created modified user_created")
+
+
+class KeyedSourceModels:
+    """A class to find every keyed source model instance for a
+    related visit in one round trip.
+
+    Selects the pk, `created`, `modified` and `user_created` of each
+    CRF and requisition instance for the models in the visit's form
+    plan using one UNION ALL query (one per pk field type).
+
+    Results are keyed by (model, panel_name). `panel_name` is None
+    for CRFs.
+    """
+
+    def __init__(
+        self, related_visit: RelatedVisitModel, form_plan: FormPlan | None = None
+    ) -> None:
+        self._instances: dict[tuple[str, str | None], KeyedInstance] | None = None
+        self.related_visit = related_visit
+        self.form_plan = form_plan or get_form_plan(related_visit)
+        self.crf_models: frozenset[str] = self.form_plan.crf_models
+        self.requisition_models: frozenset[str] = self.form_plan.requisition_models
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.related_visit})"
+
+    def covers(self, model: str, panel_name: str | None = None) -> bool:
+        """Returns True if the model (and panel) was included in
+        the query.
+        """
+        if panel_name:
+            return (
+                model in self.requisition_models and panel_name in self.form_plan.panel_names
+            )
+        return model in self.crf_models
+
+    def covers_model(self, model: str) -> bool:
+        """Returns True if all instances of the model were included
+        in the query.
+        """
+        return model in self.crf_models or model in self.requisition_models
+
+    def get_all(self, model: str) -> list[tuple[str | None, KeyedInstance]]:
+        """Returns a sorted list of (panel_name, KeyedInstance) for
+        the model.
+        """
+        return sorted(
+            [(k[1], v) for k, v in self.instances.items() if k[0] == model],
+            key=lambda x: x[0] or "",
+        )
+
+    def get(self, model: str, panel_name: str | None = None) -> KeyedInstance | None:
+        return self.instances.get((model, panel_name))
+
+    def exists(self, model: str, panel_name: str | None = None) -> bool:
+        return (model, panel_name) in self.instances
+
+    @property
+    def instances(self) -> dict[tuple[str, str | None], KeyedInstance]:
+        if self._instances is None:
+            self._instances = {}
+            for queryset in self.get_querysets():
+                for model, panel_name, *values in queryset:
+                    self._instances.setdefault((model, panel_name), KeyedInstance(*values))
+        return self._instances
+
+    def get_querysets(self) -> list[QuerySet]:
+        """Returns a list of UNION ALL querysets, one per pk field
+        type of the source models.
+        """
+        querysets_by_pk_type: dict[str, list[QuerySet]] = {}
+        for model in sorted(self.crf_models | self.requisition_models):
+            try:
+                model_cls = django_apps.get_model(model)
+            except LookupError:
+                continue
+            querysets_by_pk_type.setdefault(model_cls._meta.pk.get_internal_type(), []).append(
+                self.get_queryset(model_cls, requisition=model in self.requisition_models)
+            )
+        return [
+            (
+                querysets[0].union(*querysets[1:], all=True)
+                if len(querysets) > 1
+                else querysets[0]
+            )
+            for querysets in querysets_by_pk_type.values()
+        ]
+
+    def get_queryset(self, model_cls, requisition: bool | None = None) -> QuerySet:
+        try:
+            related_visit_model_attr = model_cls.related_visit_model_attr()
+        except AttributeError:
+            related_visit_model_attr = "subject_visit"
+        panel_name = F("panel__name") if requisition else Value(None, output_field=CharField())
+        return (
+            model_cls.objects.filter(
+                **{f"{related_visit_model_attr}_id": self.related_visit.id}
+            )
+            .annotate(
+                keyed_model=Value(model_cls._meta.label_lower, output_field=CharField()),
+                keyed_panel_name=panel_name,
+            )
+            .values_list(
+                "keyed_model", "keyed_panel_name", "pk", "created", "modified", "user_created"
+            )
+            .order_by()
+        )
@@ -0,0 +1,90 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from django.core.management.color import color_style
+from edc_visit_tracking.utils import get_related_visit_model_cls
+
+from ...metadata_rules.metadata_rule_evaluator import explain_metadata_rules
+
+style = color_style()
+
+
+class Command(BaseCommand):
+    help = (
+        "Evaluate metadata rules for related visits without writing anything. "
+        "Shows the predicate outcome, the entry_status per target, "
+        "pending changes and the wall time and query count per rule."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--subject-identifier",
+            dest="subject_identifier",
+            default=None,
+            help="Limit to a subject",
+        )
+
+        parser.add_argument(
+            "--visit-code",
+            dest="visit_code",
+            default=None,
+            help="Limit to a visit code",
+        )
+
+        parser.add_argument(
+            "--limit",
+            dest="limit",
+            type=int,
+            default=100,
+            help="Maximum number of related visits. (Default: 100)",
+        )
+
+        parser.add_argument(
+            "--slowest",
+            dest="slowest",
+            type=int,
+            default=10,
+            help="Number of slowest rules to summarize. (Default: 10)",
+        )
+
+    def handle(self, *args, **options):
+        opts = {}
+        if options.get("subject_identifier"):
+            opts.update(subject_identifier=options.get("subject_identifier"))
+        if options.get("visit_code"):
+            opts.update(visit_code=options.get("visit_code"))
+        related_visits = (
+            get_related_visit_model_cls()
+            .objects.filter(**opts)
+            .order_by("subject_identifier", "report_datetime")[: options.get("limit")]
+        )
+        explanations = explain_metadata_rules(related_visits)
+        for explanation in explanations:
+            if explanation.skipped:
+                predicate_result = "skipped"
+            else:
+                predicate_result = str(explanation.predicate_result)
+            sys.stdout.write(
+                f"{explanation.related_visit} {explanation.rule} {predicate_result} "
+                f"{explanation.time_ms:.1f}ms {explanation.queries} queries\n"
+            )
+            for target in explanation.targets:
+                target_name = ".".join([t for t in target[:2] if t])
+                msg = (
+                    f"    {target_name} {target.current_entry_status} -> "
+                    f"{target.entry_status}\n"
+                )
+                sys.stdout.write(style.WARNING(msg) if target.would_change else msg)
+        totals = {}
+        for explanation in explanations:
+            time_ms, queries, count = totals.get(str(explanation.rule), (0, 0, 0))
+            totals[str(explanation.rule)] = (
+                time_ms + explanation.time_ms,
+                queries + explanation.queries,
+                count + 1,
+            )
+        sys.stdout.write(style.MIGRATE_HEADING("\nSlowest rules (total):\n"))
+        for rule, (time_ms, queries, count) in sorted(
+            totals.items(), key=lambda x: x[1][0], reverse=True
+        )[: options.get("slowest")]:
+            sys.stdout.write(f"  {rule} {time_ms:.1f}ms {queries} queries ({count} runs)\n")
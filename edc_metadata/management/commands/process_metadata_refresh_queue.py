@@ -0,0 +1,66 @@
+import sys
+
+from django.core.management.base import BaseCommand
+from django.core.management.color import color_style
+
+from edc_metadata.metadata_refresh_worker import MetadataRefreshWorker
+
+style = color_style()
+
+
+class Command(BaseCommand):
+    help = (
+        "Process the metadata refresh queue. Used with "
+        "settings.EDC_METADATA_ASYNC_REFRESH=True."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            dest="workers",
+            type=int,
+            default=1,
+            help="Number of worker threads. (Default: 1)",
+        )
+
+        parser.add_argument(
+            "--debounce",
+            dest="debounce",
+            type=float,
+            default=None,
+            help=(
+                "Seconds a related visit waits for further requests before "
+                "it is refreshed. (Default: settings.EDC_METADATA_ASYNC_REFRESH_DEBOUNCE)"
+            ),
+        )
+
+        parser.add_argument(
+            "--sleep",
+            dest="sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the queue is empty. (Default: 1.0)",
+        )
+
+        parser.add_argument(
+            "--once",
+            dest="once",
+            action="store_true",
+            default=False,
+            help="Exit once no queued related visit is ready",
+        )
+
+    def handle(self, *args, **options) -> None:
+        worker = MetadataRefreshWorker(
+            workers=options.get("workers"),
+            debounce=options.get("debounce"),
+            sleep=options.get("sleep"),
+            verbose=True,
+        )
+        try:
+            worker.run(once=options.get("once"))
+        except KeyboardInterrupt:
+            pass
+        sys.stdout.write(
+            style.SUCCESS(f"Done. Processed {worker.processed}, failed {worker.failed}.\n")
+        )
@@ -1,7 +1,63 @@
-from django.db import models
+from __future__ import annotations
 
+from datetime import timedelta
 
-class CrfMetadataManager(models.Manager):
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
+from edc_utils import get_utcnow
+
+from .cache import visit_key_fields, visit_metadata_cache
+from .utils import metadata_cache_enabled
+
+
+class MetadataQuerySet(models.QuerySet):
+    """A QuerySet that invalidates the cached metadata of the visits
+    it writes to. See `VisitMetadataCache`.
+
+    For `update` and `delete`, the visits are selected first. If
+    there are more than `VisitMetadataCache.max_keys`, the whole
+    cache is invalidated instead.
+    """
+
+    def invalidate_cache(self) -> None:
+        if metadata_cache_enabled():
+            visit_keys = list(
+                self.order_by()
+                .values_list(*visit_key_fields)
+                .distinct()[: visit_metadata_cache.max_keys + 1]
+            )
+            if len(visit_keys) > visit_metadata_cache.max_keys:
+                visit_metadata_cache.invalidate_all()
+            else:
+                visit_metadata_cache.invalidate(visit_keys)
+
+    def invalidate_cache_for_objs(self, objs) -> None:
+        if metadata_cache_enabled():
+            visit_metadata_cache.invalidate(
+                [visit_metadata_cache.get_visit_key(obj) for obj in objs]
+            )
+
+    def update(self, **kwargs) -> int:
+        self.invalidate_cache()
+        return super().update(**kwargs)
+
+    def delete(self):
+        self.invalidate_cache()
+        return super().delete()
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self.invalidate_cache_for_objs(objs)
+        return objs
+
+    def bulk_update(self, objs, *args, **kwargs) -> int:
+        updated = super().bulk_update(objs, *args, **kwargs)
+        self.invalidate_cache_for_objs(objs)
+        return updated
+
+
+class CrfMetadataManager(models.Manager.from_queryset(MetadataQuerySet)):
     use_in_migrations = True
 
     def get_by_natural_key(
@@ -23,7 +79,7 @@ class CrfMetadataManager(models.Manager):
         )
 
 
-class RequisitionMetadataManager(models.Manager):
+class RequisitionMetadataManager(models.Manager.from_queryset(MetadataQuerySet)):
     use_in_migrations = True
 
     def get_by_natural_key(
@@ -45,3 +101,125 @@ class RequisitionMetadataManager(models.Manager):
             visit_code=visit_code,
             visit_code_sequence=visit_code_sequence,
         )
+
+
+class MetadataRefreshQueueManager(models.Manager):
+    use_in_migrations = True
+
+    def enqueue(
+        self,
+        related_visit,
+        create: bool | None = None,
+        allow_create: bool | None = None,
+        source_model: str | None = None,
+    ):
+        """Adds the related visit to the queue or merges the request
+        into the queued one.
+
+        The debounce window restarts on every request. If the
+        related visit is in-flight, it is flagged to be refreshed
+        again.
+        """
+        opts = dict(
+            related_visit_model=related_visit._meta.label_lower,
+            related_visit_id=related_visit.pk,
+        )
+        with transaction.atomic():
+            try:
+                obj = self.select_for_update().get(**opts)
+            except ObjectDoesNotExist:
+                try:
+                    with transaction.atomic():
+                        return self.create(
+                            subject_identifier=related_visit.subject_identifier,
+                            create=bool(create),
+                            allow_create=bool(allow_create),
+                            source_model=source_model,
+                            requested_datetime=get_utcnow(),
+                            **opts,
+                        )
+                except IntegrityError:
+                    obj = self.select_for_update().get(**opts)
+            obj.create = obj.create or bool(create)
+            obj.allow_create = obj.allow_create or bool(allow_create)
+            if obj.source_model != source_model:
+                obj.source_model = None
+            obj.requested_datetime = get_utcnow()
+            obj.requeued = obj.started_datetime is not None
+            obj.attempts = 0
+            obj.error = None
+            obj.save(
+                update_fields=[
+                    "create",
+                    "allow_create",
+                    "source_model",
+                    "requested_datetime",
+                    "requeued",
+                    "attempts",
+                    "error",
+                ]
+            )
+        return obj
+
+    def pending(self, related_visit) -> bool:
+        """Returns True if the related visit is queued and not
+        in-flight.
+        """
+        return self.filter(
+            related_visit_model=related_visit._meta.label_lower,
+            related_visit_id=related_visit.pk,
+            started_datetime__isnull=True,
+        ).exists()
+
+    def discard(self, related_visit) -> int:
+        """Removes the related visit from the queue unless
+        in-flight, for example, after a synchronous refresh.
+        """
+        deleted, _ = self.filter(
+            related_visit_model=related_visit._meta.label_lower,
+            related_visit_id=related_visit.pk,
+            started_datetime__isnull=True,
+        ).delete()
+        return deleted
+
+    def claim(
+        self, debounce: float, stale_after: float, limit: int, max_attempts: int = 3
+    ) -> list:
+        """Returns a list of queued rows, now in-flight, whose
+        debounce window has passed.
+
+        Rows in-flight for longer than `stale_after` seconds are
+        assumed abandoned and may be claimed again. Rows that failed
+        `max_attempts` times are left in the queue with their error.
+        """
+        now = get_utcnow()
+        claimable = Q(started_datetime__isnull=True) | Q(
+            started_datetime__lt=now - timedelta(seconds=stale_after)
+        )
+        claimed = []
+        for obj in self.filter(
+            claimable,
+            requested_datetime__lte=now - timedelta(seconds=debounce),
+            attempts__lt=max_attempts,
+        ).order_by("requested_datetime")[:limit]:
+            # at most one worker claims a row
+            if self.filter(claimable, pk=obj.pk).update(started_datetime=now, requeued=False):
+                obj.started_datetime = now
+                obj.requeued = False
+                claimed.append(obj)
+        return claimed
+
+    def release(self, obj, error: str | None = None) -> None:
+        """Removes an in-flight row from the queue or, if requeued
+        or failed, returns it to the queue.
+        """
+        if error is None:
+            deleted, _ = self.filter(pk=obj.pk, requeued=False).delete()
+            if deleted:
+                return
+        self.filter(pk=obj.pk).update(
+            started_datetime=None,
+            requeued=False,
+            attempts=F("attempts") + (0 if error is None else 1),
+            error=error,
+        )
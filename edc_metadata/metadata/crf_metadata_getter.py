@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Type
 
+from ..constants import CRF
 from .metadata_getter import MetadataGetter, MetadataValidator
 
 
@@ -12,4 +13,6 @@ class CrfMetadataValidator(MetadataValidator):
 class CrfMetadataGetter(MetadataGetter):
     metadata_model: str = "edc_metadata.crfmetadata"
 
+    metadata_category: str = CRF
+
     metadata_validator_cls: Type[CrfMetadataValidator] = CrfMetadataValidator
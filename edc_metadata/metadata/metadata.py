@@ -1,22 +1,34 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, Type
+from uuid import uuid4
 
 from django.apps import apps as django_apps
 from django.contrib.admin.sites import all_sites
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import IntegrityError, transaction
-from edc_visit_schedule.visit import CrfCollection, RequisitionCollection
 from edc_visit_tracking.constants import MISSED_VISIT
 
 from ..constants import KEYED, NOT_REQUIRED, REQUIRED
+from ..form_plan import FormPlan, get_form_plan
+from ..keyed_source_models import KeyedSourceModels
 from ..metadata_mixins import SourceModelMetadataMixin
-from ..utils import verify_model_cls_registered_with_admin
+from ..utils import (
+    bulk_create_metadata_enabled,
+    get_audit_update_values,
+    reconcile_metadata_enabled,
+    verify_model_cls_registered_with_admin,
+)
 
 if TYPE_CHECKING:
     from edc_model.models import BaseUuidModel
     from edc_sites.model_mixins import SiteModelMixin
-    from edc_visit_schedule.visit import Crf, Requisition
+    from edc_visit_schedule.visit import (
+        Crf,
+        CrfCollection,
+        Requisition,
+        RequisitionCollection,
+    )
     from edc_visit_tracking.model_mixins import VisitModelMixin as Base
 
     from ..model_mixins.creates import CreatesMetadataModelMixin
@@ -57,8 +69,13 @@ class CrfCreator(SourceModelMetadataMixin):
         related_visit: RelatedVisitModel,
         update_keyed: bool,
         crf: Crf | Requisition,
+        keyed_source_models: KeyedSourceModels | None = None,
     ) -> None:
-        super().__init__(source_model=crf.model, related_visit=related_visit)
+        super().__init__(
+            source_model=crf.model,
+            related_visit=related_visit,
+            keyed_source_models=keyed_source_models,
+        )
         self._metadata_obj = None
         self.update_keyed = update_keyed
         self.crf = crf
@@ -80,6 +97,24 @@ class CrfCreator(SourceModelMetadataMixin):
         )
         return query_options
 
+    @property
+    def lookup_key(self) -> tuple:
+        """Returns a tuple that uniquely identifies the metadata
+        model instance for this CRF within the visit.
+        """
+        return (self.source_model,)
+
+    @staticmethod
+    def get_lookup_key(metadata_obj: CrfMetadata | RequisitionMetadata) -> tuple:
+        """Returns the `lookup_key` for an existing metadata model
+        instance.
+        """
+        return (metadata_obj.model,)
+
+    @property
+    def registered(self) -> bool:
+        return model_cls_registered_with_admin_site(self.source_model_cls)
+
     @property
     def metadata_obj(self) -> CrfMetadata | RequisitionMetadata | None:
         """Gets or creates a metadata model instance.
@@ -89,22 +124,13 @@ class CrfCreator(SourceModelMetadataMixin):
         """
         if not self._metadata_obj:
             metadata_obj = None
-            registered = model_cls_registered_with_admin_site(self.source_model_cls)
+            registered = self.registered
             try:
                 metadata_obj = self.metadata_model_cls.objects.get(**self.query_options)
             except ObjectDoesNotExist:
                 if registered:
                     with transaction.atomic():
-                        opts = dict(
-                            entry_status=REQUIRED if self.crf.required else NOT_REQUIRED,
-                            show_order=self.crf.show_order,
-                            site=self.related_visit.site,
-                            due_datetime=self.due_datetime,
-                            fill_datetime=self.fill_datetime,
-                            document_user=self.document_user,
-                            document_name=self.document_name,
-                        )
-                        opts.update(**self.query_options)
+                        opts = self.new_metadata_options
                         try:
                             metadata_obj = self.metadata_model_cls.objects.create(**opts)
                         except IntegrityError as e:
@@ -119,12 +145,45 @@ class CrfCreator(SourceModelMetadataMixin):
             self._metadata_obj = metadata_obj
         return self._metadata_obj
 
+    @property
+    def new_metadata_options(self) -> dict:
+        """Returns a dictionary of field values for a new metadata
+        model instance.
+        """
+        opts = dict(
+            entry_status=REQUIRED if self.crf.required else NOT_REQUIRED,
+            show_order=self.crf.show_order,
+            site=self.related_visit.site,
+            due_datetime=self.due_datetime,
+            fill_datetime=self.fill_datetime,
+            document_user=self.document_user,
+            document_name=self.document_name,
+        )
+        opts.update(**self.query_options)
+        return opts
+
+    def new_metadata_obj(self) -> CrfMetadata | RequisitionMetadata:
+        """Returns a new, unsaved, metadata model instance."""
+        return self.metadata_model_cls(**self.new_metadata_options)
+
     def create(self) -> CrfMetadata | RequisitionMetadata:
         """Creates a metadata model instance to represent a
         CRF, if it does not already exist (get_or_create).
         """
         return self.metadata_obj
 
+    def get_default_or_keyed_entry_status(self, entry_status: str) -> str:
+        """Returns the default `entry_status` unless the source model
+        already exists (KEYED).
+
+        An `entry_status` of KEYED is left as is.
+        """
+        if entry_status != KEYED and self.source_model_obj_exists:
+            entry_status = KEYED
+        elif entry_status in [REQUIRED, NOT_REQUIRED]:
+            entry_status = REQUIRED if self.crf.required else NOT_REQUIRED
+        return entry_status
+
     def update_entry_status_to_default_or_keyed(
         self, metadata_obj: CrfMetadata | RequisitionMetadata
     ):
@@ -137,19 +196,22 @@ class CrfCreator(SourceModelMetadataMixin):
         Note: that the default `entry_status` may be changed by rules
         later on.
         """
-        if metadata_obj.entry_status != KEYED and self.source_model_obj_exists:
-            metadata_obj.entry_status = KEYED
-            metadata_obj.save(update_fields=["entry_status"])
-            metadata_obj.refresh_from_db()
-        elif metadata_obj.entry_status in [REQUIRED, NOT_REQUIRED]:
-            if self.crf.required and metadata_obj.entry_status == NOT_REQUIRED:
-                metadata_obj.entry_status = REQUIRED
-                metadata_obj.save(update_fields=["entry_status"])
-                metadata_obj.refresh_from_db()
-            elif (not self.crf.required) and (metadata_obj.entry_status == REQUIRED):
-                metadata_obj.entry_status = NOT_REQUIRED
-                metadata_obj.save(update_fields=["entry_status"])
-                metadata_obj.refresh_from_db()
+        entry_status = self.get_default_or_keyed_entry_status(metadata_obj.entry_status)
+        if metadata_obj.entry_status != entry_status:
+            try:
+                updated = metadata_obj.compare_and_set_entry_status(
+                    metadata_obj.entry_status, entry_status
+                )
+            except ObjectDoesNotExist:
+                raise CreatesMetadataError(
+                    "Unable to update `entry_status`. Metadata was deleted by "
+                    f"another process. Got {metadata_obj}."
+                )
+            if not updated:
+                raise CreatesMetadataError(
+                    "Unable to update `entry_status`. Metadata was changed by "
+                    f"another process. Got {entry_status} != {metadata_obj.entry_status}."
+                )
         return metadata_obj
 
 
@@ -161,11 +223,13 @@ class RequisitionCreator(CrfCreator):
         requisition: Requisition,
         update_keyed: bool,
         related_visit: RelatedVisitModel,
+        keyed_source_models: KeyedSourceModels | None = None,
     ) -> None:
         super().__init__(
             crf=requisition,
             update_keyed=update_keyed,
             related_visit=related_visit,
+            keyed_source_models=keyed_source_models,
         )
         self.panel_name: str = f"{self.requisition.model}.{self.requisition.panel.name}"
 
@@ -179,6 +243,18 @@ class RequisitionCreator(CrfCreator):
         query_options.update({"panel_name": self.requisition.panel.name})
         return query_options
 
+    @property
+    def source_model_panel_name(self) -> str:
+        return self.requisition.panel.name
+
+    @property
+    def lookup_key(self) -> tuple:
+        return self.source_model, self.requisition.panel.name
+
+    @staticmethod
+    def get_lookup_key(metadata_obj: RequisitionMetadata) -> tuple:
+        return metadata_obj.model, metadata_obj.panel_name
+
     @property
     def source_model_options(self) -> dict:
         """Source model query options"""
@@ -188,77 +264,269 @@ class RequisitionCreator(CrfCreator):
 class Creator:
     crf_creator_cls = CrfCreator
     requisition_creator_cls = RequisitionCreator
+    keyed_source_models_cls = KeyedSourceModels
 
     def __init__(
         self,
         update_keyed: bool,
         related_visit: RelatedVisitModel,
+        bulk: bool | None = None,
     ) -> None:
         self.related_visit = related_visit
         self.update_keyed = update_keyed
+        self.bulk = bulk_create_metadata_enabled() if bulk is None else bulk
+
+    @property
+    def form_plan(self) -> FormPlan:
+        return get_form_plan(self.related_visit)
 
     @property
     def crfs(self) -> CrfCollection:
         """Returns list of crfs for this visit based on
         values for visit_code_sequence and MISSED_VISIT.
+
+        See also FormPlan.
         """
-        if self.related_visit.reason == MISSED_VISIT:
-            # missed visit CRFs only
-            crfs = self.related_visit.visit.crfs_missed.forms
-        elif self.related_visit.visit_code_sequence != 0:
-            # unscheduled + prn CRFs only
-            models = [crf.model for crf in self.related_visit.visit.crfs_unscheduled]
-            crfs = self.related_visit.visit.crfs_unscheduled.forms + tuple(
-                [f for f in self.related_visit.visit.crfs_prn if f.model not in models]
-            )
-        else:
-            # scheduled + prn CRFs only
-            models = [crf.model for crf in self.related_visit.visit.crfs]
-            crfs = self.related_visit.visit.crfs.forms + tuple(
-                [f for f in self.related_visit.visit.crfs_prn if f.model not in models]
-            )
-        return CrfCollection(*crfs, name="crfs")
+        return self.form_plan.crfs
 
     @property
     def requisitions(self) -> RequisitionCollection:
-        if self.related_visit.visit_code_sequence != 0:
-            # unscheduled + prn requisitions only
-            names = [f.name for f in self.related_visit.visit.requisitions_unscheduled]
-            requisitions = self.related_visit.visit.requisitions_unscheduled.forms + tuple(
-                [f for f in self.related_visit.visit.requisitions_prn if f.name not in names]
-            )
-        elif self.related_visit.reason == MISSED_VISIT:
-            # missed visit requisition only -- none
-            requisitions = ()
-        else:
-            # scheduled + prn requisitions only
-            names = [f.name for f in self.related_visit.visit.requisitions]
-            requisitions = self.related_visit.visit.requisitions.forms + tuple(
-                [f for f in self.related_visit.visit.requisitions_prn if f.name not in names]
-            )
-        return RequisitionCollection(*requisitions, name="requisitions")
+        return self.form_plan.requisitions
 
     def create(self) -> None:
         """Creates metadata for all CRFs and requisitions for
         the scheduled or unscheduled visit instance.
         """
-        for crf in self.crfs:
-            self.create_crf(crf)
-        for requisition in self.requisitions:
-            self.create_requisition(requisition)
+        if self.bulk:
+            self.bulk_create()
+        else:
+            keyed_source_models = self.keyed_source_models_cls(
+                related_visit=self.related_visit, form_plan=self.form_plan
+            )
+            for crf in self.crfs:
+                self.create_crf(crf, keyed_source_models=keyed_source_models)
+            for requisition in self.requisitions:
+                self.create_requisition(requisition, keyed_source_models=keyed_source_models)
+
+    def bulk_create(self) -> None:
+        """Creates metadata for all CRFs and requisitions for the
+        visit instance using one `bulk_create` and one `bulk_update`
+        per metadata model.
+
+        Existing metadata for the visit is selected in one query.
+        The `entry_status` of new and existing metadata model
+        instances is set in memory using the same logic as the
+        CRF/Requisition creators (`get_default_or_keyed_entry_status`).
+        """
+        self._bulk_write()
 
-    def create_crf(self, crf) -> CrfMetadata:
+    def reconcile(self, entry_status_not_in: list[str]) -> None:
+        """Updates metadata for the visit instance to match the CRFs
+        and requisitions for the visit, writing only what differs.
+
+        Inserts missing metadata, deletes metadata for forms no
+        longer in the visit unless the `entry_status` is in
+        `entry_status_not_in` and updates the `entry_status`,
+        `show_order`, `site`, `due_datetime`, `fill_datetime`,
+        `document_user` and `document_name` of existing metadata
+        where they differ from the values of a new instance.
+
+        The result is the same as `Destroyer.delete` followed by
+        `create` but an unchanged visit does not write anything.
+        """
+        self._bulk_write(entry_status_not_in=entry_status_not_in)
+
+    def _bulk_write(self, entry_status_not_in: list[str] | None = None) -> None:
+        keyed_source_models = self.keyed_source_models_cls(
+            related_visit=self.related_visit, form_plan=self.form_plan
+        )
+        crf_creators = [
+            self.crf_creator_cls(
+                crf=crf,
+                update_keyed=self.update_keyed,
+                related_visit=self.related_visit,
+                keyed_source_models=keyed_source_models,
+            )
+            for crf in self.crfs
+        ]
+        requisition_creators = [
+            self.requisition_creator_cls(
+                requisition=requisition,
+                update_keyed=self.update_keyed,
+                related_visit=self.related_visit,
+                keyed_source_models=keyed_source_models,
+            )
+            for requisition in self.requisitions
+        ]
+        with transaction.atomic():
+            for creator_cls, creators in [
+                (self.crf_creator_cls, crf_creators),
+                (self.requisition_creator_cls, requisition_creators),
+            ]:
+                if creators or entry_status_not_in is not None:
+                    self._bulk_write_for_creators(creator_cls, creators, entry_status_not_in)
+
+    def _bulk_write_for_creators(
+        self,
+        creator_cls: Type[CrfCreator],
+        creators: list[CrfCreator],
+        entry_status_not_in: list[str] | None,
+    ) -> None:
+        """Creates, updates and deletes metadata model instances for
+        one metadata model.
+
+        If `entry_status_not_in` is None, metadata for forms not in
+        `creators` is left as is.
+        """
+        metadata_model_cls = django_apps.get_model(creator_cls.metadata_model)
+        audit_values = get_audit_update_values(metadata_model_cls)
+        existing = {
+            creator_cls.get_lookup_key(obj): obj
+            for obj in metadata_model_cls.objects.filter(
+                subject_identifier=self.related_visit.subject_identifier,
+                **self.related_visit.metadata_query_options,
+            )
+        }
+        to_create, to_update, to_delete = [], [], []
+        update_fields = set()
+        seen = set()
+        for creator in creators:
+            if creator.lookup_key in seen:
+                continue
+            seen.add(creator.lookup_key)
+            metadata_obj = existing.pop(creator.lookup_key, None)
+            if not creator.registered:
+                if metadata_obj:
+                    to_delete.append(metadata_obj.pk)
+            elif not metadata_obj:
+                to_create.append(self.new_bulk_metadata_obj(creator, audit_values))
+            elif changed_fields := self.update_bulk_metadata_obj(
+                creator, metadata_obj, entry_status_not_in
+            ):
+                update_fields.update(changed_fields)
+                to_update.append(metadata_obj)
+        if entry_status_not_in is not None:
+            # remaining metadata is for forms not in this visit
+            to_delete.extend(
+                [
+                    obj.pk
+                    for obj in existing.values()
+                    if obj.entry_status not in entry_status_not_in
+                ]
+            )
+        self._bulk_save(
+            metadata_model_cls,
+            to_create=to_create,
+            to_update=to_update,
+            update_fields=update_fields,
+            to_delete=to_delete,
+            audit_values=audit_values,
+        )
+
+    def _bulk_save(
+        self,
+        metadata_model_cls: Type[CrfMetadata | RequisitionMetadata],
+        to_create: list[CrfMetadata | RequisitionMetadata],
+        to_update: list[CrfMetadata | RequisitionMetadata],
+        update_fields: set[str],
+        to_delete: list,
+        audit_values: dict,
+    ) -> None:
+        if to_delete:
+            metadata_model_cls.objects.filter(pk__in=to_delete).delete()
+        if to_create:
+            try:
+                metadata_model_cls.objects.bulk_create(to_create)
+            except IntegrityError as e:
+                raise CreatesMetadataError(
+                    f"Integrity error creating in bulk. Got {e}. See {self.related_visit}."
+                )
+        if to_update:
+            for metadata_obj in to_update:
+                for attr, value in audit_values.items():
+                    setattr(metadata_obj, attr, value)
+            metadata_model_cls.objects.bulk_update(to_update, [*update_fields, *audit_values])
+
+    @staticmethod
+    def new_bulk_metadata_obj(
+        creator: CrfCreator, audit_values: dict
+    ) -> CrfMetadata | RequisitionMetadata:
+        """Returns a new, unsaved, metadata model instance ready for
+        `bulk_create`.
+
+        `bulk_create` does not call `save()` so the primary key and
+        the audit field values usually set in `save()` are set here
+        (see `get_audit_update_values`).
+        """
+        from django_audit_fields.models.audit_model_mixin import update_device_fields
+
+        metadata_obj = creator.new_metadata_obj()
+        metadata_obj.entry_status = creator.get_default_or_keyed_entry_status(
+            metadata_obj.entry_status
+        )
+        metadata_obj.device_created, _ = update_device_fields(metadata_obj)
+        for attr, value in audit_values.items():
+            setattr(metadata_obj, attr, value)
+        metadata_obj.id = uuid4()
+        metadata_obj.created = metadata_obj.modified
+        return metadata_obj
+
+    @staticmethod
+    def update_bulk_metadata_obj(
+        creator: CrfCreator,
+        metadata_obj: CrfMetadata | RequisitionMetadata,
+        entry_status_not_in: list[str] | None,
+    ) -> list[str]:
+        """Updates an existing, unsaved, metadata model instance for
+        `bulk_update` and returns the names of the fields changed.
+
+        If reconciling (`entry_status_not_in` is not None), the other
+        values a re-created metadata model instance would get from
+        the creator are updated as well.
+        """
+        values = [
+            (
+                "entry_status",
+                "entry_status",
+                creator.get_default_or_keyed_entry_status(metadata_obj.entry_status),
+            )
+        ]
+        if entry_status_not_in is not None:
+            values.extend(
+                [
+                    ("show_order", "show_order", creator.crf.show_order),
+                    ("site", "site_id", creator.related_visit.site_id),
+                    ("due_datetime", "due_datetime", creator.due_datetime),
+                    ("fill_datetime", "fill_datetime", creator.fill_datetime),
+                    ("document_user", "document_user", creator.document_user),
+                    ("document_name", "document_name", creator.document_name),
+                ]
+            )
+        changed_fields = []
+        for field_name, attname, value in values:
+            if getattr(metadata_obj, attname) != value:
+                setattr(metadata_obj, attname, value)
+                changed_fields.append(field_name)
+        return changed_fields
+
+    def create_crf(
+        self, crf, keyed_source_models: KeyedSourceModels | None = None
+    ) -> CrfMetadata:
         return self.crf_creator_cls(
             crf=crf,
             update_keyed=self.update_keyed,
             related_visit=self.related_visit,
+            keyed_source_models=keyed_source_models,
         ).create()
 
-    def create_requisition(self, requisition) -> RequisitionMetadata:
+    def create_requisition(
+        self, requisition, keyed_source_models: KeyedSourceModels | None = None
+    ) -> RequisitionMetadata:
         return self.requisition_creator_cls(
             requisition=requisition,
             update_keyed=self.update_keyed,
             related_visit=self.related_visit,
+            keyed_source_models=keyed_source_models,
         ).create()
 
 
@@ -304,26 +572,36 @@ class Metadata:
         self,
         related_visit: RelatedVisitModel | CreatesMetadataModelMixin,
         update_keyed: bool,
+        reconcile: bool | None = None,
     ) -> None:
         self._reason = None
         self._reason_field = "reason"
         self.related_visit = related_visit
+        self.reconcile = reconcile_metadata_enabled() if reconcile is None else reconcile
         self.creator = self.creator_cls(related_visit=related_visit, update_keyed=update_keyed)
         self.destroyer = self.destroyer_cls(related_visit=related_visit)
 
     def prepare(self) -> bool:
         """Creates and deletes, or just deletes, metadata, depending
         on the related_visit `reason`.
+
+        If `reconcile` is True, existing metadata is updated to match
+        the visit instead of being deleted and re-created. See
+        `Creator.reconcile`.
         """
         metadata_exists = False
         if self.reason in self.related_visit.visit_schedule.delete_metadata_on_reasons:
             self.destroyer.delete()
         elif self.reason in self.related_visit.visit_schedule.create_metadata_on_reasons:
             if self.reason == MISSED_VISIT:
-                self.destroyer.delete(entry_status_not_in=[KEYED])
+                entry_status_not_in = [KEYED]
+            else:
+                entry_status_not_in = [KEYED, NOT_REQUIRED]
+            if self.reconcile:
+                self.creator.reconcile(entry_status_not_in=entry_status_not_in)
             else:
-                self.destroyer.delete(entry_status_not_in=[KEYED, NOT_REQUIRED])
-            self.creator.create()
+                self.destroyer.delete(entry_status_not_in=entry_status_not_in)
+                self.creator.create()
             metadata_exists = True
         else:
             raise CreatesMetadataError(
@@ -1,13 +1,24 @@
 from __future__ import annotations
 
+import hashlib
 from typing import TYPE_CHECKING, Any
 from warnings import warn
 
 from django.apps import apps as django_apps
 from django.contrib.admin.sites import all_sites
 from django.core.exceptions import MultipleObjectsReturned
-from django.db.models import QuerySet
-
+from django.db.models import Count, Max, QuerySet
+
+from ..cache import get_metadata_cache
+from ..constants import CRF, REQUISITION
+from ..utils import (
+    get_metadata_validation_key,
+    get_visit_crf_metadata,
+    get_visit_requisition_metadata,
+    metadata_cache_enabled,
+    metadata_validation_version,
+    verify_model_cls_registered_with_admin,
+)
 from .metadata import model_cls_registered_with_admin_site
 
 if TYPE_CHECKING:
@@ -21,6 +32,27 @@ class MetadataGetterError(Exception):
     pass
 
 
+def get_validation_token() -> str:
+    """Returns a token for the schema and admin registry metadata is
+    validated against.
+
+    Changes if settings.EDC_METADATA_VALIDATION_VERSION is bumped
+    or if models are registered or unregistered with Admin.
+    """
+    data = [metadata_validation_version(), verify_model_cls_registered_with_admin()]
+    if verify_model_cls_registered_with_admin():
+        data.append(
+            sorted(
+                {
+                    model_cls._meta.label_lower
+                    for admin_site in all_sites
+                    for model_cls in admin_site._registry
+                }
+            )
+        )
+    return hashlib.sha256(repr(data).encode()).hexdigest()
+
+
 class MetadataValidator:
     def __init__(
         self,
@@ -90,14 +122,26 @@ class MetadataGetter:
     * validates the entry status of each using the
       `metadata_validator_cls` and;
     * returns a requeried queryset.
+
+    Validation is skipped if the metadata for the timepoint is
+    unchanged since last validated against the same schema and
+    admin registry (see `get_validation_token`), unless
+    `force_validation`. Checking costs one aggregate query, or
+    none if read through the visit metadata cache (see
+    `get_fingerprint`). Saving or deleting a CRF/Requisition
+    resets the validated state for its timepoint (see
+    `reset_metadata_validation`).
     """
 
     metadata_model: str = None
 
+    metadata_category: str | None = None
+
     metadata_validator_cls = MetadataValidator
 
-    def __init__(self, appointment: Appointment) -> None:
+    def __init__(self, appointment: Appointment, force_validation: bool | None = None) -> None:
         self.options = {}
+        self.force_validation = force_validation
         self.appointment = appointment
         self.related_visit: RelatedVisitProtocol | None = getattr(
             self.appointment, "related_visit", None
@@ -113,6 +157,7 @@ class MetadataGetter:
             visit_schedule_name=instance.visit_schedule_name,
             schedule_name=instance.schedule_name,
         )
+        self.validation_key = get_metadata_validation_key(self.metadata_model, instance)
         queryset = self.metadata_model_cls.objects.filter(**query_options).order_by(
             "show_order"
         )
@@ -138,7 +183,39 @@ class MetadataGetter:
     def validate_metadata_objects(
         self, queryset: QuerySet[CrfMetadata | RequisitionMetadata]
     ) -> QuerySet[CrfMetadata | RequisitionMetadata]:
+        state = (get_validation_token(), self.get_fingerprint(queryset))
+        if (
+            not self.force_validation
+            and get_metadata_cache().get(self.validation_key) == state
+        ):
+            return queryset.all()
         metadata_obj: CrfMetadata | RequisitionMetadata
         for metadata_obj in queryset:
             self.metadata_validator_cls(metadata_obj, self.related_visit)
+        get_metadata_cache().set(self.validation_key, state)
         return queryset.all()
+
+    def get_fingerprint(
+        self, queryset: QuerySet[CrfMetadata | RequisitionMetadata]
+    ) -> tuple[int, Any]:
+        """Returns the number of metadata rows and the latest
+        `modified`.
+
+        Read through the visit metadata cache if
+        settings.EDC_METADATA_CACHE_ENABLED=True, otherwise with one
+        aggregate query.
+
+        Changes if a row is added, deleted or updated. Bulk
+        updates also set `modified` (see `get_audit_update_values`).
+        """
+        if metadata_cache_enabled() and self.metadata_category in [CRF, REQUISITION]:
+            instance = self.related_visit or self.appointment
+            if self.metadata_category == CRF:
+                metadata_objs = get_visit_crf_metadata(instance)
+            else:
+                metadata_objs = get_visit_requisition_metadata(instance)
+            return len(metadata_objs), max(
+                (obj.modified for obj in metadata_objs), default=None
+            )
+        aggregate = queryset.order_by().aggregate(count=Count("pk"), modified=Max("modified"))
+        return aggregate["count"], aggregate["modified"]
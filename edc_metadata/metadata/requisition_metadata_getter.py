@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from typing import Type
 
+from ..constants import REQUISITION
 from .metadata_getter import MetadataGetter, MetadataValidator
 
 
@@ -14,4 +15,6 @@ class RequisitionMetadataValidator(MetadataValidator):
 class RequisitionMetadataGetter(MetadataGetter):
     metadata_model: str = "edc_metadata.requisitionmetadata"
 
+    metadata_category: str = REQUISITION
+
     metadata_validator_cls: Type[RequisitionMetadataValidator] = RequisitionMetadataValidator
@@ -13,6 +13,7 @@ if TYPE_CHECKING:
     from edc_sites.model_mixins import SiteModelMixin
     from edc_visit_tracking.model_mixins import VisitModelMixin as Base
 
+    from ..keyed_source_models import KeyedInstance, KeyedSourceModels
     from ..model_mixins.creates import CreatesMetadataModelMixin
 
     class RelatedVisitModel(SiteModelMixin, CreatesMetadataModelMixin, Base, BaseUuidModel):
@@ -22,10 +23,16 @@ if TYPE_CHECKING:
 class SourceModelMetadataMixin:
     """Mixin class for Metadata and MetadataUpdater class."""
 
-    def __init__(self, source_model: str, related_visit: RelatedVisitModel = None):
+    def __init__(
+        self,
+        source_model: str,
+        related_visit: RelatedVisitModel = None,
+        keyed_source_models: KeyedSourceModels | None = None,
+    ):
         self._source_model_obj = None
         self._source_model = source_model
         self.related_visit = related_visit
+        self.keyed_source_models = keyed_source_models
 
     @property
     def source_model(self) -> str:
@@ -54,9 +61,34 @@ class SourceModelMetadataMixin:
         """
         return dict(subject_visit_id=self.related_visit.id)
 
+    @property
+    def source_model_panel_name(self) -> str | None:
+        """Returns the panel name of the source model, if a
+        requisition, or None.
+        """
+        return None
+
+    @property
+    def use_keyed_source_models(self) -> bool:
+        """Returns True if the keyed state of the source model can
+        be read from `keyed_source_models` instead of querying.
+        """
+        return bool(
+            self.keyed_source_models
+            and self.keyed_source_models.covers(
+                self.source_model, self.source_model_panel_name
+            )
+        )
+
+    @property
+    def keyed_instance(self) -> KeyedInstance | None:
+        return self.keyed_source_models.get(self.source_model, self.source_model_panel_name)
+
     @property
     def source_model_obj_exists(self) -> bool:
         """Returns True if the source model instance exists."""
+        if self.use_keyed_source_models:
+            return self.keyed_instance is not None
         return self.source_model_cls.objects.filter(**self.source_model_options).exists()
 
     @property
@@ -65,11 +97,17 @@ class SourceModelMetadataMixin:
 
     @property
     def fill_datetime(self) -> datetime | None:
+        if self.use_keyed_source_models:
+            return getattr(self.keyed_instance, "created", None)
         return getattr(self.source_model_obj, "created", None)
 
     @property
     def document_user(self) -> str | None:
-        return getattr(self.source_model_obj, "user_created", self.related_visit.user_created)
+        if self.use_keyed_source_models:
+            obj = self.keyed_instance
+        else:
+            obj = self.source_model_obj
+        return getattr(obj, "user_created", self.related_visit.user_created)
 
     @property
     def document_name(self) -> str | None:
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps as django_apps
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection
+
+from .models import MetadataRefreshQueue
+from .refresh_coalescer import DirtyRelatedVisit
+from .utils import async_metadata_refresh_debounce
+
+
+class MetadataRefreshWorker:
+    """A class to process the metadata refresh queue with a pool of
+    worker threads.
+
+    Each related visit has at most one refresh in-flight (see
+    `MetadataRefreshQueue`) and is only refreshed once no further
+    request was queued for `debounce` seconds.
+    """
+
+    batch_size: int = 100
+    stale_after: float = 600.0
+    max_attempts: int = 3
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        debounce: float | None = None,
+        sleep: float | None = None,
+        verbose: bool | None = None,
+    ):
+        self.workers = workers or 1
+        self.debounce = async_metadata_refresh_debounce() if debounce is None else debounce
+        self.sleep = 1.0 if sleep is None else sleep
+        self.verbose = verbose
+        self.processed = 0
+        self.failed = 0
+
+    def run(self, once: bool | None = None) -> None:
+        """Processes the queue until interrupted or, if `once`,
+        until no row is ready.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            while True:
+                claimed = MetadataRefreshQueue.objects.claim(
+                    self.debounce,
+                    self.stale_after,
+                    self.batch_size,
+                    max_attempts=self.max_attempts,
+                )
+                if claimed and executor:
+                    list(executor.map(self.process_in_thread, claimed))
+                elif claimed:
+                    for obj in claimed:
+                        self.process(obj)
+                elif once:
+                    break
+                else:
+                    time.sleep(self.sleep)
+        finally:
+            if executor:
+                executor.shutdown()
+
+    def process_in_thread(self, obj: MetadataRefreshQueue) -> None:
+        try:
+            self.process(obj)
+        finally:
+            connection.close()
+
+    def process(self, obj: MetadataRefreshQueue) -> None:
+        """Refreshes the related visit of a claimed row."""
+        try:
+            related_visit = (
+                django_apps.get_model(obj.related_visit_model)
+                .objects.select_related("appointment")
+                .get(pk=obj.related_visit_id)
+            )
+        except (LookupError, ObjectDoesNotExist):
+            # the related visit no longer exists
+            MetadataRefreshQueue.objects.filter(pk=obj.pk).delete()
+            return
+        try:
+            DirtyRelatedVisit.from_queue(related_visit, obj).refresh()
+        except Exception:
+            self.failed += 1
+            MetadataRefreshQueue.objects.release(obj, error=traceback.format_exc())
+            self._message(f"  Failed {obj}.\n")
+        else:
+            self.processed += 1
+            MetadataRefreshQueue.objects.release(obj)
+
+    def _message(self, msg: str) -> None:
+        if self.verbose:
+            sys.stdout.write(msg)
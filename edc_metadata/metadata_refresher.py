@@ -14,7 +14,12 @@ from tqdm import tqdm
 from edc_metadata.models import CrfMetadata, RequisitionMetadata
 
 from .metadata import CrfMetadataGetter, RequisitionMetadataGetter
-from .metadata_rules import site_metadata_rules
+from .metadata_rules import (
+    CohortRuleEvaluator,
+    PushdownRuleEvaluator,
+    site_metadata_rules,
+)
+from .utils import cohort_metadata_rules_enabled, pushdown_metadata_rules_enabled
 
 
 class MetadataRefresher:
@@ -43,26 +48,54 @@ class MetadataRefresher:
     @property
     def source_models(self) -> list[str]:
         if not self._source_models:
-            self._source_models = []
-            for app_label, rule_groups_list in site_metadata_rules.rule_groups.items():
-                for rule_groups in rule_groups_list:
-                    if (
-                        rule_groups._meta.source_model
-                        != get_related_visit_model_cls()._meta.label_lower
-                    ):
-                        self._source_models.append(rule_groups._meta.source_model)
-            self._source_models = list(set(self._source_models))
-            self._source_models.sort()
-            self._source_models.insert(0, get_related_visit_model_cls()._meta.label_lower)
+            related_visit_model = get_related_visit_model_cls()._meta.label_lower
+            self._source_models = [related_visit_model] + [
+                source_model
+                for source_model in site_metadata_rules.source_models
+                if source_model != related_visit_model
+            ]
             self._message(f"  Found source models: {', '.join(self.source_models)}.\n")
         return self._source_models
 
     @staticmethod
     def run_metadata_rules(source_model_cls: Any, total: int) -> None:
-        """Updates rules for all instances of this source model"""
-        for instance in tqdm(source_model_cls.objects.all(), total=total):
-            if django_apps.get_app_config("edc_metadata").metadata_rules_enabled:
+        """Updates rules for all instances of this source model.
+
+        Simple CRF rule groups are first applied to all instances
+        with set-based UPDATEs (see `PushdownRuleEvaluator`) or
+        evaluated in chunks (see `CohortRuleEvaluator`). The
+        remaining rule groups are then evaluated per instance.
+        Instances that could not be evaluated in bulk get a full
+        evaluation.
+        """
+        if not django_apps.get_app_config("edc_metadata").metadata_rules_enabled:
+            return
+        bulk_rule_groups = []
+        fallback = set()
+        evaluator_classes = []
+        if pushdown_metadata_rules_enabled():
+            evaluator_classes.append(PushdownRuleEvaluator)
+        if cohort_metadata_rules_enabled():
+            evaluator_classes.append(CohortRuleEvaluator)
+        for evaluator_cls in evaluator_classes:
+            evaluator = evaluator_cls(source_model_cls, exclude_rule_groups=bulk_rule_groups)
+            evaluator.evaluate()
+            bulk_rule_groups.extend(evaluator.rule_groups)
+            fallback.update(evaluator.fallback)
+        if not bulk_rule_groups:
+            for instance in tqdm(source_model_cls.objects.all(), total=total):
                 instance.run_metadata_rules()
+            return
+        queryset = source_model_cls.objects.all()
+        if not source_model_cls.metadata_rule_evaluator_cls(
+            related_visit=source_model_cls(), exclude_rule_groups=bulk_rule_groups
+        ).rule_groups:
+            queryset = queryset.filter(id__in=fallback)
+            total = len(fallback)
+        for instance in tqdm(queryset, total=total):
+            instance.run_metadata_rules(
+                exclude_rule_groups=None if instance.id in fallback else bulk_rule_groups
+            )
 
     def create_or_update_metadata(self, source_model_cls: Any, total: int) -> None:
         """Creates or updates CRF/Requisition metadata for all instances
@@ -154,5 +187,5 @@ class MetadataRefresher:
         appointments = Appointment.objects.all().order_by("site_id")
         total = appointments.count()
         for appointment in tqdm(appointments, total=total):
-            CrfMetadataGetter(appointment=appointment)
-            RequisitionMetadataGetter(appointment=appointment)
+            CrfMetadataGetter(appointment=appointment, force_validation=True)
+            RequisitionMetadataGetter(appointment=appointment, force_validation=True)
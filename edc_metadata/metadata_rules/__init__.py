@@ -1,9 +1,11 @@
+from .cohort_evaluator import CohortRuleEvaluator
 from .crf import CrfRule, CrfRuleGroup, CrfRuleModelConflict
 from .decorators import RegisterRuleGroupError, register
 from .logic import Logic, RuleLogicError
 from .metadata_rule_evaluator import MetadataRuleEvaluator
 from .persistant_singleton_mixin import PersistantSingletonMixin
 from .predicate import PF, NoValueError, P, PredicateError
+from .pushdown_evaluator import PushdownRuleEvaluator
 from .requisition import (
     RequisitionRule,
     RequisitionRuleGroup,
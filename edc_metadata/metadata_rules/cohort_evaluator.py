@@ -0,0 +1,365 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from django.apps import apps as django_apps
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Case, Value, When
+from edc_appointment.constants import MISSED_APPT
+from edc_registration import get_registered_subject_model_cls
+from edc_visit_tracking.constants import MISSED_VISIT
+
+from ..constants import DO_NOTHING, KEYED
+from ..form_plan import get_form_plan_for_visit_code
+from ..utils import get_audit_update_values, get_crf_metadata_model_cls
+from .crf import CrfRuleGroup
+from .predicate import P
+from .site import site_metadata_rules
+
+if TYPE_CHECKING:
+    from django.db.models import Model
+
+    from .rule import Rule
+
+VISIT = "visit"
+REGISTERED_SUBJECT = "registered_subject"
+SOURCE = "source"
+
+visit_key_fields = [
+    "subject_identifier",
+    "visit_schedule_name",
+    "schedule_name",
+    "visit_code",
+    "visit_code_sequence",
+]
+
+
+class CohortRuleEvaluator:
+    """A class to evaluate simple CRF rule groups for all related
+    visits in chunks instead of one related visit at a time.
+
+    A rule group is evaluated here if it is a CrfRuleGroup with a
+    source model and every rule has a `P(attr, op, value)`
+    predicate where `attr` resolves to a column of the related
+    visit, the registered subject or the source model, in the same
+    order as `P.get_value`. Rule groups that share a target with
+    any other rule group are left to the per visit evaluation.
+
+    For each chunk of related visits the columns are read with one
+    `values()` query per model and each predicate is applied to
+    each value in the column. The decided
+    entry_status per (related visit, target model) is applied with
+    one UPDATE per entry_status.
+
+    Related visits that cannot be evaluated here (missed visit
+    reports, no registered subject, more than one source model
+    instance or a predicate that raises) are added to `fallback`
+    to be evaluated by `MetadataRuleEvaluator` instead.
+    """
+
+    chunk_size = 500
+
+    def __init__(
+        self,
+        related_visit_model_cls: Any,
+        rule_groups: list | None = None,
+        exclude_rule_groups: list | None = None,
+    ) -> None:
+        self.related_visit_model_cls = related_visit_model_cls
+        self.related_visit_model = related_visit_model_cls._meta.label_lower
+        self.registered_subject_model_cls = get_registered_subject_model_cls()
+        if rule_groups is None:
+            rule_groups = site_metadata_rules.get_rule_groups_for_related_visit_model(
+                self.related_visit_model
+            )
+        rule_groups = [r for r in rule_groups if r not in (exclude_rule_groups or [])]
+        self.columns: dict[Any, dict[str, tuple[str, str]]] = {}
+        self.rule_groups = self.get_eligible_rule_groups(rule_groups)
+        self.fallback: set = set()
+        self.updated: int = 0
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.related_visit_model})"
+
+    def get_eligible_rule_groups(self, rule_groups: list) -> list:
+        """Returns the rule groups that can be evaluated for a cohort,
+        in order.
+
+        Sets `self.columns` to {rule_group: {attr: (where, column)}}.
+        """
+        candidates = []
+        for rule_group in rule_groups:
+            if columns := self.get_columns(rule_group):
+                self.columns[rule_group] = columns
+                candidates.append(rule_group)
+        other_targets = {
+            target
+            for rule_group in rule_groups
+            if rule_group not in self.columns
+            for target in site_metadata_rules.get_targets(rule_group)
+        }
+        eligible = []
+        for rule_group in candidates:
+            if site_metadata_rules.get_targets(rule_group) & other_targets:
+                self.columns.pop(rule_group)
+            else:
+                eligible.append(rule_group)
+        return eligible
+
+    def get_columns(self, rule_group: Any) -> dict[str, tuple[str, str]] | None:
+        """Returns {attr: (where, column)} for the predicates of the
+        rule group or None if the rule group is not eligible.
+        """
+        source_model = rule_group._meta.source_model
+        if (
+            not issubclass(rule_group, CrfRuleGroup)
+            or not source_model
+            or source_model == self.related_visit_model
+        ):
+            return None
+        source_model_cls = django_apps.get_model(source_model)
+        columns = {}
+        for rule in rule_group._meta.options.get("rules"):
+            predicate = rule.predicate
+            if (
+                type(predicate) is not P
+                or not rule.target_models
+                or any(
+                    m.split(".")[1] == self.related_visit_model.split(".")[1]
+                    for m in rule.target_models
+                )
+            ):
+                return None
+            if predicate.attr not in columns:
+                if not (column := self.resolve(predicate.attr, rule, source_model_cls)):
+                    return None
+                columns[predicate.attr] = column
+        return columns
+
+    def resolve(
+        self, attr: str, rule: Rule, source_model_cls: type[Model]
+    ) -> tuple[str, str] | None:
+        """Returns (where, column) for an attr or None.
+
+        Follows the precedence of `P.get_value`: the related visit,
+        the registered subject, the rule and then the source model.
+        """
+        for where, model_cls in [
+            (VISIT, self.related_visit_model_cls),
+            (REGISTERED_SUBJECT, self.registered_subject_model_cls),
+        ]:
+            if hasattr(model_cls, attr):
+                return (where, attr) if self.is_column(model_cls, attr) else None
+        if attr in rule.compiled.options:
+            return None
+        if self.is_column(source_model_cls, attr):
+            return SOURCE, attr
+        return None
+
+    @staticmethod
+    def is_column(model_cls: type[Model], attr: str) -> bool:
+        try:
+            field = model_cls._meta.get_field(attr)
+        except FieldDoesNotExist:
+            return False
+        return field.concrete and not field.is_relation and field.attname == attr
+
+    def evaluate(self) -> None:
+        """Evaluates the eligible rule groups for all related visits,
+        one chunk at a time.
+        """
+        if not self.rule_groups:
+            return
+        visit_columns = sorted(
+            {
+                column
+                for columns in self.columns.values()
+                for where, column in columns.values()
+                if where == VISIT
+            }
+        )
+        fields = ["id", *visit_key_fields, "reason", "report_datetime", "user_created"]
+        queryset = self.related_visit_model_cls.objects.values(
+            *fields, "appointment__appt_timing", *[c for c in visit_columns if c not in fields]
+        ).order_by("id")
+        last_id = None
+        while True:
+            chunk = queryset.filter(id__gt=last_id) if last_id else queryset
+            rows = list(chunk[: self.chunk_size])
+            if not rows:
+                break
+            self.evaluate_chunk(rows)
+            last_id = rows[-1]["id"]
+
+    def evaluate_chunk(self, rows: list[dict]) -> None:
+        decisions: dict[tuple[Any, str], str] = {}
+        rows = [row for row in rows if row["appointment__appt_timing"] != MISSED_APPT]
+        self.fallback.update(row["id"] for row in rows if row["reason"] == MISSED_VISIT)
+        rows = [row for row in rows if row["id"] not in self.fallback]
+        registered_subjects = self.get_registered_subject_rows(rows)
+        for row in rows:
+            if row["subject_identifier"] not in registered_subjects:
+                self.fallback.add(row["id"])
+        source_rows = self.get_source_rows(rows)
+        rows = [row for row in rows if row["id"] not in self.fallback]
+        plans = {
+            row["id"]: get_form_plan_for_visit_code(
+                *[row[k] for k in visit_key_fields[1:]], missed=False
+            )
+            for row in rows
+        }
+        for rule_group in self.rule_groups:
+            source_model = rule_group._meta.source_model
+            group_rows = [row for row in rows if source_model in plans[row["id"]].crf_models]
+            for rule in rule_group._meta.options.get("rules"):
+                where, column = self.columns[rule_group][rule.predicate.attr]
+                values = []
+                for row in group_rows:
+                    if where == VISIT:
+                        values.append(row[column])
+                    elif where == REGISTERED_SUBJECT:
+                        values.append(registered_subjects[row["subject_identifier"]][column])
+                    else:
+                        source_row = source_rows[source_model].get(row["id"], {})
+                        values.append(source_row.get(column))
+                decisions.update(
+                    self.decide(rule, group_rows, self.apply(rule.predicate, values), plans)
+                )
+        self.update(
+            [row for row in rows if row["id"] not in self.fallback],
+            {k: v for k, v in decisions.items() if k[0] not in self.fallback},
+        )
+
+    def decide(
+        self, rule: Rule, rows: list[dict], predicate_results: list, plans: dict
+    ) -> dict[tuple[Any, str], str]:
+        """Returns {(related visit id, target model): entry_status}
+        for the rule given the predicate result per row.
+
+        Adds related visits where the predicate raised to `fallback`.
+        """
+        decisions = {}
+        for row, predicate_result in zip(rows, predicate_results):
+            if predicate_result is None:
+                self.fallback.add(row["id"])
+                continue
+            entry_status = rule.consequence if predicate_result else rule.alternative
+            if entry_status == DO_NOTHING:
+                continue
+            for target_model in rule.target_models:
+                if target_model in plans[row["id"]].crf_models:
+                    decisions[(row["id"], target_model)] = entry_status
+        return decisions
+
+    def get_registered_subject_rows(self, rows: list[dict]) -> dict[str, dict]:
+        columns = {
+            column
+            for columns in self.columns.values()
+            for where, column in columns.values()
+            if where == REGISTERED_SUBJECT
+        }
+        return {
+            obj["subject_identifier"]: obj
+            for obj in self.registered_subject_model_cls.objects.filter(
+                subject_identifier__in={row["subject_identifier"] for row in rows}
+            ).values("subject_identifier", *columns)
+        }
+
+    def get_source_rows(self, rows: list[dict]) -> dict[str, dict[Any, dict]]:
+        """Returns {source_model: {related visit id: values}}.
+
+        Adds related visits with more than one source model instance
+        to `fallback`.
+        """
+        columns_by_source_model: dict[str, set] = {}
+        for rule_group, columns in self.columns.items():
+            columns_by_source_model.setdefault(rule_group._meta.source_model, set()).update(
+                column for where, column in columns.values() if where == SOURCE
+            )
+        source_rows = {}
+        ids = [row["id"] for row in rows]
+        for source_model, columns in columns_by_source_model.items():
+            model_cls = django_apps.get_model(source_model)
+            fk = f"{self.get_related_visit_model_attr(model_cls)}_id"
+            source_rows[source_model] = {}
+            for obj in (
+                model_cls.objects.filter(**{f"{fk}__in": ids}).values(fk, *columns).order_by()
+            ):
+                if obj[fk] in source_rows[source_model]:
+                    self.fallback.add(obj[fk])
+                source_rows[source_model][obj[fk]] = obj
+        return source_rows
+
+    @staticmethod
+    def get_related_visit_model_attr(model_cls: type[Model]) -> str:
+        try:
+            return model_cls.related_visit_model_attr()
+        except AttributeError:
+            return "subject_visit"
+
+    @staticmethod
+    def apply(predicate: P, values: list) -> list[bool | None]:
+        """Returns the predicate result for each value or None if the
+        operator raises for that value.
+        """
+        func = predicate.func
+        expected_value = predicate.expected_value
+
+        def safe_func(x):
+            try:
+                return func(x, expected_value)
+            except Exception:
+                return None
+
+        return [safe_func(x) for x in values]
+
+    def update(self, rows: list[dict], decisions: dict[tuple[Any, str], str]) -> None:
+        """Updates CRF metadata for the chunk to the decided
+        entry_status with one UPDATE per entry_status.
+
+        KEYED metadata and metadata already at the decided
+        entry_status are not touched.
+        """
+        if not decisions:
+            return
+        rows_by_key = {tuple(row[k] for k in visit_key_fields): row for row in rows}
+        pks_by_entry_status: dict[str, dict[Any, list]] = {}
+        for pk, *key, model, entry_status in (
+            get_crf_metadata_model_cls()
+            .objects.filter(
+                subject_identifier__in={row["subject_identifier"] for row in rows},
+                model__in={model for _, model in decisions},
+            )
+            .exclude(entry_status=KEYED)
+            .values_list("pk", *visit_key_fields, "model", "entry_status")
+        ):
+            if not (row := rows_by_key.get(tuple(key))):
+                continue
+            decided = decisions.get((row["id"], model))
+            if decided and decided != entry_status:
+                pks_by_entry_status.setdefault(decided, {}).setdefault(row["id"], []).append(
+                    pk
+                )
+        rows_by_id = {row["id"]: row for row in rows}
+        for entry_status, pks_by_visit in pks_by_entry_status.items():
+            pks = [pk for pks in pks_by_visit.values() for pk in pks]
+            self.updated += (
+                get_crf_metadata_model_cls()
+                .objects.filter(pk__in=pks)
+                .update(
+                    entry_status=entry_status,
+                    due_datetime=self.case(pks_by_visit, rows_by_id, "report_datetime"),
+                    fill_datetime=None,
+                    document_user=self.case(pks_by_visit, rows_by_id, "user_created"),
+                    **get_audit_update_values(get_crf_metadata_model_cls()),
+                )
+            )
+
+    @staticmethod
+    def case(pks_by_visit: dict[Any, list], rows_by_id: dict[Any, dict], field: str) -> Case:
+        return Case(
+            *[
+                When(pk__in=pks, then=Value(rows_by_id[visit_id][field]))
+                for visit_id, pks in pks_by_visit.items()
+            ]
+        )
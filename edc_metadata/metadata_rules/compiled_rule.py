@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from .predicate import PF, P
+
+if TYPE_CHECKING:
+    from .logic import Logic
+    from .rule import Rule
+
+
+class CompiledRule:
+    """A compact, read-only form of a rule prepared once by the
+    rule group metaclass.
+
+    Holds the validated logic, the options passed to the rule
+    evaluator, the resolved target models and, per related visit
+    model, the errors the rule raises when evaluated.
+
+    Do not change a rule after it is compiled. See `Rule.compile`.
+    """
+
+    __slots__ = (
+        "rule",
+        "logic",
+        "options",
+        "target_models",
+        "accepts_source_row",
+        "_errors",
+        "_target_model_errors",
+    )
+
+    def __init__(self, rule: Rule) -> None:
+        self.rule = rule
+        self.logic: Logic = rule.logic
+        self.options: dict[str, Any] = {
+            k: v for k, v in rule.__dict__.items() if not k.startswith("_")
+        }
+        self.target_models: tuple[str, ...] = tuple(rule.target_models or [])
+        self.accepts_source_row: bool = isinstance(rule.predicate, (P, PF))
+        self._errors: dict[str, list[tuple[type[Exception], str]]] = {}
+        self._target_model_errors: dict[str, list[tuple[type[Exception], str]]] = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.rule!r})"
+
+    def check(self, related_visit_model: str) -> None:
+        """Raises the first error of the rule, if any, for the
+        related visit model (label_lower).
+        """
+        try:
+            errors = self._errors[related_visit_model]
+        except KeyError:
+            errors = self.rule.get_errors(related_visit_model)
+            self._errors[related_visit_model] = errors
+        if errors:
+            exception_cls, message = errors[0]
+            raise exception_cls(message)
+
+    def check_target_models(self, related_visit_model: str) -> None:
+        """Raises the first target model error of the rule, if
+        any, for the related visit model (label_lower).
+        """
+        try:
+            errors = self._target_model_errors[related_visit_model]
+        except KeyError:
+            errors = self.rule.get_target_model_errors(related_visit_model)
+            self._target_model_errors[related_visit_model] = errors
+        if errors:
+            exception_cls, message = errors[0]
+            raise exception_cls(message)
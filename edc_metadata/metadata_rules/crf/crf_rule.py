@@ -1,17 +1,8 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
-
 from ...constants import CRF
 from ..rule import Rule
-
-if TYPE_CHECKING:
-    from edc_visit_tracking.model_mixins import VisitModelMixin as Base
-
-    from ...model_mixins.creates import CreatesMetadataModelMixin
-
-    class RelatedVisitModel(CreatesMetadataModelMixin, Base):
-        pass
+from ..rule_group import TargetModelConflict
 
 
 class CrfRuleModelConflict(Exception):
@@ -24,10 +15,37 @@ class CrfRule(Rule):
         self.metadata_category = CRF
         self.target_models = target_models
 
-    def run(self, related_visit: RelatedVisitModel = None) -> dict[str, str]:
+    def get_errors(self, related_visit_model: str) -> list[tuple[type[Exception], str]]:
+        errors = []
         if self.source_model in self.target_models:
-            raise CrfRuleModelConflict(
-                f"Source model cannot be a target model. Got '{self.source_model}' "
-                f"is in target models {self.target_models}"
+            errors.append(
+                (
+                    CrfRuleModelConflict,
+                    f"Source model cannot be a target model. Got '{self.source_model}' "
+                    f"is in target models {self.target_models}",
+                )
             )
-        return super().run(related_visit=related_visit)
+        return errors + super().get_errors(related_visit_model)
+
+    def get_target_model_errors(
+        self, related_visit_model: str
+    ) -> list[tuple[type[Exception], str]]:
+        errors = []
+        for target_model in self.target_models:
+            if target_model == related_visit_model:
+                errors.append(
+                    (
+                        TargetModelConflict,
+                        f"Target model and visit model are the same! "
+                        f"Got {target_model}=={related_visit_model}",
+                    )
+                )
+            elif target_model.split(".")[1] == related_visit_model.split(".")[1]:
+                errors.append(
+                    (
+                        TargetModelConflict,
+                        f"Target model and visit model might be the same. "
+                        f"Got {target_model}~={related_visit_model}",
+                    )
+                )
+        return errors
@@ -2,18 +2,20 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Any, Self, Tuple
 
-from edc_visit_schedule.visit import CrfCollection
-
 from ...constants import NOT_REQUIRED, REQUIRED
+from ...form_plan import get_form_plan
 from ...metadata_updater import MetadataUpdater
-from ..rule_group import RuleGroup, RuleGroupError, TargetModelConflict
+from ..rule_evaluation_context import RuleEvaluationContext
+from ..rule_group import RuleGroup, RuleGroupError
 from ..rule_group_metaclass import RuleGroupMetaclass
 
 if TYPE_CHECKING:
+    from edc_visit_schedule.visit import CrfCollection
     from edc_visit_tracking.model_mixins import VisitModelMixin as Base
 
     from ...model_mixins.creates import CreatesMetadataModelMixin
     from ...models import CrfMetadata
+    from ..rule_outcomes import RuleOutcomes
 
     class RelatedVisitModel(CreatesMetadataModelMixin, Base):
         pass
@@ -35,62 +37,73 @@ class CrfRuleGroup(RuleGroup, metaclass=RuleGroupMetaclass):
         """Returns a list of scheduled or unscheduled
         CRFs + PRNs depending on visit_code_sequence.
         """
-        if visit.visit_code_sequence != 0:
-            crfs = CrfCollection(
-                *visit.visit.crfs_unscheduled, *visit.visit.crfs_prn, name="crfs_for_visit"
-            )
-        else:
-            crfs = CrfCollection(
-                *visit.visit.crfs, *visit.visit.crfs_prn, name="crfs_for_visit"
-            )
-        return crfs
+        return get_form_plan(visit, missed=False).crfs
 
     @classmethod
     def evaluate_rules(
         cls: Any,
         related_visit: RelatedVisitModel = None,
         allow_create: bool | None = None,
+        context: RuleEvaluationContext | None = None,
+        outcomes: RuleOutcomes | None = None,
     ) -> Tuple[dict[str, dict[str, dict]], dict[str, CrfMetadata]]:
+        """Returns a tuple of (rule_results, metadata_objects).
+
+        If `outcomes` is provided, entry statuses are collected
+        instead of applied and `metadata_objects` is empty. See
+        `MetadataRuleEvaluator`.
+        """
         rule_results = {}
         metadata_objects = {}
+        context = context or RuleEvaluationContext(related_visit)
+        crf_models = context.form_plan.crf_models
+        fingerprint = cls.get_fingerprint(related_visit, context)
+        memoized_results = cls.get_memoized_results(related_visit, fingerprint)
+        results = {}
+        source_row = None
+        if memoized_results is None and (
+            not cls._meta.source_model or cls._meta.source_model in crf_models
+        ):
+            source_row = cls.get_source_row(related_visit, context=context)
         for rule in cls._meta.options.get("rules"):
             # skip if source model is not in visit.crfs (including PRNs)
             if (
                 rule.source_model
                 and rule.source_model != related_visit._meta.label_lower
-                and rule.source_model
-                not in [c.model for c in cls.crfs_for_visit(related_visit)]
+                and rule.source_model not in crf_models
             ):
                 continue
-            for target_model in rule.target_models:
-                if target_model == related_visit._meta.label_lower:
-                    raise TargetModelConflict(
-                        f"Target model and visit model are the same! "
-                        f"Got {target_model}=={related_visit._meta.label_lower}"
-                    )
-                elif (
-                    target_model.split(".")[1] == related_visit._meta.label_lower.split(".")[1]
-                ):
-                    raise TargetModelConflict(
-                        f"Target model and visit model might be the same. "
-                        f"Got {target_model}~={related_visit._meta.label_lower}"
-                    )
-            if result := rule.run(related_visit=related_visit):
+            rule.compiled.check_target_models(related_visit._meta.label_lower)
+            if memoized_results is not None:
+                result = memoized_results.get(str(rule))
+            else:
+                result = rule.run(
+                    related_visit=related_visit, source_row=source_row, context=context
+                )
+                results.update({str(rule): result})
+            if result:
                 rule_results.update({str(rule): result})
                 for target_model, entry_status in rule_results[str(rule)].items():
                     if not entry_status:
                         raise RuleGroupError("Cannot be None. Got `entry_status`.")
                     # only do something if target model is in visit.crfs (including PRNs)
-                    if target_model in [c.model for c in cls.crfs_for_visit(related_visit)]:
+                    if target_model not in crf_models:
+                        continue
+                    if outcomes is not None:
+                        outcomes.add(cls, rule, target_model, entry_status)
+                    else:
                         metadata_updater = cls.metadata_updater_cls(
                             related_visit=related_visit,
                             source_model=target_model,
                             allow_create=allow_create,
+                            keyed_source_models=context.keyed_source_models,
                         )
                         metadata_obj = metadata_updater.get_and_update(
                             entry_status=entry_status
                         )
                         metadata_objects.update({target_model: metadata_obj})
+        if memoized_results is None:
+            cls.memoize_results(related_visit, fingerprint, results)
         return rule_results, metadata_objects
 
     @classmethod
@@ -98,7 +111,7 @@ class CrfRuleGroup(RuleGroup, metaclass=RuleGroupMetaclass):
         cls, related_visit: RelatedVisitModel, target_model: Any
     ) -> str | None:
         """Returns the default `entry_status` or None"""
-        for c in cls.crfs_for_visit(related_visit):
-            if c.model == target_model:
-                return REQUIRED if c.required else NOT_REQUIRED
-        return None
+        required = get_form_plan(related_visit, missed=False).crf_required.get(target_model)
+        if required is None:
+            return None
+        return REQUIRED if required else NOT_REQUIRED
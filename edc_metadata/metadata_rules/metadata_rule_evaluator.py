@@ -1,9 +1,16 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
+from edc_utils import get_utcnow
 from edc_visit_tracking.utils import get_related_visit_model_cls
 
+from ..constants import NOT_REQUIRED, REQUIRED
+from ..form_plan import get_form_plan
+from ..utils import get_crf_metadata, get_requisition_metadata
+from .metadata_rule_explainer import MetadataRuleExplainer, RuleExplanation
+from .rule_evaluation_context import RuleEvaluationContext
+from .rule_outcomes import RuleOutcomes
 from .site import site_metadata_rules
 
 if TYPE_CHECKING:
@@ -14,6 +21,16 @@ class MetadataRuleEvaluator:
     """Main class to evaluate rules.
 
     Used by model mixin.
+
+    If `source_model` is given, only the rule groups that depend on
+    the source model are evaluated. See
+    `site_metadata_rules.get_rule_groups_for_source_model`.
+
+    Rule outcomes are collected across all rule groups and then
+    applied. See `RuleOutcomes`.
+
+    Rule groups in `exclude_rule_groups` are not evaluated, for
+    example, those already evaluated by `CohortRuleEvaluator`.
     """
 
     def __init__(
@@ -21,21 +38,102 @@ class MetadataRuleEvaluator:
         related_visit: related_visit_model_cls = None,
         app_label: str | None = None,
         allow_create: bool | None = None,
+        source_model: str | None = None,
+        exclude_rule_groups: list | None = None,
     ) -> None:
         self.related_visit = related_visit
-        self.app_labels = [app_label] if app_label else []
+        self.app_labels = (
+            [app_label]
+            if app_label
+            else site_metadata_rules.get_app_labels(related_visit._meta.label_lower)
+        )
         self.related_visit_model = related_visit._meta.label_lower
         self.allow_create = allow_create
-        if not self.app_labels:
-            for rule_groups in site_metadata_rules.registry.values():
-                for rule_group in rule_groups:
-                    if rule_group._meta.related_visit_model == self.related_visit_model:
-                        if rule_group._meta.app_label not in self.app_labels:
-                            self.app_labels.append(rule_group._meta.app_label)
+        self.source_model = source_model
+        self.exclude_rule_groups = exclude_rule_groups or []
+        self.outcomes: RuleOutcomes | None = None
 
-    def evaluate_rules(self) -> None:
-        for app_label in self.app_labels:
-            for rule_group in site_metadata_rules.registry.get(app_label, []):
-                rule_group.evaluate_rules(
-                    related_visit=self.related_visit, allow_create=self.allow_create
+    @property
+    def rule_groups(self) -> list:
+        """Returns a list of rule groups to evaluate, in order."""
+        if self.source_model:
+            rule_groups = [
+                rule_group
+                for rule_group in site_metadata_rules.get_rule_groups_for_source_model(
+                    self.source_model
                 )
+                if rule_group._meta.app_label in self.app_labels
+                and rule_group._meta.related_visit_model == self.related_visit_model
+            ]
+        else:
+            rule_groups = [
+                rule_group
+                for app_label in self.app_labels
+                for rule_group in site_metadata_rules.registry.get(app_label, [])
+            ]
+        return [r for r in rule_groups if r not in self.exclude_rule_groups]
+
+    def evaluate_rules(self) -> None:
+        rule_groups = self.rule_groups
+        if self.source_model:
+            self.reset_targets(rule_groups)
+        context = RuleEvaluationContext(self.related_visit)
+        self.outcomes = RuleOutcomes(self.related_visit, context)
+        for rule_group in rule_groups:
+            rule_group.evaluate_rules(
+                related_visit=self.related_visit,
+                allow_create=self.allow_create,
+                context=context,
+                outcomes=self.outcomes,
+            )
+        self.outcomes.apply(allow_create=self.allow_create)
+
+    def explain(self) -> list[RuleExplanation]:
+        """Returns a list of RuleExplanation, one per rule, without
+        writing anything. See `MetadataRuleExplainer`.
+        """
+        return MetadataRuleExplainer(self).explain()
+
+    def reset_targets(self, rule_groups: list) -> None:
+        """Resets REQUIRED/NOT_REQUIRED metadata targeted by the rule
+        groups to the visit schedule default before the rule groups
+        are evaluated.
+
+        `metadata_create` does this for all metadata when the full
+        set of rules is run.
+        """
+        targets = {
+            target
+            for rule_group in rule_groups
+            for target in site_metadata_rules.get_targets(rule_group)
+        }
+        form_plan = get_form_plan(self.related_visit, missed=False)
+        crf_models = {m for m, p in targets if not p} & form_plan.crf_models
+        panel_names = {p for _, p in targets if p} & form_plan.panel_names
+        opts = dict(modified=get_utcnow())
+        for required, entry_status, other in [
+            (True, REQUIRED, NOT_REQUIRED),
+            (False, NOT_REQUIRED, REQUIRED),
+        ]:
+            if models := [m for m in crf_models if form_plan.crf_required[m] == required]:
+                get_crf_metadata(self.related_visit).filter(
+                    model__in=models, entry_status=other
+                ).update(entry_status=entry_status, **opts)
+            if names := [
+                p for p in panel_names if form_plan.requisition_required[p] == required
+            ]:
+                get_requisition_metadata(self.related_visit).filter(
+                    panel_name__in=names, entry_status=other
+                ).update(entry_status=entry_status, **opts)
+
+
+def explain_metadata_rules(
+    related_visits: Iterable[related_visit_model_cls],
+) -> list[RuleExplanation]:
+    """Returns a list of RuleExplanation for each related visit in
+    the iterable or queryset. Nothing is written.
+    """
+    explanations = []
+    for related_visit in related_visits:
+        explanations.extend(MetadataRuleEvaluator(related_visit=related_visit).explain())
+    return explanations
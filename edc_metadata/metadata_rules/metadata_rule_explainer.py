@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import time
+from collections import namedtuple
+from typing import TYPE_CHECKING
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection, transaction
+
+from ..constants import KEYED
+from ..utils import get_crf_metadata, get_requisition_metadata
+from .rule_evaluation_context import RuleEvaluationContext
+
+if TYPE_CHECKING:
+    from edc_visit_tracking.model_mixins import VisitModelMixin as Base
+
+    from ..model_mixins.creates import CreatesMetadataModelMixin
+    from .metadata_rule_evaluator import MetadataRuleEvaluator
+
+    class RelatedVisitModel(CreatesMetadataModelMixin, Base):
+        pass
+
+
+RuleExplanation = namedtuple(
+    "RuleExplanation",
+    "related_visit rule_group rule skipped predicate_result targets time_ms queries",
+)
+TargetExplanation = namedtuple(
+    "TargetExplanation",
+    "target_model panel_name entry_status current_entry_status would_change",
+)
+
+
+class QueryCounter:
+    """A `connection.execute_wrapper` that counts the queries run."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetadataRuleExplainer:
+    """A class to evaluate the rules of a MetadataRuleEvaluator
+    without writing anything.
+
+    Returns a RuleExplanation per rule with the predicate outcome,
+    the entry_status per target, whether the stored metadata would
+    change and the wall time and query count of the rule.
+
+    Runs in a transaction that is always rolled back in case a
+    predicate writes.
+    """
+
+    def __init__(self, metadata_rule_evaluator: MetadataRuleEvaluator) -> None:
+        self.metadata_rule_evaluator = metadata_rule_evaluator
+        self.related_visit = metadata_rule_evaluator.related_visit
+
+    def explain(self) -> list[RuleExplanation]:
+        with transaction.atomic():
+            try:
+                return self._explain()
+            finally:
+                transaction.set_rollback(True)
+
+    def _explain(self) -> list[RuleExplanation]:
+        explanations = []
+        context = RuleEvaluationContext(self.related_visit)
+        try:
+            # shared lookups are not timed against the first rule
+            context.registered_subject  # noqa
+        except ObjectDoesNotExist:
+            pass
+        current_entry_statuses = self.get_current_entry_statuses()
+        form_plan = context.form_plan
+        for rule_group in self.metadata_rule_evaluator.rule_groups:
+            source_row = rule_group.get_source_row(self.related_visit, context=context)
+            for rule in rule_group.get_rules():
+                if (
+                    rule.source_model
+                    and rule.source_model != self.related_visit._meta.label_lower
+                    and not getattr(rule, "target_panels", None)
+                    and rule.source_model not in form_plan.crf_models
+                ):
+                    explanations.append(
+                        RuleExplanation(
+                            self.related_visit, rule_group, rule, True, None, [], 0, 0
+                        )
+                    )
+                    continue
+                query_counter = QueryCounter()
+                with connection.execute_wrapper(query_counter):
+                    start = time.perf_counter()
+                    rule_evaluator = rule.get_rule_evaluator(
+                        related_visit=self.related_visit,
+                        source_row=source_row,
+                        context=context,
+                    )
+                    time_ms = (time.perf_counter() - start) * 1000
+                targets = []
+                if rule_evaluator:
+                    for target in self.get_targets(rule, form_plan):
+                        entry_status = rule_evaluator.result
+                        if entry_status and context.keyed_source_models.exists(*target):
+                            entry_status = KEYED
+                        current_entry_status = current_entry_statuses.get(target)
+                        targets.append(
+                            TargetExplanation(
+                                *target,
+                                entry_status,
+                                current_entry_status,
+                                bool(entry_status and entry_status != current_entry_status),
+                            )
+                        )
+                explanations.append(
+                    RuleExplanation(
+                        self.related_visit,
+                        rule_group,
+                        rule,
+                        rule_evaluator is None,
+                        getattr(rule_evaluator, "predicate_result", None),
+                        targets,
+                        time_ms,
+                        query_counter.count,
+                    )
+                )
+        return explanations
+
+    @staticmethod
+    def get_targets(rule, form_plan) -> list[tuple[str, str | None]]:
+        """Returns a list of (target model, panel name) in the
+        form plan for the rule.
+        """
+        if target_panels := getattr(rule, "target_panels", None):
+            return [
+                (target_model, panel.name)
+                for target_model in rule.target_models
+                for panel in target_panels
+                if panel.name in form_plan.panel_names
+            ]
+        return [(m, None) for m in rule.target_models if m in form_plan.crf_models]
+
+    def get_current_entry_statuses(self) -> dict[tuple[str, str | None], str]:
+        entry_statuses = {
+            (model, None): entry_status
+            for model, entry_status in get_crf_metadata(self.related_visit).values_list(
+                "model", "entry_status"
+            )
+        }
+        entry_statuses.update(
+            {
+                (model, panel_name): entry_status
+                for model, panel_name, entry_status in get_requisition_metadata(
+                    self.related_visit
+                ).values_list("model", "panel_name", "entry_status")
+            }
+        )
+        return entry_statuses
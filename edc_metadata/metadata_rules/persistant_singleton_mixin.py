@@ -1,10 +1,23 @@
 from __future__ import annotations
 
 from django.apps import apps as django_apps
-from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
 from edc_visit_tracking.constants import SCHEDULED
+from edc_visit_tracking.utils import get_related_visit_model_cls
 
 from ..constants import KEYED, NOT_REQUIRED, REQUIRED
+from ..utils import get_audit_update_values
 
 
 class PersistantSingletonMixin:
@@ -15,6 +28,9 @@ class PersistantSingletonMixin:
 
     The `required` entry status of CRF metadata is moved to the
     last attended visit in the schedule until the CRF is submitted.
+
+    See also `reconcile_persistant_singleton` to update the metadata
+    for all subjects.
     """
 
     def persistant_singleton_required(
@@ -27,37 +43,180 @@ class PersistantSingletonMixin:
         until the model is submitted.
 
         CRF model is a singleton.
+
+        Reads the last attended scheduled visit and the number of
+        model instances in one query and moves the `required`
+        entry status with one UPDATE.
         """
+        exclude_visit_codes = exclude_visit_codes or []
         model_cls = django_apps.get_model(model)
-        try:
-            obj = model_cls.objects.get(
-                subject_visit__subject_identifier=visit.subject_identifier
+        state = self.get_persistant_singleton_state(visit, model_cls)
+        if not state:
+            return False
+        # more than one instance is possible if the collection schedule
+        # changes and a singleton form is later allowed to be added as a
+        # PRN; that is, no longer a singleton.
+        required = (
+            True
+            if state["singleton_count"] == 0
+            and visit.id == state["id"]
+            and visit.visit_code not in exclude_visit_codes
+            else False
+        )
+        if visit.visit_code not in exclude_visit_codes:
+            self.update_persistant_singleton_metadata(
+                model_cls=model_cls,
+                last_attended_visit=visit,
+                last_attended_timepoint=state["appointment__timepoint"],
+                keyed=state["singleton_count"] == 1,
             )
-        except ObjectDoesNotExist:
-            obj = None
-            required = (
-                True
-                if visit == self.get_last_attended_scheduled_visit(visit)
-                and visit.visit_code not in exclude_visit_codes
-                else False
+        return required
+
+    @classmethod
+    def get_persistant_singleton_state(cls, visit, model_cls) -> dict | None:
+        """Returns a dictionary with the `id` and `appointment__timepoint`
+        of the last attended scheduled visit and the `singleton_count`
+        of model instances for the subject, or None if there is no
+        attended scheduled visit.
+        """
+        return (
+            visit.__class__.objects.filter(
+                subject_identifier=visit.subject_identifier,
+                reason=SCHEDULED,
+                visit_schedule_name=visit.visit_schedule_name,
+                schedule_name=visit.schedule_name,
+                visit_code_sequence=0,
             )
-        except MultipleObjectsReturned:
-            # necessary if the collection schedule changes and a singleton form
-            # is later allowed to be added as a PRN; that is, no longer a
-            # singleton.
-            obj = None
-            required = False
-        else:
-            required = False
-        if visit and visit.visit_code not in exclude_visit_codes:
-            last_attended_visit = self.get_last_attended_scheduled_visit(visit)
-            if last_attended_visit:
-                self.set_other_crf_metadata_not_required(
-                    obj=obj,
-                    model_cls=model_cls,
-                    last_attended_visit=last_attended_visit,
+            .annotate(
+                singleton_count=Coalesce(
+                    Subquery(cls.get_singleton_count_queryset(model_cls)[:1]), 0
                 )
-        return required
+            )
+            .order_by("-appointment__timepoint")
+            .values("id", "appointment__timepoint", "singleton_count")
+            .first()
+        )
+
+    @staticmethod
+    def get_singleton_count_queryset(model_cls) -> QuerySet:
+        """Returns a queryset of the number of model instances for
+        the outer `subject_identifier`.
+        """
+        return (
+            model_cls.objects.filter(
+                subject_visit__subject_identifier=OuterRef("subject_identifier")
+            )
+            .order_by()
+            .values("subject_visit__subject_identifier")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+
+    @staticmethod
+    def update_persistant_singleton_metadata(
+        model_cls=None, last_attended_visit=None, last_attended_timepoint=None, keyed=None
+    ) -> int:
+        """Updates CRF metadata for the given model with one UPDATE.
+
+        If not `keyed`, sets the last attended timepoint to REQUIRED
+        and all others to NOT_REQUIRED. Otherwise, sets all but
+        the KEYED one to NOT_REQUIRED. Only rows that change are
+        updated.
+
+        Model must be a singleton
+        """
+        crf_metadata_model_cls = django_apps.get_model("edc_metadata.crfmetadata")
+        queryset = crf_metadata_model_cls.objects.filter(
+            subject_identifier=last_attended_visit.subject_identifier,
+            model=model_cls._meta.label_lower,
+            visit_schedule_name=last_attended_visit.visit_schedule_name,
+            schedule_name=last_attended_visit.schedule_name,
+            visit_code_sequence=0,
+        )
+        if keyed:
+            return queryset.exclude(entry_status__in=[KEYED, NOT_REQUIRED]).update(
+                entry_status=NOT_REQUIRED, **get_audit_update_values(crf_metadata_model_cls)
+            )
+        return queryset.exclude(
+            Q(timepoint=last_attended_timepoint, entry_status=REQUIRED)
+            | Q(~Q(timepoint=last_attended_timepoint), entry_status=NOT_REQUIRED)
+        ).update(
+            entry_status=Case(
+                When(timepoint=last_attended_timepoint, then=Value(REQUIRED)),
+                default=Value(NOT_REQUIRED),
+            ),
+            **get_audit_update_values(crf_metadata_model_cls),
+        )
+
+    @classmethod
+    def reconcile_persistant_singleton(
+        cls,
+        model: str = None,
+        visit_schedule_name: str = None,
+        schedule_name: str = None,
+        exclude_visit_codes: list[str] | None = None,
+    ) -> int:
+        """Updates the CRF metadata of the singleton model for all
+        subjects in the schedule with three UPDATEs and returns the
+        number of rows updated.
+
+        For subjects who submitted the model, sets all but the KEYED
+        metadata to NOT_REQUIRED. For the others, sets metadata at
+        the last attended scheduled visit to REQUIRED, unless its
+        visit code is in `exclude_visit_codes`, and all others to
+        NOT_REQUIRED.
+        """
+        exclude_visit_codes = exclude_visit_codes or []
+        model_cls = django_apps.get_model(model)
+        crf_metadata_model_cls = django_apps.get_model("edc_metadata.crfmetadata")
+        visits = (
+            get_related_visit_model_cls()
+            .objects.filter(
+                subject_identifier=OuterRef("subject_identifier"),
+                reason=SCHEDULED,
+                visit_schedule_name=visit_schedule_name,
+                schedule_name=schedule_name,
+                visit_code_sequence=0,
+            )
+            .order_by("-appointment__timepoint")
+        )
+        queryset = (
+            crf_metadata_model_cls.objects.filter(
+                model=model_cls._meta.label_lower,
+                visit_schedule_name=visit_schedule_name,
+                schedule_name=schedule_name,
+                visit_code_sequence=0,
+            )
+            .alias(
+                singleton_count=Coalesce(
+                    Subquery(cls.get_singleton_count_queryset(model_cls)[:1]), 0
+                ),
+                last_attended_timepoint=Subquery(visits.values("appointment__timepoint")[:1]),
+                last_attended_visit_code=Subquery(visits.values("visit_code")[:1]),
+            )
+            .filter(last_attended_timepoint__isnull=False)
+        )
+        opts = get_audit_update_values(crf_metadata_model_cls)
+        updated = (
+            queryset.filter(singleton_count=1)
+            .exclude(entry_status__in=[KEYED, NOT_REQUIRED])
+            .update(entry_status=NOT_REQUIRED, **opts)
+        )
+        queryset = queryset.exclude(singleton_count=1)
+        is_required = Q(timepoint=F("last_attended_timepoint")) & ~Q(
+            last_attended_visit_code__in=exclude_visit_codes
+        )
+        updated += (
+            queryset.filter(is_required)
+            .exclude(entry_status=REQUIRED)
+            .update(entry_status=REQUIRED, **opts)
+        )
+        updated += (
+            queryset.exclude(is_required)
+            .exclude(entry_status=NOT_REQUIRED)
+            .update(entry_status=NOT_REQUIRED, **opts)
+        )
+        return updated
 
     @staticmethod
     def set_other_crf_metadata_not_required(
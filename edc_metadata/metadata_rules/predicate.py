@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterable
 
 from django.apps import apps as django_apps
 from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q
+
+if TYPE_CHECKING:
+    from edc_visit_tracking.model_mixins import VisitModelMixin
 
 
 class PredicateError(Exception):
@@ -81,6 +85,17 @@ class P(BasePredicate):
         "in": lambda x, y: True if x in y else False,
     }
 
+    lookups = {
+        "gt": "gt",
+        ">": "gt",
+        "gte": "gte",
+        ">=": "gte",
+        "lt": "lt",
+        "<": "lt",
+        "lte": "lte",
+        "<=": "lte",
+    }
+
     def __init__(self, attr: str, operator: str, expected_value: list | str) -> None:
         self.attr = attr
         self.expected_value = expected_value
@@ -99,6 +114,37 @@ class P(BasePredicate):
         value = self.get_value(attr=self.attr, **kwargs)
         return self.func(value, self.expected_value)
 
+    def get_q(self, field_name: str | None = None) -> Q:
+        """Returns a Q object equivalent to the predicate for a
+        queryset filter on `field_name` (default: attr) or raises
+        PredicateError.
+
+        Note: SQL does not match a NULL column with gt/gte/lt/lte
+        where the predicate would raise. String comparisons follow
+        the database collation.
+        """
+        field_name = field_name or self.attr
+        value = self.expected_value
+        if self.operator in ["is", "is not"]:
+            if not (value is None or value is True or value is False):
+                raise PredicateError(f"Cannot translate {self} to a Q object.")
+        if self.operator in ["is", "is not", "eq", "equals", "==", "neq", "!="]:
+            if value is None:
+                q = Q(**{f"{field_name}__isnull": True})
+            else:
+                q = Q(**{field_name: value})
+            return ~q if self.operator in ["is not", "neq", "!="] else q
+        if self.operator == "in":
+            if not isinstance(value, (list, tuple, set, frozenset)):
+                raise PredicateError(f"Cannot translate {self} to a Q object.")
+            q = Q(**{f"{field_name}__in": [v for v in value if v is not None]})
+            if None in value:
+                q |= Q(**{f"{field_name}__isnull": True})
+            return q
+        if value is None:
+            raise PredicateError(f"Cannot translate {self} to a Q object.")
+        return Q(**{f"{field_name}__{self.lookups[self.operator]}": value})
+
 
 class PF(BasePredicate):
     """
@@ -134,3 +180,56 @@ class PF(BasePredicate):
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.attrs}, {self.func})"
+
+
+class SourceRow:
+    """A row of source model values prepared for P/PF predicates.
+
+    Passed to the predicates as `source_row` so that `get_value`
+    finds the attr without querying the source model. Attrs
+    not fetched raise AttributeError so `get_value` falls back
+    to the source model lookup.
+    """
+
+    def __init__(self, field_names: Iterable[str], values: dict | None = None) -> None:
+        self._field_names = frozenset(field_names)
+        self._values = values or {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self._values})"
+
+    def __getattr__(self, attr: str) -> Any:
+        if not attr.startswith("_") and attr in self._field_names:
+            return self._values.get(attr)
+        raise AttributeError(attr)
+
+
+def get_source_row(
+    source_model: str, related_visit: VisitModelMixin, field_names: Iterable[str]
+) -> SourceRow | None:
+    """Returns a SourceRow with the values of `field_names` for the
+    source model instance of the related visit.
+
+    Fetches the concrete, non-relational fields in one `values()`
+    query. Returns None if there is nothing to fetch or more than
+    one instance is found (e.g. requisitions).
+    """
+    model_cls = django_apps.get_model(source_model)
+    concrete_field_names = {
+        f.name for f in model_cls._meta.concrete_fields if not f.is_relation
+    }
+    field_names = sorted(set(field_names) & concrete_field_names)
+    if not field_names:
+        return None
+    try:
+        related_visit_model_attr = model_cls.related_visit_model_attr()
+    except AttributeError:
+        related_visit_model_attr = "subject_visit"
+    rows = list(
+        model_cls.objects.filter(**{f"{related_visit_model_attr}_id": related_visit.id})
+        .values(*field_names)
+        .order_by()[:2]
+    )
+    if len(rows) > 1:
+        return None
+    return SourceRow(field_names, rows[0] if rows else None)
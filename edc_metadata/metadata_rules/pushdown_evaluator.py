@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from django.apps import apps as django_apps
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import (
+    CharField,
+    Count,
+    Exists,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    TextField,
+)
+from edc_appointment.constants import MISSED_APPT
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+from edc_visit_tracking.constants import MISSED_VISIT
+
+from ..constants import DO_NOTHING, KEYED
+from ..form_plan import get_form_plan_for_visit_code
+from ..utils import get_audit_update_values, get_crf_metadata_model_cls
+from .cohort_evaluator import (
+    REGISTERED_SUBJECT,
+    SOURCE,
+    VISIT,
+    CohortRuleEvaluator,
+    visit_key_fields,
+)
+from .predicate import PredicateError
+
+if TYPE_CHECKING:
+    from django.db.models import Field, Model
+
+    from .predicate import P
+    from .rule import Rule
+
+# vendors that compare text case-sensitively by default
+case_sensitive_vendors = ["sqlite", "postgresql"]
+
+
+class PushdownRuleEvaluator(CohortRuleEvaluator):
+    """A class to apply simple CRF rule groups to CRF metadata for
+    all related visits with set-based UPDATEs.
+
+    Each `P` predicate is translated to a `Q` object (see `P.get_q`)
+    and wrapped in an `Exists` on the related visit, registered
+    subject or source model. Each rule is then applied with one
+    UPDATE per entry_status, for example:
+
+        UPDATE crfmetadata SET entry_status=... WHERE EXISTS (...)
+
+    Rule groups are eligible as for `CohortRuleEvaluator` if, in
+    addition, every predicate can be translated, compares ordered
+    values on NOT NULL columns only and the database compares the
+    column as Python would (see `is_comparable`).
+
+    Related visits for which the per visit evaluation may differ
+    (missed visit reports, no registered subject, more than one
+    source model instance) are added to `fallback`.
+    """
+
+    def get_columns(self, rule_group: Any) -> dict[str, tuple[str, str]] | None:
+        if not (columns := super().get_columns(rule_group)):
+            return None
+        model_classes = {
+            VISIT: self.related_visit_model_cls,
+            REGISTERED_SUBJECT: self.registered_subject_model_cls,
+            SOURCE: django_apps.get_model(rule_group._meta.source_model),
+        }
+        for rule in rule_group._meta.options.get("rules"):
+            predicate = rule.predicate
+            where, column = columns[predicate.attr]
+            field = model_classes[where]._meta.get_field(column)
+            try:
+                predicate.get_q(column)
+            except PredicateError:
+                return None
+            if (predicate.operator in predicate.lookups and field.null) or not (
+                self.is_comparable(predicate, field)
+            ):
+                return None
+            if where == SOURCE:
+                # no source model instance, predicate evaluates None
+                try:
+                    predicate.func(None, predicate.expected_value)
+                except Exception:
+                    return None
+        return columns
+
+    @staticmethod
+    def is_comparable(predicate: P, field: Field) -> bool:
+        """Returns True if the database compares the column to the
+        expected value as `predicate.func` would.
+
+        The expected value, or each value if `in`, must already be
+        of the field's Python type; for example, not "1" for an
+        IntegerField or a datetime for a DateField. Text is only
+        compared for equality and only if the database compares
+        text case-sensitively.
+        """
+        values = predicate.expected_value
+        if predicate.operator != "in":
+            values = [values]
+        for value in values:
+            if value is None:
+                continue
+            try:
+                if type(field.to_python(value)) is not type(value):
+                    return False
+            except ValidationError:
+                return False
+        if isinstance(field, (CharField, TextField)):
+            return (
+                predicate.operator not in predicate.lookups
+                and connection.vendor in case_sensitive_vendors
+                and not field.db_collation
+            )
+        return True
+
+    def evaluate(self) -> None:
+        """Applies the eligible rule groups, in order, to the CRF
+        metadata of all related visits.
+        """
+        if not self.rule_groups:
+            return
+        self.fallback = self.get_fallback()
+        for rule_group in self.rule_groups:
+            if (queryset := self.get_metadata_queryset(rule_group)) is None:
+                continue
+            for rule in rule_group._meta.options.get("rules"):
+                condition = self.get_condition(rule_group, rule)
+                for entry_status, q in [
+                    (rule.consequence, condition),
+                    (rule.alternative, ~condition),
+                ]:
+                    if entry_status == DO_NOTHING:
+                        continue
+                    self.updated += (
+                        queryset.filter(q, model__in=rule.target_models)
+                        .exclude(entry_status=entry_status)
+                        .update(
+                            entry_status=entry_status,
+                            due_datetime=Subquery(
+                                self.get_visits().values("report_datetime")[:1]
+                            ),
+                            fill_datetime=None,
+                            document_user=Subquery(
+                                self.get_visits().values("user_created")[:1]
+                            ),
+                            **get_audit_update_values(queryset.model),
+                        )
+                    )
+
+    def get_visits(self) -> QuerySet:
+        """Returns a queryset of the related visit of the outer CRF
+        metadata row, if the rules apply to it.
+        """
+        return self.related_visit_model_cls.objects.filter(
+            **{k: OuterRef(k) for k in visit_key_fields}
+        ).exclude(appointment__appt_timing=MISSED_APPT)
+
+    def get_source_objects(self, source_model: str) -> QuerySet:
+        """Returns a queryset of the source model instances of the
+        outer CRF metadata row.
+        """
+        model_cls = django_apps.get_model(source_model)
+        related_visit_model_attr = self.get_related_visit_model_attr(model_cls)
+        return model_cls.objects.filter(
+            **{f"{related_visit_model_attr}__{k}": OuterRef(k) for k in visit_key_fields}
+        )
+
+    def get_condition(self, rule_group: Any, rule: Rule) -> Q:
+        """Returns a Q object selecting the CRF metadata rows of the
+        related visits where the predicate is True.
+        """
+        predicate = rule.predicate
+        where, column = self.columns[rule_group][predicate.attr]
+        q = predicate.get_q(column)
+        if where == VISIT:
+            return Q(Exists(self.get_visits().filter(q)))
+        if where == REGISTERED_SUBJECT:
+            return Q(
+                Exists(
+                    self.registered_subject_model_cls.objects.filter(
+                        q, subject_identifier=OuterRef("subject_identifier")
+                    )
+                )
+            )
+        source_objects = self.get_source_objects(rule_group._meta.source_model)
+        condition = Q(Exists(source_objects.filter(q)))
+        if predicate.func(None, predicate.expected_value):
+            condition |= ~Q(Exists(source_objects))
+        return condition
+
+    def get_metadata_queryset(self, rule_group: Any) -> QuerySet | None:
+        """Returns a queryset of CRF metadata, not KEYED, for related
+        visits where the source model of the rule group is in the
+        form plan, or None.
+        """
+        source_model = rule_group._meta.source_model
+        timepoints = []
+        for visit_schedule in site_visit_schedules.visit_schedules.values():
+            for schedule in visit_schedule.schedules.values():
+                for visit in schedule.visits.values():
+                    for visit_code_sequence in [0, 1]:
+                        form_plan = get_form_plan_for_visit_code(
+                            visit_schedule.name,
+                            schedule.name,
+                            visit.code,
+                            visit_code_sequence,
+                            missed=False,
+                        )
+                        if source_model in form_plan.crf_models:
+                            timepoints.append(
+                                Q(
+                                    visit_schedule_name=visit_schedule.name,
+                                    schedule_name=schedule.name,
+                                    visit_code=visit.code,
+                                    **(
+                                        dict(visit_code_sequence__gt=0)
+                                        if visit_code_sequence
+                                        else dict(visit_code_sequence=0)
+                                    ),
+                                )
+                            )
+        if not timepoints:
+            return None
+        q = timepoints[0]
+        for timepoint in timepoints[1:]:
+            q |= timepoint
+        return (
+            get_crf_metadata_model_cls()
+            .objects.filter(q, Exists(self.get_visits()))
+            .exclude(entry_status=KEYED)
+        )
+
+    def get_fallback(self) -> set:
+        """Returns a set of related visit ids to be evaluated per
+        visit.
+        """
+        fallback = set(
+            self.related_visit_model_cls.objects.exclude(appointment__appt_timing=MISSED_APPT)
+            .filter(
+                Q(reason=MISSED_VISIT)
+                | ~Q(
+                    Exists(
+                        self.registered_subject_model_cls.objects.filter(
+                            subject_identifier=OuterRef("subject_identifier")
+                        )
+                    )
+                )
+            )
+            .values_list("id", flat=True)
+        )
+        for source_model in {r._meta.source_model for r in self.rule_groups}:
+            model_cls: type[Model] = django_apps.get_model(source_model)
+            fk = f"{self.get_related_visit_model_attr(model_cls)}_id"
+            fallback.update(
+                model_cls.objects.values(fk)
+                .annotate(count=Count(fk))
+                .filter(count__gt=1)
+                .order_by()
+                .values_list(fk, flat=True)
+            )
+        return fallback
@@ -4,9 +4,10 @@ from collections import namedtuple
 from typing import TYPE_CHECKING, Any, Tuple
 
 from django.core.exceptions import ValidationError
-from edc_visit_schedule.visit import RequisitionCollection
 
+from ...form_plan import get_form_plan
 from ...requisition import RequisitionMetadataUpdater
+from ..rule_evaluation_context import RuleEvaluationContext
 from ..rule_group import RuleGroup
 from ..rule_group_meta_options import RuleGroupMetaOptions
 from ..rule_group_metaclass import RuleGroupMetaclass
@@ -14,10 +15,12 @@ from ..rule_group_metaclass import RuleGroupMetaclass
 RuleResult = namedtuple("RuleResult", "target_panel entry_status")
 
 if TYPE_CHECKING:
+    from edc_visit_schedule.visit import RequisitionCollection
     from edc_visit_tracking.model_mixins import VisitModelMixin as Base
 
     from ...model_mixins.creates import CreatesMetadataModelMixin
     from ...models import RequisitionMetadata
+    from ..rule_outcomes import RuleOutcomes
 
     class RelatedVisitModel(CreatesMetadataModelMixin, Base):
         pass
@@ -77,55 +80,74 @@ class RequisitionRuleGroup(RuleGroup, metaclass=RequisitionMetaclass):
         """Returns a list of scheduled or unscheduled
         Requisitions depending on visit_code_sequence.
         """
-        if visit.visit_code_sequence != 0:
-            requisitions = RequisitionCollection(
-                *visit.visit.requisitions_unscheduled,
-                *visit.visit.requisitions_prn,
-                name="requisitions_for_visit",
-            )
-        else:
-            requisitions = RequisitionCollection(
-                *visit.visit.requisitions,
-                *visit.visit.requisitions_prn,
-                name="requisitions_for_visit",
-            )
-        return requisitions
+        return get_form_plan(visit, missed=False).requisitions
 
     @classmethod
     def evaluate_rules(
         cls: Any,
         related_visit: RelatedVisitModel = None,
         allow_create: bool | None = None,
+        context: RuleEvaluationContext | None = None,
+        outcomes: RuleOutcomes | None = None,
     ) -> Tuple[dict[str, dict[str, list[RuleResult]]], dict[str, RequisitionMetadata]]:
         """Returns a tuple of (rule_results, metadata_objects) where
         rule_results ...
 
         Metadata must exist.
+
+        If `outcomes` is provided, entry statuses are collected
+        instead of applied and `metadata_objects` is empty. See
+        `MetadataRuleEvaluator`.
         """
         rule_results = {}
         metadata_objects = {}
+        context = context or RuleEvaluationContext(related_visit)
+        panel_names = context.form_plan.panel_names
+        fingerprint = cls.get_fingerprint(related_visit, context)
+        memoized_results = cls.get_memoized_results(related_visit, fingerprint)
+        results = {}
+        source_row = None
+        if memoized_results is None:
+            source_row = cls.get_source_row(related_visit, context=context)
         for rule in cls._meta.options.get("rules"):
             rule_results[str(rule)] = {}
-            if result := rule.run(related_visit=related_visit):
+            if memoized_results is not None:
+                result = memoized_results.get(str(rule))
+            else:
+                result = rule.run(
+                    related_visit=related_visit, source_row=source_row, context=context
+                )
+                results.update({str(rule): result})
+            if result:
                 for target_model, entry_status in result.items():
                     rule_results[str(rule)].update({target_model: []})
                     for target_panel in rule.target_panels:
                         # only do something if target_panel is in
                         # visit.requisitions
-                        if target_panel.name in [
-                            r.panel.name for r in cls.requisitions_for_visit(related_visit)
-                        ]:
-                            metadata_updater = cls.metadata_updater_cls(
-                                related_visit=related_visit,
-                                source_model=target_model,
-                                source_panel=target_panel,
-                                allow_create=allow_create,
-                            )
-                            metadata_obj = metadata_updater.get_and_update(
-                                entry_status=entry_status
-                            )
-                            metadata_objects.update({target_panel: metadata_obj})
+                        if target_panel.name in panel_names:
+                            if outcomes is not None:
+                                outcomes.add(
+                                    cls,
+                                    rule,
+                                    target_model,
+                                    entry_status,
+                                    target_panel=target_panel,
+                                )
+                            else:
+                                metadata_updater = cls.metadata_updater_cls(
+                                    related_visit=related_visit,
+                                    source_model=target_model,
+                                    source_panel=target_panel,
+                                    allow_create=allow_create,
+                                    keyed_source_models=context.keyed_source_models,
+                                )
+                                metadata_obj = metadata_updater.get_and_update(
+                                    entry_status=entry_status
+                                )
+                                metadata_objects.update({target_panel: metadata_obj})
                             rule_results[str(rule)][target_model].append(
                                 RuleResult(target_panel, entry_status)
                             )
+        if memoized_results is None:
+            cls.memoize_results(related_visit, fingerprint, results)
         return rule_results, metadata_objects
@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING
 
 from edc_appointment.constants import MISSED_APPT
 
+from .compiled_rule import CompiledRule
 from .logic import Logic
 from .rule_evaluator import RuleEvaluator
 
@@ -11,7 +12,8 @@ if TYPE_CHECKING:
     from edc_visit_tracking.model_mixins import VisitModelMixin as Base
 
     from ..model_mixins.creates import CreatesMetadataModelMixin
-    from .predicate import PF, P
+    from .predicate import PF, P, SourceRow
+    from .rule_evaluation_context import RuleEvaluationContext
 
     class RelatedVisitModel(CreatesMetadataModelMixin, Base):
         pass
@@ -40,6 +42,7 @@ class Rule:
         self.name: str | None = None  # set by metaclass
         self.source_model: str | None = None  # set by metaclass
         self.related_visit_model: str | None = None  # set by metaclass
+        self._compiled: CompiledRule | None = None  # set by metaclass
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}(name='{self.name}', group='{self.group}')"
@@ -47,35 +50,90 @@ class Rule:
     def __str__(self) -> str:
         return f"{self.group}.{self.name}"
 
-    def run(self, related_visit: RelatedVisitModel = None) -> dict[str, str] | None:
+    def run(
+        self,
+        related_visit: RelatedVisitModel = None,
+        source_row: SourceRow | None = None,
+        context: RuleEvaluationContext | None = None,
+    ) -> dict[str, str] | None:
         """Returns a dictionary of {target_model: entry_status, ...} updated
         by running the rule for each target model given a visit.
 
+        `source_row` is passed to P/PF predicates only.
+
+        `context`, if provided, is shared by the rules evaluated for
+        the related visit. See `RuleEvaluationContext`.
+
         Skips run if `appointment.appt_timing` == MISSED_APPT
         """
         result = None
-        if (
-            self.related_visit_model
-            and self.related_visit_model != related_visit._meta.label_lower
+        if rule_evaluator := self.get_rule_evaluator(
+            related_visit=related_visit, source_row=source_row, context=context
         ):
-            raise RuleError(
-                "Conflicting related visit model on rule. "
-                f"Got {self.related_visit_model} != {related_visit._meta.label_lower}."
-                "Try specifying the related visit model on RuleGroup.Meta explicitly. "
-                f'For example, related_visit_model = "{related_visit._meta.label_lower}" '
-                f"See {self}. "
-            )
+            result = dict.fromkeys(self.compiled.target_models, rule_evaluator.result)
+        return result
 
-        if related_visit.appointment.appt_timing != MISSED_APPT:
-            result = {}
-            opts = {k: v for k, v in self.__dict__.items() if k.startswith != "_"}
+    def get_rule_evaluator(
+        self,
+        related_visit: RelatedVisitModel = None,
+        source_row: SourceRow | None = None,
+        context: RuleEvaluationContext | None = None,
+    ) -> RuleEvaluator | None:
+        """Returns the rule evaluator after evaluating the rule or
+        None if skipped. See `run`.
+        """
+        rule_evaluator = None
+        compiled = self.compiled
+        compiled.check(related_visit._meta.label_lower)
+        appointment = context.appointment if context else related_visit.appointment
+        if appointment.appt_timing != MISSED_APPT:
+            opts = compiled.options
+            if source_row is not None and compiled.accepts_source_row:
+                opts = dict(opts, source_row=source_row)
             rule_evaluator = self.rule_evaluator_cls(
-                related_visit=related_visit, logic=self.logic, **opts
+                related_visit=related_visit, logic=compiled.logic, context=context, **opts
             )
-            entry_status = rule_evaluator.result
-            for target_model in self.target_models:
-                result.update({target_model: entry_status})
-        return result
+        return rule_evaluator
+
+    @property
+    def compiled(self) -> CompiledRule:
+        if not self._compiled:
+            self.compile()
+        return self._compiled
+
+    def compile(self) -> CompiledRule:
+        """Prepares the rule for evaluation. Called by the rule group
+        metaclass once the rule's attrs are set.
+        """
+        self._compiled = CompiledRule(self)
+        return self._compiled
+
+    def get_errors(self, related_visit_model: str) -> list[tuple[type[Exception], str]]:
+        """Returns a list of (exception class, message) raised, in
+        order, when the rule is evaluated for the related visit
+        model (label_lower).
+        """
+        errors = []
+        if self.related_visit_model and self.related_visit_model != related_visit_model:
+            errors.append(
+                (
+                    RuleError,
+                    "Conflicting related visit model on rule. "
+                    f"Got {self.related_visit_model} != {related_visit_model}."
+                    "Try specifying the related visit model on RuleGroup.Meta explicitly. "
+                    f'For example, related_visit_model = "{related_visit_model}" '
+                    f"See {self}. ",
+                )
+            )
+        return errors
+
+    def get_target_model_errors(
+        self, related_visit_model: str
+    ) -> list[tuple[type[Exception], str]]:
+        """Returns a list of (exception class, message) for target
+        models that conflict with the related visit model.
+        """
+        return []
 
     @property
     def logic(self) -> Logic:
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from edc_registration import get_registered_subject_model_cls
+
+from ..form_plan import get_form_plan
+from ..keyed_source_models import KeyedSourceModels
+from .predicate import get_source_row
+
+if TYPE_CHECKING:
+    from edc_appointment.models import Appointment
+    from edc_registration.models import RegisteredSubject
+    from edc_visit_schedule.schedule import Schedule
+    from edc_visit_schedule.visit import Visit
+    from edc_visit_schedule.visit_schedule import VisitSchedule
+    from edc_visit_tracking.model_mixins import VisitModelMixin as Base
+
+    from ..form_plan import FormPlan
+    from ..model_mixins.creates import CreatesMetadataModelMixin
+    from .predicate import SourceRow
+
+    class RelatedVisitModel(CreatesMetadataModelMixin, Base):
+        pass
+
+
+class RuleEvaluationContext:
+    """A context shared by the rule groups and rules evaluated for
+    a related visit.
+
+    Memoizes the registered subject, the appointment, the visit
+    schedule objects, the form plan, keyed source models and the
+    source rows read by P/PF predicates.
+
+    Created once per `MetadataRuleEvaluator.evaluate_rules` call.
+    Do not keep a context after the source models or the related
+    visit change.
+    """
+
+    def __init__(self, related_visit: RelatedVisitModel) -> None:
+        self.related_visit = related_visit
+        self._registered_subject: RegisteredSubject | None = None
+        self._appointment: Appointment | None = None
+        self._visit_schedule: VisitSchedule | None = None
+        self._schedule: Schedule | None = None
+        self._visit: Visit | None = None
+        self._form_plan: FormPlan | None = None
+        self._keyed_source_models: KeyedSourceModels | None = None
+        self._source_rows: dict[tuple[str, frozenset[str]], SourceRow | None] = {}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.related_visit})"
+
+    @property
+    def registered_subject(self) -> RegisteredSubject:
+        """Returns the registered subject or raises ObjectDoesNotExist."""
+        if not self._registered_subject:
+            self._registered_subject = get_registered_subject_model_cls().objects.get(
+                subject_identifier=self.related_visit.subject_identifier
+            )
+        return self._registered_subject
+
+    @property
+    def appointment(self) -> Appointment:
+        if not self._appointment:
+            self._appointment = self.related_visit.appointment
+        return self._appointment
+
+    @property
+    def visit_schedule(self) -> VisitSchedule:
+        if not self._visit_schedule:
+            self._visit_schedule = self.related_visit.visit_schedule
+        return self._visit_schedule
+
+    @property
+    def schedule(self) -> Schedule:
+        if not self._schedule:
+            self._schedule = self.related_visit.schedule
+        return self._schedule
+
+    @property
+    def visit(self) -> Visit:
+        if not self._visit:
+            self._visit = self.related_visit.visit
+        return self._visit
+
+    @property
+    def form_plan(self) -> FormPlan:
+        """Returns the scheduled or unscheduled form plan. Rules
+        are not evaluated against missed visit CRFs.
+        """
+        if not self._form_plan:
+            self._form_plan = get_form_plan(self.related_visit, missed=False)
+        return self._form_plan
+
+    @property
+    def keyed_source_models(self) -> KeyedSourceModels:
+        if not self._keyed_source_models:
+            self._keyed_source_models = KeyedSourceModels(
+                self.related_visit, form_plan=self.form_plan
+            )
+        return self._keyed_source_models
+
+    def get_source_row(self, source_model: str, field_names: Any) -> SourceRow | None:
+        key = (source_model, frozenset(field_names))
+        if key not in self._source_rows:
+            self._source_rows[key] = get_source_row(
+                source_model, self.related_visit, field_names
+            )
+        return self._source_rows[key]
@@ -14,6 +14,7 @@ if TYPE_CHECKING:
 
     from ..model_mixins.creates import CreatesMetadataModelMixin
     from .logic import Logic
+    from .rule_evaluation_context import RuleEvaluationContext
 
     class RelatedVisitModel(CreatesMetadataModelMixin, Base):
         pass
@@ -41,16 +42,23 @@ class RuleEvaluator:
     """
 
     def __init__(
-        self, logic: Logic = None, related_visit: RelatedVisitModel = None, **kwargs
+        self,
+        logic: Logic = None,
+        related_visit: RelatedVisitModel = None,
+        context: RuleEvaluationContext | None = None,
+        **kwargs,
     ) -> None:
         self._registered_subject: RegisteredSubject | None = None
         self.logic: Logic = logic
         self.result: str | None = None
+        self.predicate_result: bool | None = None
         self.related_visit = related_visit
+        self.context = context
         options = dict(
             visit=self.related_visit, registered_subject=self.registered_subject, **kwargs
         )
         predicate = self.logic.predicate(**options)
+        self.predicate_result = bool(predicate)
         if predicate:
             if self.logic.consequence != DO_NOTHING:
                 self.result = self.logic.consequence
@@ -67,9 +75,12 @@ class RuleEvaluator:
         """Returns a registered subject model instance or raises."""
         if not self._registered_subject:
             try:
-                self._registered_subject = self.registered_subject_model.objects.get(
-                    subject_identifier=self.related_visit.subject_identifier
-                )
+                if self.context:
+                    self._registered_subject = self.context.registered_subject
+                else:
+                    self._registered_subject = self.registered_subject_model.objects.get(
+                        subject_identifier=self.related_visit.subject_identifier
+                    )
             except ObjectDoesNotExist as e:
                 raise RuleEvaluatorRegisterSubjectError(
                     f"Registered subject required for rule {repr(self)}. "
@@ -1,9 +1,21 @@
+from __future__ import annotations
+
+import hashlib
 import sys
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from django.apps import apps as django_apps
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.management.color import color_style
 
+from ..cache import get_metadata_cache
+from ..utils import memoize_metadata_rules_enabled
+from .predicate import PF, P, get_source_row
+
+if TYPE_CHECKING:
+    from .predicate import SourceRow
+    from .rule_evaluation_context import RuleEvaluationContext
+
 style = color_style()
 
 
@@ -22,6 +34,125 @@ class RuleGroup:
     def get_rules(cls: Any) -> Any:
         return cls._meta.options.get("rules")
 
+    @classmethod
+    def get_predicate_field_names(cls: Any) -> set[str]:
+        """Returns the set of source model field names read by the
+        P/PF predicates of this rule group.
+        """
+        return {
+            field_name
+            for rule in cls.get_rules()
+            if isinstance(rule.predicate, (P, PF))
+            for field_name in rule.field_names
+        }
+
+    @classmethod
+    def get_source_row(
+        cls: Any, related_visit: Any, context: RuleEvaluationContext | None = None
+    ) -> SourceRow | None:
+        """Returns a SourceRow for the P/PF predicates of this rule
+        group or None.
+        """
+        source_model = cls._meta.source_model
+        if not source_model or source_model == related_visit._meta.label_lower:
+            return None
+        if field_names := cls.get_predicate_field_names():
+            if context:
+                return context.get_source_row(source_model, field_names)
+            return get_source_row(source_model, related_visit, field_names)
+        return None
+
+    @classmethod
+    def get_definition(cls: Any) -> list[tuple]:
+        """Returns a list of tuples describing the rules. Used in the
+        input fingerprint.
+        """
+        definition = []
+        for rule in cls.get_rules():
+            func = getattr(rule.predicate, "func", None)
+            code = getattr(func, "__code__", None)
+            definition.append(
+                (
+                    rule.name,
+                    rule.predicate.__class__.__name__,
+                    getattr(rule.predicate, "attr", None),
+                    getattr(rule.predicate, "attrs", None),
+                    getattr(rule.predicate, "operator", None),
+                    repr(getattr(rule.predicate, "expected_value", None)),
+                    (code.co_code, repr(code.co_consts)) if code else None,
+                    rule.consequence,
+                    rule.alternative,
+                    tuple(rule.target_models),
+                    tuple(p.name for p in getattr(rule, "target_panels", None) or []),
+                )
+            )
+        return definition
+
+    @classmethod
+    def get_fingerprint(
+        cls: Any, related_visit: Any, context: RuleEvaluationContext
+    ) -> str | None:
+        """Returns a digest of the inputs read by the P/PF predicates
+        of this rule group or None if the inputs are not known.
+
+        Inputs are the related visit, appointment timing, registered
+        subject and the pk/modified of the source model instances.
+        """
+        if not memoize_metadata_rules_enabled() or not all(
+            isinstance(rule.predicate, (P, PF)) for rule in cls.get_rules()
+        ):
+            return None
+        try:
+            registered_subject = context.registered_subject
+        except ObjectDoesNotExist:
+            return None
+        data = [
+            cls.name,
+            cls.get_definition(),
+            str(related_visit.pk),
+            str(related_visit.modified),
+            context.appointment.appt_timing,
+            str(registered_subject.modified),
+        ]
+        source_model = cls._meta.source_model
+        if source_model and source_model != related_visit._meta.label_lower:
+            if not context.keyed_source_models.covers_model(source_model):
+                return None
+            data.append(
+                [
+                    (panel_name, str(obj.pk), str(obj.modified))
+                    for panel_name, obj in context.keyed_source_models.get_all(source_model)
+                ]
+            )
+        return hashlib.sha256(repr(data).encode()).hexdigest()
+
+    @classmethod
+    def get_memoized_results(
+        cls: Any, related_visit: Any, fingerprint: str | None
+    ) -> dict[str, dict[str, str] | None] | None:
+        """Returns the stored {rule: result} if stored for the same
+        input fingerprint, otherwise None.
+        """
+        if fingerprint:
+            value = get_metadata_cache().get(cls.get_memo_key(related_visit))
+            if value and value[0] == fingerprint:
+                return value[1]
+        return None
+
+    @classmethod
+    def memoize_results(
+        cls: Any,
+        related_visit: Any,
+        fingerprint: str | None,
+        results: dict[str, dict[str, str] | None],
+    ) -> None:
+        if fingerprint:
+            get_metadata_cache().set(cls.get_memo_key(related_visit), (fingerprint, results))
+
+    @classmethod
+    def get_memo_key(cls: Any, related_visit: Any) -> str:
+        return f"edc_metadata:rule_results:{cls.name}:{related_visit.pk}"
+
     @classmethod
     def validate(cls: Any) -> None:
         """Outputs to the console if a target model referenced in a rule
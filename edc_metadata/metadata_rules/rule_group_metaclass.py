@@ -77,6 +77,7 @@ class RuleGroupMetaclass(type):
                     for k, v in meta.options.items():
                         setattr(rule, k, v)
                     rule.target_models = mcs.__get_target_models(rule, meta)
+                    rule.compile()
                     rules.append(rule)
         return tuple(rules)
 
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from collections import namedtuple
+from typing import TYPE_CHECKING, Any
+
+from ..constants import KEYED
+from ..utils import get_audit_update_values, get_crf_metadata, get_requisition_metadata
+
+if TYPE_CHECKING:
+    from edc_lab.models import Panel
+    from edc_visit_tracking.model_mixins import VisitModelMixin as Base
+
+    from ..model_mixins.creates import CreatesMetadataModelMixin
+    from .rule import Rule
+    from .rule_evaluation_context import RuleEvaluationContext
+
+    class RelatedVisitModel(CreatesMetadataModelMixin, Base):
+        pass
+
+
+RuleOutcome = namedtuple(
+    "RuleOutcome", "rule_group rule target_model target_panel entry_status"
+)
+RuleOutcomeConflict = namedtuple("RuleOutcomeConflict", "target previous outcome")
+
+
+class RuleOutcomes:
+    """A class to collect the entry_status decided by rules for each
+    (target model, panel name) of a related visit and to apply the
+    net changes.
+
+    Precedence follows the order in which outcomes are added; the
+    last rule group to decide a target wins, as when outcomes were
+    applied one at a time. Different decisions for the same target
+    are recorded in `conflicts`.
+    """
+
+    def __init__(self, related_visit: RelatedVisitModel, context: RuleEvaluationContext):
+        self.related_visit = related_visit
+        self.context = context
+        self.outcomes: dict[tuple[str, str | None], RuleOutcome] = {}
+        self.conflicts: list[RuleOutcomeConflict] = []
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.related_visit})"
+
+    def add(
+        self,
+        rule_group: Any,
+        rule: Rule,
+        target_model: str,
+        entry_status: str,
+        target_panel: Panel | None = None,
+    ) -> None:
+        target = (target_model, target_panel.name if target_panel else None)
+        outcome = RuleOutcome(rule_group, rule, target_model, target_panel, entry_status)
+        previous = self.outcomes.pop(target, None)
+        if previous and previous.entry_status != entry_status:
+            self.conflicts.append(RuleOutcomeConflict(target, previous, outcome))
+        self.outcomes[target] = outcome
+
+    def apply(self, allow_create: bool | None = None) -> None:
+        """Updates metadata to the decided entry_status.
+
+        Metadata that already has the decided entry_status is not
+        touched. The rest is updated with one UPDATE per entry_status
+        per metadata model. The UPDATE sets the audit fields save()
+        would set but signals are not sent. Targets that are keyed or
+        have no metadata yet fall back to the rule group's metadata
+        updater.
+        """
+        keyed_source_models = self.context.keyed_source_models
+        bulk_outcomes = {}
+        for target, outcome in self.outcomes.items():
+            if keyed_source_models.covers(*target) and not keyed_source_models.exists(*target):
+                bulk_outcomes[target] = outcome
+            else:
+                self.update(outcome, allow_create)
+        querysets = []
+        if models := [m for m, p in bulk_outcomes if not p]:
+            querysets.append(
+                (
+                    get_crf_metadata(self.related_visit).filter(model__in=models),
+                    ["pk", "model", "entry_status"],
+                )
+            )
+        if panel_names := [p for _, p in bulk_outcomes if p]:
+            querysets.append(
+                (
+                    get_requisition_metadata(self.related_visit).filter(
+                        panel_name__in=panel_names
+                    ),
+                    ["pk", "model", "panel_name", "entry_status"],
+                )
+            )
+        for queryset, fields in querysets:
+            pks_by_entry_status: dict[str, list] = {}
+            for pk, *target, entry_status in queryset.values_list(*fields):
+                target = tuple(target) if len(target) == 2 else (target[0], None)
+                if outcome := bulk_outcomes.pop(target, None):
+                    if outcome.entry_status != entry_status:
+                        pks_by_entry_status.setdefault(outcome.entry_status, []).append(pk)
+            for entry_status, pks in pks_by_entry_status.items():
+                queryset.model.objects.filter(pk__in=pks).update(
+                    entry_status=entry_status,
+                    due_datetime=self.related_visit.report_datetime,
+                    fill_datetime=None,
+                    document_user=self.related_visit.user_created,
+                    **get_audit_update_values(queryset.model),
+                )
+        # no metadata for these targets yet
+        for outcome in bulk_outcomes.values():
+            self.update(outcome, allow_create)
+
+    def update(self, outcome: RuleOutcome, allow_create: bool | None = None) -> Any:
+        """Updates metadata for one outcome using the rule group's
+        metadata updater.
+        """
+        opts = dict(source_panel=outcome.target_panel) if outcome.target_panel else {}
+        metadata_updater = outcome.rule_group.metadata_updater_cls(
+            related_visit=self.related_visit,
+            source_model=outcome.target_model,
+            allow_create=allow_create,
+            keyed_source_models=self.context.keyed_source_models,
+            **opts,
+        )
+        return metadata_updater.get_and_update(entry_status=outcome.entry_status)
+
+    @property
+    def entry_statuses(self) -> dict[tuple[str, str | None], str]:
+        """Returns a dictionary of {(target model, panel name): entry_status}.
+
+        KEYED overrides the decided entry_status if the source model
+        instance exists.
+        """
+        keyed_source_models = self.context.keyed_source_models
+        return {
+            target: (
+                KEYED
+                if keyed_source_models.covers(*target) and keyed_source_models.exists(*target)
+                else outcome.entry_status
+            )
+            for target, outcome in self.outcomes.items()
+        }
@@ -6,6 +6,8 @@ from django.apps import apps as django_apps
 from django.core.management.color import color_style
 from django.utils.module_loading import import_module, module_has_submodule
 
+from .predicate import PF, P
+
 style = color_style()
 
 
@@ -21,7 +23,23 @@ class SiteMetadataRules:
     """Main controller of :class:`MetadataRules` objects."""
 
     def __init__(self) -> None:
-        self.registry = {}
+        self._registry: dict[str, list] = {}
+        self._source_model_index: dict[str, list] | None = None
+        self._source_field_index: dict[tuple[str, str], list] | None = None
+        self._unindexed_rule_groups: list | None = None
+        self._related_visit_model_index: dict[str, list] | None = None
+        self._target_index: dict[tuple[str, str | None], list] | None = None
+        self._app_labels: dict[str, list[str]] | None = None
+        self._dependants: dict[tuple[str, frozenset | None], list] = {}
+
+    @property
+    def registry(self) -> dict[str, list]:
+        return self._registry
+
+    @registry.setter
+    def registry(self, value: dict[str, list]) -> None:
+        self._registry = value
+        self.clear_index()
 
     def register(self, rule_group_cls: Optional[Any] = None) -> None:
         """Register MetadataRules to a list per app_label
@@ -43,11 +61,153 @@ class SiteMetadataRules:
                         f"is already registered"
                     )
             self.registry.get(rule_group_cls._meta.app_label).append(rule_group_cls)
+            self.clear_index()
 
     @property
     def rule_groups(self) -> Any:
         return self.registry
 
+    def clear_index(self) -> None:
+        """Clears the indexes. Indexes are rebuilt on next use."""
+        self._source_model_index = None
+        self._source_field_index = None
+        self._unindexed_rule_groups = None
+        self._related_visit_model_index = None
+        self._target_index = None
+        self._app_labels = None
+        self._dependants = {}
+
+    def build_index(self) -> None:
+        """Indexes rule groups, in evaluation order, by related
+        visit model, by target (model, panel name), source model and
+        by the source model fields read by P/PF predicates.
+
+        For the source model indexes, a rule group with any other
+        predicate (e.g. a function in a PredicateCollection) has
+        unknown dependencies and is not indexed.
+        """
+        self._source_model_index = {}
+        self._source_field_index = {}
+        self._unindexed_rule_groups = []
+        self._related_visit_model_index = {}
+        self._target_index = {}
+        self._app_labels = {}
+        for rule_group in self.ordered_rule_groups:
+            related_visit_model = rule_group._meta.related_visit_model
+            self._related_visit_model_index.setdefault(related_visit_model, []).append(
+                rule_group
+            )
+            app_labels = self._app_labels.setdefault(related_visit_model, [])
+            if rule_group._meta.app_label not in app_labels:
+                app_labels.append(rule_group._meta.app_label)
+            for target in self.get_targets(rule_group):
+                self._target_index.setdefault(target, []).append(rule_group)
+            rules = rule_group._meta.options.get("rules")
+            source_model = rule_group._meta.source_model
+            if not source_model or not all(
+                isinstance(rule.predicate, (P, PF)) for rule in rules
+            ):
+                self._unindexed_rule_groups.append(rule_group)
+                continue
+            self._source_model_index.setdefault(source_model, []).append(rule_group)
+            for field_name in {f for rule in rules for f in rule.field_names}:
+                self._source_field_index.setdefault((source_model, field_name), []).append(
+                    rule_group
+                )
+
+    def get_index(self, name: str) -> dict:
+        if self._source_model_index is None:
+            self.build_index()
+        return getattr(self, f"_{name}_index")
+
+    def get_app_labels(self, related_visit_model: str) -> list[str]:
+        """Returns a list of app_labels with rule groups for the
+        related visit model (label_lower).
+        """
+        if self._app_labels is None:
+            self.build_index()
+        return list(self._app_labels.get(related_visit_model, []))
+
+    def get_rule_groups_for_related_visit_model(self, related_visit_model: str) -> list:
+        return self.get_index("related_visit_model").get(related_visit_model, [])
+
+    @property
+    def source_models(self) -> list[str]:
+        """Returns a sorted list of the source models of all rule
+        groups.
+        """
+        return sorted(
+            {
+                rule_group._meta.source_model
+                for rule_group in self.ordered_rule_groups
+                if rule_group._meta.source_model
+            }
+        )
+
+    @property
+    def ordered_rule_groups(self) -> list:
+        """Returns a list of all rule groups in evaluation order."""
+        return [
+            rule_group for rule_groups in self.registry.values() for rule_group in rule_groups
+        ]
+
+    def get_rule_groups_for_source_model(
+        self, source_model: str, field_names: list[str] | None = None
+    ) -> list:
+        """Returns a list, in evaluation order, of the rule groups to
+        run if an instance of `source_model` is saved.
+
+        If `field_names` is given, only rule groups with predicates
+        reading one of those fields are selected.
+
+        Includes rule groups with unknown dependencies and any rule
+        group sharing a target with a selected rule group so that
+        the last rule group to update a target still wins.
+        """
+        key = (source_model, frozenset(field_names) if field_names is not None else None)
+        if key not in self._dependants:
+            if self._source_model_index is None:
+                self.build_index()
+            if field_names is None:
+                selected = set(self._source_model_index.get(source_model, []))
+            else:
+                selected = {
+                    rule_group
+                    for field_name in field_names
+                    for rule_group in self._source_field_index.get(
+                        (source_model, field_name), []
+                    )
+                }
+            selected.update(self._unindexed_rule_groups)
+            pending = [t for rule_group in selected for t in self.get_targets(rule_group)]
+            targets = set()
+            while pending:
+                target = pending.pop()
+                if target in targets:
+                    continue
+                targets.add(target)
+                for rule_group in self._target_index.get(target, []):
+                    if rule_group not in selected:
+                        selected.add(rule_group)
+                        pending.extend(self.get_targets(rule_group))
+            self._dependants[key] = [
+                rule_group for rule_group in self.ordered_rule_groups if rule_group in selected
+            ]
+        return self._dependants[key]
+
+    @staticmethod
+    def get_targets(rule_group: Any) -> set[tuple[str, str | None]]:
+        """Returns a set of (target model, target panel name) for
+        the rules in the rule group.
+        """
+        targets = set()
+        for rule in rule_group._meta.options.get("rules"):
+            panel_names = [p.name for p in getattr(rule, "target_panels", None) or []]
+            for target_model in rule.target_models:
+                for panel_name in panel_names or [None]:
+                    targets.add((target_model, panel_name))
+        return targets
+
     def validate(self) -> None:
         for rule_groups in self.registry.values():
             for rule_group in rule_groups:
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from collections import namedtuple
+from typing import TYPE_CHECKING, Iterable
+
+from .utils import (
+    get_crf_metadata,
+    get_requisition_metadata,
+    get_visit_crf_metadata,
+    get_visit_requisition_metadata,
+    metadata_cache_enabled,
+)
+
+if TYPE_CHECKING:
+    from edc_appointment.models import Appointment
+
+    from .models import CrfMetadata, RequisitionMetadata
+
+
+SnapshotRow = namedtuple("SnapshotRow", "show_order model panel_name entry_status")
+
+snapshot_fields = ["show_order", "model", "panel_name", "entry_status"]
+
+
+class MetadataSnapshot:
+    """A compact, in-memory copy of the metadata of an appointment
+    as tuples of (show_order, model, panel_name, entry_status),
+    ordered by show_order. `panel_name` is None for CRFs.
+
+    Build from metadata objects already fetched, for example by
+    `DashboardMetadata`, or with `from_appointment`.
+    """
+
+    def __init__(
+        self,
+        crfs: Iterable[SnapshotRow] | None = None,
+        requisitions: Iterable[SnapshotRow] | None = None,
+    ) -> None:
+        self.crfs: tuple[SnapshotRow, ...] = tuple(
+            sorted(crfs or [], key=lambda r: r.show_order)
+        )
+        self.requisitions: tuple[SnapshotRow, ...] = tuple(
+            sorted(requisitions or [], key=lambda r: r.show_order)
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(crfs={len(self.crfs)}, "
+            f"requisitions={len(self.requisitions)})"
+        )
+
+    @classmethod
+    def from_metadata(
+        cls,
+        crf_metadata: Iterable[CrfMetadata] | None = None,
+        requisition_metadata: Iterable[RequisitionMetadata] | None = None,
+    ) -> MetadataSnapshot:
+        return cls(
+            crfs=[
+                SnapshotRow(obj.show_order, obj.model, None, obj.entry_status)
+                for obj in crf_metadata or []
+            ],
+            requisitions=[
+                SnapshotRow(obj.show_order, obj.model, obj.panel_name, obj.entry_status)
+                for obj in requisition_metadata or []
+            ],
+        )
+
+    @classmethod
+    def from_appointment(
+        cls, appointment: Appointment, crfs: bool = True, requisitions: bool = True
+    ) -> MetadataSnapshot:
+        """Returns a snapshot with one query per category, or read
+        through the cache if settings.EDC_METADATA_CACHE_ENABLED=True.
+        """
+        if metadata_cache_enabled():
+            return cls.from_metadata(
+                get_visit_crf_metadata(appointment) if crfs else None,
+                get_visit_requisition_metadata(appointment) if requisitions else None,
+            )
+        return cls(
+            crfs=(
+                [
+                    SnapshotRow(show_order, model, None, entry_status)
+                    for show_order, model, entry_status in get_crf_metadata(
+                        appointment
+                    ).values_list("show_order", "model", "entry_status")
+                ]
+                if crfs
+                else None
+            ),
+            requisitions=(
+                [
+                    SnapshotRow(*row)
+                    for row in get_requisition_metadata(appointment).values_list(
+                        *snapshot_fields
+                    )
+                ]
+                if requisitions
+                else None
+            ),
+        )
+
+    def next_row(
+        self,
+        show_order: int | None = None,
+        entry_status: str | None = None,
+        requisition: bool | None = None,
+    ) -> SnapshotRow | None:
+        """Returns the first row after `show_order` or None.
+
+        Same as `MetadataGetter.next_object`.
+        """
+        if show_order is None:
+            return None
+        for row in self.requisitions if requisition else self.crfs:
+            if row.show_order > show_order and (
+                not entry_status or row.entry_status == entry_status
+            ):
+                return row
+        return None
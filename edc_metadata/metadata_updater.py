@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Type
 
+from django.core.exceptions import ObjectDoesNotExist
+
 from .constants import CRF, KEYED
 from .metadata_handler import MetadataHandler
 from .metadata_mixins import SourceModelMetadataMixin
@@ -9,6 +11,7 @@ from .metadata_mixins import SourceModelMetadataMixin
 if TYPE_CHECKING:
     from edc_visit_tracking.model_mixins import VisitModelMixin as Base
 
+    from .keyed_source_models import KeyedSourceModels
     from .model_mixins.creates import CreatesMetadataModelMixin
     from .models import CrfMetadata, RequisitionMetadata
 
@@ -34,8 +37,9 @@ class MetadataUpdater(SourceModelMetadataMixin):
         related_visit: RelatedVisitModel = None,
         source_model: str = None,
         allow_create: bool | None = None,
+        keyed_source_models: KeyedSourceModels | None = None,
     ):
-        super().__init__(source_model, related_visit)
+        super().__init__(source_model, related_visit, keyed_source_models=keyed_source_models)
         self._metadata_obj: CrfMetadata | RequisitionMetadata | None = None
         self.allow_create = True if allow_create is None else allow_create
 
@@ -51,22 +55,21 @@ class MetadataUpdater(SourceModelMetadataMixin):
         if entry_status != KEYED and self.source_model_obj_exists:
             entry_status = KEYED
         if metadata_obj.entry_status != entry_status:
-            metadata_obj.entry_status = entry_status
-            metadata_obj.due_datetime = self.due_datetime
-            metadata_obj.fill_datetime = self.fill_datetime
-            metadata_obj.document_user = self.document_user
-            metadata_obj.document_name = self.document_name
-            metadata_obj.save(
-                update_fields=[
-                    "entry_status",
-                    "due_datetime",
-                    "fill_datetime",
-                    "document_name",
-                    "document_user",
-                ]
-            )
-            metadata_obj.refresh_from_db()
-            if metadata_obj.entry_status != entry_status:
+            try:
+                updated = metadata_obj.compare_and_set_entry_status(
+                    metadata_obj.entry_status,
+                    entry_status,
+                    due_datetime=self.due_datetime,
+                    fill_datetime=self.fill_datetime,
+                    document_user=self.document_user,
+                    document_name=self.document_name,
+                )
+            except ObjectDoesNotExist:
+                raise MetadataUpdaterError(
+                    "Metadata model instance was deleted by another process. "
+                    f"Got {metadata_obj}."
+                )
+            if not updated:
                 raise MetadataUpdaterError(
                     "Expected entry status does not match `entry_status` on "
                     "metadata model instance. "
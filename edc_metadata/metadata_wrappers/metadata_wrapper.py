@@ -30,6 +30,7 @@ class MetadataWrapper:
         metadata_obj: CrfMetadata | RequisitionMetadata,
     ) -> None:
         self._source_model_obj = None
+        self._source_model_obj_set = False
         self.metadata_obj = metadata_obj
         self.visit = visit
 
@@ -54,7 +55,7 @@ class MetadataWrapper:
 
     @property
     def source_model_obj(self) -> CrfModelMixin:
-        if not self._source_model_obj:
+        if not self._source_model_obj and not self._source_model_obj_set:
             try:
                 self._source_model_obj = self.source_model_cls.objects.get(**self.options)
             except AttributeError as e:
@@ -66,7 +67,18 @@ class MetadataWrapper:
 
     @source_model_obj.setter
     def source_model_obj(self, value=None) -> None:
+        """Sets the source model instance, or None if not keyed, for
+        example, when prefetched. See `MetadataWrappers.prefetch`.
+        """
         self._source_model_obj = value
+        self._source_model_obj_set = True
+
+    @property
+    def source_model_obj_key(self) -> tuple[Any, str | None]:
+        """Returns the (related visit pk, panel name) of the source
+        model instance.
+        """
+        return self.visit.pk, None
 
     @property
     def source_model_cls(self) -> Type[CrfModelMixin]:
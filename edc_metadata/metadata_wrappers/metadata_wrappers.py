@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+from typing import TYPE_CHECKING, Iterable
+
 from django.core.management.color import color_style
 
 from ..metadata import MetadataGetter
 from .metadata_wrapper import MetadataWrapper
 
+if TYPE_CHECKING:
+    from edc_appointment.models import Appointment
+
 style = color_style()
 
 
@@ -12,13 +17,18 @@ class MetadataWrappers:
     """A class that generates a collection of MetadataWrapper objects, e.g. CRF
     or REQUISITION, from a queryset of metadata objects.
 
+    The source model instance of each wrapper is prefetched with
+    one query per source model (see `prefetch_source_model_objs`).
+    Use `bulk` to wrap the metadata of many appointments with one
+    query per source model for all.
+
     See also classes Crf, Requisition in edc_visit_schedule.
     """
 
     metadata_getter_cls: MetadataGetter = MetadataGetter
     metadata_wrapper_cls: MetadataWrapper = MetadataWrapper
 
-    def __init__(self, **kwargs) -> None:
+    def __init__(self, prefetch: bool | None = None, **kwargs) -> None:
         metadata_getter = self.metadata_getter_cls(**kwargs)
         self.objects = []
         if metadata_getter.related_visit:
@@ -28,6 +38,60 @@ class MetadataWrappers:
                     visit=metadata_getter.related_visit,
                 )
                 self.objects.append(metadata_wrapper)
+        if prefetch is None or prefetch:
+            prefetch_source_model_objs(self.objects)
 
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.objects})"
+
+    @classmethod
+    def bulk(cls, appointments: Iterable[Appointment]) -> list[MetadataWrappers]:
+        """Returns a list of MetadataWrappers, one per appointment,
+        prefetched together.
+        """
+        metadata_wrappers = [
+            cls(appointment=appointment, prefetch=False) for appointment in appointments
+        ]
+        prefetch_source_model_objs(
+            [obj for wrappers in metadata_wrappers for obj in wrappers.objects]
+        )
+        return metadata_wrappers
+
+
+def prefetch_source_model_objs(metadata_wrappers: list[MetadataWrapper]) -> None:
+    """Sets the source model instance, or None, on each metadata
+    wrapper with one query per distinct source model.
+    """
+    wrappers_by_model: dict[str, list[MetadataWrapper]] = {}
+    for metadata_wrapper in metadata_wrappers:
+        wrappers_by_model.setdefault(metadata_wrapper.metadata_obj.model, []).append(
+            metadata_wrapper
+        )
+    for wrappers in wrappers_by_model.values():
+        try:
+            source_model_cls = wrappers[0].source_model_cls
+            related_visit_model_attr = source_model_cls.related_visit_model_attr()
+        except (LookupError, AttributeError):
+            # leave to `source_model_obj`
+            continue
+        queryset = source_model_cls.objects.filter(
+            **{
+                f"{related_visit_model_attr}_id__in": {
+                    metadata_wrapper.visit.pk for metadata_wrapper in wrappers
+                }
+            }
+        )
+        requisition = wrappers[0].source_model_obj_key[1] is not None
+        if requisition:
+            queryset = queryset.select_related("panel")
+        source_model_objs = {}
+        for obj in queryset:
+            key = (
+                getattr(obj, f"{related_visit_model_attr}_id"),
+                obj.panel.name if requisition else None,
+            )
+            source_model_objs.setdefault(key, obj)
+        for metadata_wrapper in wrappers:
+            metadata_wrapper.source_model_obj = source_model_objs.get(
+                metadata_wrapper.source_model_obj_key
+            )
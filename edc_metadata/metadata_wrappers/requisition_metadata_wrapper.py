@@ -21,6 +21,10 @@ class RequisitionMetadataWrapper(MetadataWrapper):
         options.update(panel__name=self.panel_name)
         return options
 
+    @property
+    def source_model_obj_key(self) -> tuple:
+        return self.visit.pk, self.panel_name
+
     @property
     def html_id(self) -> str:
         return f"id_{self.panel_name}"
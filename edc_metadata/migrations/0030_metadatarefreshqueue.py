@@ -0,0 +1,56 @@
+import uuid
+
+from django.db import migrations, models
+
+import edc_metadata.managers
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("edc_metadata", "0029_alter_crfmetadata_site_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MetadataRefreshQueue",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                ("related_visit_model", models.CharField(max_length=50)),
+                ("related_visit_id", models.UUIDField()),
+                ("subject_identifier", models.CharField(max_length=50)),
+                ("create", models.BooleanField(default=False)),
+                ("allow_create", models.BooleanField(default=False)),
+                ("source_model", models.CharField(max_length=50, null=True)),
+                ("requested_datetime", models.DateTimeField()),
+                ("started_datetime", models.DateTimeField(null=True)),
+                ("requeued", models.BooleanField(default=False)),
+                ("attempts", models.IntegerField(default=0)),
+                ("error", models.TextField(null=True)),
+            ],
+            options={
+                "verbose_name": "Metadata refresh queue",
+                "verbose_name_plural": "Metadata refresh queue",
+                "indexes": [
+                    models.Index(
+                        fields=["started_datetime", "requested_datetime"],
+                        name="edc_metadat_started_31ff0c_idx",
+                    )
+                ],
+            },
+            managers=[
+                ("objects", edc_metadata.managers.MetadataRefreshQueueManager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="metadatarefreshqueue",
+            constraint=models.UniqueConstraint(
+                fields=("related_visit_model", "related_visit_id"),
+                name="edc_metadata_metadatarefreshqueue_related_visit_uniq",
+            ),
+        ),
+    ]
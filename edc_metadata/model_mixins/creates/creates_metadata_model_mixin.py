@@ -36,15 +36,26 @@ class CreatesMetadataModelMixin(RelatedVisitProtocol, models.Model):
         metadata = self.metadata_cls(related_visit=self, update_keyed=True)
         metadata.prepare()
 
-    def run_metadata_rules(self, allow_create: bool | None = None) -> None:
-        """Runs all the metadata rules.
+    def run_metadata_rules(
+        self,
+        allow_create: bool | None = None,
+        source_model: str | None = None,
+        exclude_rule_groups: list | None = None,
+    ) -> None:
+        """Runs all the metadata rules or, if `source_model`, only
+        those that depend on the source model.
+
+        Rule groups in `exclude_rule_groups` are not run.
 
         Initially called by post_save signal.
 
         Also called by post_save signal after metadata is updated.
         """
         metadata_rule_evaluator = self.metadata_rule_evaluator_cls(
-            related_visit=self, allow_create=allow_create
+            related_visit=self,
+            allow_create=allow_create,
+            source_model=source_model,
+            exclude_rule_groups=exclude_rule_groups,
         )
         metadata_rule_evaluator.evaluate_rules()
 
@@ -6,6 +6,7 @@ from django.apps import apps as django_apps
 from django.db import models
 
 from ...constants import CRF, NOT_REQUIRED, REQUIRED
+from ...form_plan import get_form_plan
 from ...metadata_updater import MetadataUpdater
 from .updates_metadata_model_mixin import UpdatesMetadataModelMixin
 
@@ -54,13 +55,12 @@ class UpdatesCrfMetadataModelMixin(UpdatesMetadataModelMixin):
         """Returns a string that represents the default entry status
         of the CRF in the visit schedule.
         """
-        crfs_prn = self.metadata_visit_object.crfs_prn
-        if self.related_visit.visit_code_sequence != 0:
-            crfs = self.metadata_visit_object.crfs_unscheduled.forms + crfs_prn.forms
-        else:
-            crfs = self.metadata_visit_object.crfs.forms + crfs_prn.forms
-        crf = [c for c in crfs if c.model == self._meta.label_lower][0]
-        return REQUIRED if crf.required else NOT_REQUIRED
+        crf_required = get_form_plan(self.related_visit, missed=False).crf_required
+        try:
+            required = crf_required[self._meta.label_lower]
+        except KeyError as e:
+            raise IndexError(f"CRF not found for visit. Got {e}.") from e
+        return REQUIRED if required else NOT_REQUIRED
 
     class Meta:
         abstract = True
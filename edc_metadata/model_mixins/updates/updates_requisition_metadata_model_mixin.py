@@ -6,6 +6,7 @@ from django.apps import apps as django_apps
 from django.db import models
 
 from ...constants import NOT_REQUIRED, REQUIRED, REQUISITION
+from ...form_plan import get_form_plan
 from ...requisition import RequisitionMetadataUpdater
 from .updates_metadata_model_mixin import UpdatesMetadataModelMixin
 
@@ -54,18 +55,14 @@ class UpdatesRequisitionMetadataModelMixin(UpdatesMetadataModelMixin):
         """Returns a string that represents the configured
         entry status of the requisition in the visit schedule.
         """
-        requisitions_prn = self.metadata_visit_object.requisitions_prn
-        if self.related_visit.visit_code_sequence != 0:
-            requisitions = (
-                self.metadata_visit_object.requisitions_unscheduled.forms
-                + requisitions_prn.forms
-            )
-        else:
-            requisitions = (
-                self.metadata_visit_object.requisitions.forms + requisitions_prn.forms
-            )
-        requisition = [r for r in requisitions if r.panel.name == self.panel.name][0]
-        return REQUIRED if requisition.required else NOT_REQUIRED
+        requisition_required = get_form_plan(
+            self.related_visit, missed=False
+        ).requisition_required
+        try:
+            required = requisition_required[self.panel.name]
+        except KeyError as e:
+            raise IndexError(f"Requisition not found for visit. Got {e}.") from e
+        return REQUIRED if required else NOT_REQUIRED
 
     @property
     def metadata_model(self: RequisitionModel) -> Type[RequisitionMetadata]:
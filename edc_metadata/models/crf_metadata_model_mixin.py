@@ -13,8 +13,10 @@ from edc_visit_schedule.model_mixins import (
     VisitScheduleMethodsModelMixin,
 )
 
+from ..cache import visit_metadata_cache
 from ..choices import ENTRY_STATUS, NOT_REQUIRED, REQUIRED
 from ..constants import KEYED
+from ..utils import get_audit_update_values, metadata_cache_enabled
 
 if TYPE_CHECKING:
     from django.contrib.sites.models import Site
@@ -97,6 +99,16 @@ class CrfMetadataModelMixin(
             pass
         return instance
 
+    def save_base(self, *args, **kwargs) -> None:
+        super().save_base(*args, **kwargs)
+        if metadata_cache_enabled():
+            visit_metadata_cache.invalidate([visit_metadata_cache.get_visit_key(self)])
+
+    def delete(self, *args, **kwargs):
+        if metadata_cache_enabled():
+            visit_metadata_cache.invalidate([visit_metadata_cache.get_visit_key(self)])
+        return super().delete(*args, **kwargs)
+
     def refresh_entry_status(self) -> str:
         """Resets entry_status to the original visit schedule value"""
         if not self.model_instance:
@@ -116,6 +128,33 @@ class CrfMetadataModelMixin(
     def get_entry_status(self) -> str:
         return self.refresh_entry_status()
 
+    def compare_and_set_entry_status(
+        self, expected_entry_status: str, entry_status: str, **fields
+    ) -> bool:
+        """Sets `entry_status` (and any other `fields`) if the row's
+        `entry_status` is still `expected_entry_status`.
+
+        Uses a single conditional UPDATE instead of save() followed by
+        refresh_from_db(). The audit fields save() maintains are
+        updated as well (see `get_audit_update_values`) but signals
+        are not sent.
+
+        If no row was updated, the row is re-read. Returns True if
+        `entry_status` is now set, for example by another process,
+        otherwise False. Raises ObjectDoesNotExist if the row was
+        deleted.
+        """
+        fields.update(entry_status=entry_status, **get_audit_update_values(self.__class__))
+        updated = self.__class__.objects.filter(
+            pk=self.pk, entry_status=expected_entry_status
+        ).update(**fields)
+        if updated:
+            for attr, value in fields.items():
+                setattr(self, attr, value)
+        else:
+            self.refresh_from_db()
+        return self.entry_status == entry_status
+
     def get_site_on_create(self) -> Site:
         """Expect site instance to be set from the reference model
         instance.
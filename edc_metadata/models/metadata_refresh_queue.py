@@ -0,0 +1,60 @@
+from uuid import uuid4
+
+from django.db import models
+from django.db.models import UniqueConstraint
+
+from ..managers import MetadataRefreshQueueManager
+
+
+class MetadataRefreshQueue(models.Model):
+    """A queue of related visits waiting for their metadata to be
+    refreshed by the `process_metadata_refresh_queue` worker.
+
+    There is at most one row per related visit. A row is in-flight
+    while `started_datetime` is set. A row requested again while
+    in-flight is flagged `requeued` and is refreshed again once the
+    worker is done.
+
+    See also settings.EDC_METADATA_ASYNC_REFRESH.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid4, editable=False)
+
+    related_visit_model = models.CharField(max_length=50)
+
+    related_visit_id = models.UUIDField()
+
+    subject_identifier = models.CharField(max_length=50)
+
+    create = models.BooleanField(default=False)
+
+    allow_create = models.BooleanField(default=False)
+
+    # None for all rules
+    source_model = models.CharField(max_length=50, null=True)
+
+    requested_datetime = models.DateTimeField()
+
+    started_datetime = models.DateTimeField(null=True)
+
+    requeued = models.BooleanField(default=False)
+
+    attempts = models.IntegerField(default=0)
+
+    error = models.TextField(null=True)
+
+    objects = MetadataRefreshQueueManager()
+
+    def __str__(self) -> str:
+        return f"{self.related_visit_model} {self.related_visit_id} {self.subject_identifier}"
+
+    class Meta:
+        verbose_name = "Metadata refresh queue"
+        verbose_name_plural = "Metadata refresh queue"
+        constraints = [
+            UniqueConstraint(
+                fields=["related_visit_model", "related_visit_id"],
+                name="%(app_label)s_%(class)s_related_visit_uniq",
+            )
+        ]
+        indexes = [models.Index(fields=["started_datetime", "requested_datetime"])]
@@ -3,7 +3,13 @@ from django.dispatch import receiver
 from edc_crf.model_mixins import SingletonCrfModelMixin
 
 from edc_metadata import KEYED
-from edc_metadata.utils import refresh_metadata_for_timepoint
+from edc_metadata.refresh_coalescer import refresh_coalescer, refresh_or_mark_dirty
+from edc_metadata.utils import (
+    batch_singleton_metadata_enabled,
+    reset_metadata_validation,
+    scoped_metadata_rules_enabled,
+    update_singleton_metadata_for_previous_timepoints,
+)
 
 
 @receiver(post_save, weak=False, dispatch_uid="metadata_create_on_post_save")
@@ -20,6 +26,8 @@ def metadata_create_on_post_save(
         (`metadata_create`)
       * run ALL metadata rules for the timepoint
         (`run_metadata_rules_for_related_visit`).
+
+    If coalescing, the refresh is deferred (see `refresh_or_mark_dirty`).
     """
     if (
         not raw
@@ -33,7 +41,7 @@ def metadata_create_on_post_save(
             if "metadata_create" not in str(e):
                 raise
         else:
-            refresh_metadata_for_timepoint(instance, allow_create=True)
+            refresh_or_mark_dirty(instance, allow_create=True)
 
 
 @receiver(post_save, weak=False, dispatch_uid="metadata_update_on_post_save")
@@ -46,7 +54,8 @@ def metadata_update_on_post_save(
     A CRF/Requisition model instance will:
       * update it`s own references (`update_reference_on_save`)
       * update it`s own metadata (`metadata_update`)
-      * run ALL metadata rules for the timepoint
+      * run the metadata rules for the timepoint that depend on the
+        model, or ALL if settings.EDC_METADATA_SCOPED_RULES=False
         (`run_metadata_rules_for_related_visit`).
     """
     if (
@@ -61,13 +70,24 @@ def metadata_update_on_post_save(
             if "metadata_update" not in str(e):
                 raise
         else:
-            refresh_metadata_for_timepoint(instance, allow_create=True)
+            reset_metadata_validation(instance.related_visit)
+            refresh_or_mark_dirty(
+                instance,
+                allow_create=True,
+                source_model=(
+                    instance._meta.label_lower if scoped_metadata_rules_enabled() else None
+                ),
+            )
 
 
 @receiver(post_delete, weak=False, dispatch_uid="metadata_reset_on_post_delete")
 def metadata_reset_on_post_delete(sender, instance, using, **kwargs) -> None:
     """Deletes a single model instance used by UpdatesMetadataMixin.
 
+    The instance's own metadata is reset and the metadata rules for
+    the timepoint are run. Metadata for the timepoint is not
+    re-created (see `rebuilds_metadata`).
+
     Not used by CrfMetadata and RequisitionMetadata.
     """
     try:
@@ -76,7 +96,8 @@ def metadata_reset_on_post_delete(sender, instance, using, **kwargs) -> None:
         if "metadata_reset_on_delete" not in str(e):
             raise
     else:
-        refresh_metadata_for_timepoint(instance, allow_create=True)
+        reset_metadata_validation(instance.related_visit)
+        refresh_or_mark_dirty(instance, allow_create=True)
 
     # deletes all for a visit used by CreatesMetadataMixin
     try:
@@ -84,6 +105,8 @@ def metadata_reset_on_post_delete(sender, instance, using, **kwargs) -> None:
     except AttributeError as e:
         if "metadata_delete_for_visit" not in str(e):
             raise
+    else:
+        refresh_coalescer.discard(instance)
 
 
 @receiver(
@@ -94,14 +117,22 @@ def metadata_reset_on_post_delete(sender, instance, using, **kwargs) -> None:
 def metadata_update_previous_timepoints_for_singleton_on_post_save(
     sender, instance, raw, created, using, **kwargs
 ):
+    """Updates metadata at earlier timepoints on post save of a
+    singleton CRF.
+
+    Only the CRF's own metadata is updated, in one UPDATE, unless
+    settings.EDC_METADATA_BATCH_SINGLETON=False, in which case
+    each earlier timepoint is refreshed.
+    """
     if not raw and not kwargs.get("update_fields"):
         if isinstance(instance, (SingletonCrfModelMixin,)):
+            if batch_singleton_metadata_enabled():
+                update_singleton_metadata_for_previous_timepoints(instance)
+                return
             appointment = (
                 instance.related_visit.appointment.relative_previous_with_related_visit
             )
             while appointment:
                 if appointment.related_visit:
-                    refresh_metadata_for_timepoint(
-                        appointment.related_visit, allow_create=False
-                    )
+                    refresh_or_mark_dirty(appointment.related_visit, allow_create=False)
                 appointment = appointment.relative_previous_with_related_visit
@@ -7,16 +7,26 @@ from django.core.exceptions import ObjectDoesNotExist
 
 from .constants import REQUIRED
 from .metadata import CrfMetadataGetter, RequisitionMetadataGetter
+from .metadata_snapshot import MetadataSnapshot
 
 if TYPE_CHECKING:
     from edc_appointment.models import Appointment
     from edc_visit_schedule.visit import Crf, Requisition, Visit
 
     from .metadata import MetadataGetter
-    from .models import CrfMetadata, RequisitionMetadata
+    from .metadata_snapshot import SnapshotRow
 
 
 class NextFormGetter:
+    """A class to get the next required form of a visit after the
+    given model (and panel).
+
+    The next form is found in a `MetadataSnapshot` of the
+    appointment's metadata. Pass the `snapshot` of the metadata
+    already fetched, for example `DashboardMetadata.snapshot`, to
+    avoid any query.
+    """
+
     crf_metadata_getter_cls = CrfMetadataGetter
     requisition_metadata_getter_cls = RequisitionMetadataGetter
 
@@ -26,8 +36,10 @@ class NextFormGetter:
         appointment: Appointment = None,
         model: str = None,
         panel_name: str = None,
+        snapshot: MetadataSnapshot | None = None,
     ):
         self._getter = None
+        self._snapshot = snapshot
         self._next_metadata_obj = None
         self._model_obj = model_obj
         self._next_form = None
@@ -83,29 +95,42 @@ class NextFormGetter:
         return self._getter
 
     @property
-    def next_metadata_obj(self) -> CrfMetadata | RequisitionMetadata:
-        """Returns the "next" metadata model instance or None."""
+    def snapshot(self) -> MetadataSnapshot:
+        """Returns a snapshot of the CRF or requisition metadata."""
+        if not self._snapshot:
+            self._snapshot = MetadataSnapshot.from_appointment(
+                self.appointment,
+                crfs=not self.panel_name,
+                requisitions=bool(self.panel_name),
+            )
+        return self._snapshot
+
+    @property
+    def next_metadata_obj(self) -> SnapshotRow | None:
+        """Returns the "next" metadata snapshot row or None."""
         if not self._next_metadata_obj:
             show_order = getattr(self.crf_or_requisition, "show_order", None)
-            self._next_metadata_obj = self.metadata_getter.next_object(
-                show_order=show_order, entry_status=REQUIRED
+            self._next_metadata_obj = self.snapshot.next_row(
+                show_order=show_order,
+                entry_status=REQUIRED,
+                requisition=bool(self.panel_name),
             )
         return self._next_metadata_obj
 
     @property
     def next_panel(self) -> str | None:
-        if not self._next_panel:
-            if self.next_metadata_obj:
-                try:
-                    self._next_panel = self.next_metadata_obj.panel_name
-                except AttributeError:
-                    pass
+        if not self._next_panel and self.next_metadata_obj:
+            self._next_panel = self.next_metadata_obj.panel_name
         return self._next_panel
 
     @property
     def panel_name(self) -> str | None:
-        """Returns a panel_name or None."""
-        if not self._panel_name:
+        """Returns a panel_name or None.
+
+        The model instance is only fetched if the model is not a
+        CRF of the visit.
+        """
+        if not self._panel_name and (self._model_obj or not self.visit.get_crf(self.model)):
             if self.model_obj:
                 try:
                     self._panel_name = self.model_obj.panel.name
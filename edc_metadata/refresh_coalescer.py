@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator
+
+from django.apps import apps as django_apps
+from django.db import connection, transaction
+
+from .utils import (
+    async_metadata_refresh_enabled,
+    coalesce_metadata_refresh_enabled,
+    rebuilds_metadata,
+    refresh_metadata_for_timepoint,
+)
+
+if TYPE_CHECKING:
+    from edc_appointment.models import Appointment
+
+    from .models import MetadataRefreshQueue
+    from .utils import CrfModel, RelatedVisitModel, RequisitionModel
+
+
+class DirtyRelatedVisit:
+    """A related visit waiting to be refreshed and how."""
+
+    def __init__(self, related_visit: RelatedVisitModel) -> None:
+        self.related_visit = related_visit
+        self.allow_create: bool = False
+        self.create: bool = False
+        self.source_models: set[str] | None = set()
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.related_visit})"
+
+    @classmethod
+    def from_queue(
+        cls, related_visit: RelatedVisitModel, obj: MetadataRefreshQueue
+    ) -> DirtyRelatedVisit:
+        dirty = cls(related_visit)
+        dirty.allow_create = obj.allow_create
+        dirty.create = obj.create
+        dirty.source_models = {obj.source_model} if obj.source_model else None
+        return dirty
+
+    def update(
+        self,
+        allow_create: bool | None = None,
+        source_model: str | None = None,
+        create: bool | None = None,
+    ):
+        self.allow_create = self.allow_create or bool(allow_create)
+        self.create = self.create or bool(create)
+        if source_model is None:
+            self.source_models = None
+        elif self.source_models is not None:
+            self.source_models.add(source_model)
+
+    def refresh(self) -> None:
+        """Refreshes the related visit once.
+
+        Runs `metadata_create` and all rules if any refresh asked
+        for it; the rules of the one source model if only that
+        source model was saved; otherwise, all rules.
+        """
+        if self.create:
+            refresh_metadata_for_timepoint(self.related_visit, allow_create=True)
+        elif self.source_models and len(self.source_models) == 1:
+            refresh_metadata_for_timepoint(
+                self.related_visit,
+                allow_create=self.allow_create,
+                source_model=list(self.source_models)[0],
+            )
+        elif django_apps.get_app_config("edc_metadata").metadata_rules_enabled:
+            self.related_visit.run_metadata_rules(allow_create=self.allow_create)
+
+    def enqueue(self) -> None:
+        """Queues the refresh for the background worker."""
+        if self.source_models and len(self.source_models) == 1:
+            source_model = list(self.source_models)[0]
+        else:
+            source_model = None
+        enqueue_metadata_refresh(
+            self.related_visit,
+            create=self.create,
+            allow_create=self.allow_create,
+            source_model=source_model,
+        )
+
+
+class RefreshCoalescer(threading.local):
+    """Collects the related visits to refresh so that each is
+    refreshed once, after the last save.
+
+    Active inside `coalesce_metadata_refresh()` or, if
+    settings.EDC_METADATA_COALESCE_REFRESH=True, inside a
+    transaction, where the dirty related visits are refreshed by
+    `transaction.on_commit`. If the transaction, or the savepoint
+    in which the refresh was registered, is rolled back, the dirty
+    related visits are discarded.
+    """
+
+    def __init__(self) -> None:
+        self.depth: int = 0
+        self.flushing: bool = False
+        self.dirty: dict[tuple[str, str], DirtyRelatedVisit] = {}
+
+    @property
+    def active(self) -> bool:
+        if self.flushing:
+            return False
+        return self.depth > 0 or (
+            coalesce_metadata_refresh_enabled() and connection.in_atomic_block
+        )
+
+    def mark_dirty(
+        self,
+        related_visit: RelatedVisitModel,
+        allow_create: bool | None = None,
+        source_model: str | None = None,
+        create: bool | None = None,
+    ) -> None:
+        if not self.depth and not self.flush_registered:
+            # a new transaction or the flush was rolled back with
+            # the savepoint it was registered in
+            self.dirty = {}
+            transaction.on_commit(self.flush)
+        key = (related_visit._meta.label_lower, str(related_visit.pk))
+        dirty = self.dirty.get(key)
+        if not dirty:
+            dirty = DirtyRelatedVisit(related_visit)
+            self.dirty[key] = dirty
+        dirty.related_visit = related_visit
+        dirty.update(allow_create=allow_create, source_model=source_model, create=create)
+
+    @property
+    def flush_registered(self) -> bool:
+        """Returns True if `flush` is registered to run on commit
+        of the current transaction.
+        """
+        return any(func == self.flush for _, func, *_ in connection.run_on_commit)
+
+    def discard(self, related_visit: RelatedVisitModel) -> None:
+        """Forgets a related visit, for example, once deleted."""
+        self.dirty.pop((related_visit._meta.label_lower, str(related_visit.pk)), None)
+
+    def flush(self) -> None:
+        """Refreshes, or queues, each dirty related visit once."""
+        dirty, self.dirty = self.dirty, {}
+        self.flushing = True
+        try:
+            for dirty_related_visit in dirty.values():
+                if async_metadata_refresh_enabled():
+                    dirty_related_visit.enqueue()
+                else:
+                    dirty_related_visit.refresh()
+        finally:
+            self.flushing = False
+
+
+refresh_coalescer = RefreshCoalescer()
+
+
+def enqueue_metadata_refresh(
+    related_visit: RelatedVisitModel,
+    create: bool | None = None,
+    allow_create: bool | None = None,
+    source_model: str | None = None,
+) -> MetadataRefreshQueue:
+    """Queues a metadata refresh of the related visit for the
+    `process_metadata_refresh_queue` worker.
+    """
+    return django_apps.get_model("edc_metadata.metadatarefreshqueue").objects.enqueue(
+        related_visit, create=create, allow_create=allow_create, source_model=source_model
+    )
+
+
+def refresh_or_mark_dirty(
+    instance: CrfModel | RequisitionModel | Appointment | RelatedVisitModel,
+    allow_create: bool | None = None,
+    source_model: str | None = None,
+) -> None:
+    """Refreshes metadata for the timepoint now, or marks the related
+    visit as dirty if coalescing, or queues the refresh if
+    settings.EDC_METADATA_ASYNC_REFRESH=True.
+
+    See also `refresh_metadata_for_timepoint`.
+    """
+    if instance and (refresh_coalescer.active or async_metadata_refresh_enabled()):
+        try:
+            related_visit = instance.related_visit
+        except AttributeError:
+            related_visit = instance
+        create = rebuilds_metadata(
+            instance, allow_create=allow_create, source_model=source_model
+        )
+        if refresh_coalescer.active:
+            refresh_coalescer.mark_dirty(
+                related_visit,
+                allow_create=allow_create,
+                source_model=source_model,
+                create=create,
+            )
+        elif related_visit:
+            enqueue_metadata_refresh(
+                related_visit,
+                create=create,
+                allow_create=allow_create,
+                source_model=source_model,
+            )
+    else:
+        refresh_metadata_for_timepoint(
+            instance, allow_create=allow_create, source_model=source_model
+        )
+
+
+@contextmanager
+def coalesce_metadata_refresh() -> Iterator[RefreshCoalescer]:
+    """A context manager to refresh metadata once per related visit
+    on exit instead of on every save. For example, in imports and
+    tests:
+
+        with coalesce_metadata_refresh():
+            subject_visit = SubjectVisit.objects.create(...)
+            CrfOne.objects.create(subject_visit=subject_visit, ...)
+            CrfTwo.objects.create(subject_visit=subject_visit, ...)
+
+    Nothing is refreshed if an exception is raised.
+    """
+    refresh_coalescer.depth += 1
+    try:
+        yield refresh_coalescer
+    except Exception:
+        refresh_coalescer.depth -= 1
+        if not refresh_coalescer.depth:
+            refresh_coalescer.dirty = {}
+        raise
+    else:
+        refresh_coalescer.depth -= 1
+        if not refresh_coalescer.depth:
+            refresh_coalescer.flush()
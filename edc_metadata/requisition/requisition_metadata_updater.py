@@ -27,6 +27,10 @@ class RequisitionMetadataUpdater(MetadataUpdater):
         super().__init__(**kwargs)
         self.source_panel = source_panel
 
+    @property
+    def source_model_panel_name(self) -> str:
+        return self.source_panel.name
+
     @property
     def metadata_handler(self):
         return self.metadata_handler_cls(
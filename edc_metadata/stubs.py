@@ -52,6 +52,10 @@ class CrfMetadataModelStub(Protocol):
 
     def refresh_from_db(self) -> None: ...
 
+    def compare_and_set_entry_status(
+        self, expected_entry_status: str, entry_status: str, **fields
+    ) -> bool: ...
+
 
 class PanelStub(Protocol):
     name: str
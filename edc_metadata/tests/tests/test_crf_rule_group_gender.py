@@ -1,8 +1,10 @@
 from datetime import datetime
+from unittest import skipUnless
 from zoneinfo import ZoneInfo
 
 import time_machine
 from dateutil.relativedelta import relativedelta
+from django.db import connection
 from django.test import TestCase, override_settings
 from edc_appointment.models import Appointment
 from edc_consent import site_consents
@@ -19,16 +21,22 @@ from faker import Faker
 from edc_metadata.constants import NOT_REQUIRED, REQUIRED
 from edc_metadata.metadata_rules import (
     PF,
+    CohortRuleEvaluator,
     CrfRule,
     CrfRuleGroup,
     CrfRuleModelConflict,
+    MetadataRuleEvaluator,
     P,
     PredicateError,
+    PushdownRuleEvaluator,
     RuleEvaluatorRegisterSubjectError,
     RuleGroupMetaError,
     TargetModelConflict,
     site_metadata_rules,
 )
+from edc_metadata.metadata_rules.compiled_rule import CompiledRule
+from edc_metadata.metadata_rules.pushdown_evaluator import case_sensitive_vendors
+from edc_metadata.metadata_rules.rule_evaluation_context import RuleEvaluationContext
 from edc_metadata.models import CrfMetadata
 
 from ..models import CrfOne, SubjectConsentV1
@@ -124,6 +132,19 @@ class CrfRuleGroupGender(CrfRuleGroup):
         related_visit_model = "edc_visit_tracking.subjectvisit"
 
 
+class CrfRuleGroupGenderReversed(CrfRuleGroup):
+    crfs_male = CrfRule(
+        predicate=P("gender", "eq", MALE),
+        consequence=NOT_REQUIRED,
+        alternative=REQUIRED,
+        target_models=["crffour"],
+    )
+
+    class Meta:
+        app_label = "edc_metadata"
+        related_visit_model = "edc_visit_tracking.subjectvisit"
+
+
 @override_settings(
     EDC_PROTOCOL_STUDY_OPEN_DATETIME=test_datetime - relativedelta(years=3),
     EDC_PROTOCOL_STUDY_CLOSE_DATETIME=test_datetime + relativedelta(years=3),
@@ -161,10 +182,13 @@ class TestMetadataRulesWithGender(TestCase):
         traveller = time_machine.travel(test_datetime)
         traveller.start()
         subject_identifier = fake.credit_card_number()
+        identity = fake.unique.numerify("#########")
         subject_consent = SubjectConsentV1.objects.create(
             subject_identifier=subject_identifier,
             consent_datetime=get_utcnow(),
             gender=gender,
+            identity=identity,
+            confirm_identity=identity,
         )
         self.schedule.put_on_schedule(
             subject_identifier=subject_identifier,
@@ -383,6 +407,168 @@ class TestMetadataRulesWithGender(TestCase):
             NOT_REQUIRED,
         )
 
+    @override_settings(EDC_METADATA_MEMOIZE_RULES=True)
+    def test_rule_group_memoized_results(self):
+        subject_visit = self.enroll(gender=MALE)
+        crf_one = CrfOne.objects.create(subject_visit=subject_visit, f1="car")
+        CrfRuleGroupWithSourceModel().evaluate_rules(related_visit=subject_visit)
+        fingerprint = CrfRuleGroupWithSourceModel.get_fingerprint(
+            subject_visit, RuleEvaluationContext(subject_visit)
+        )
+        self.assertIsNotNone(fingerprint)
+        results = CrfRuleGroupWithSourceModel.get_memoized_results(subject_visit, fingerprint)
+        self.assertEqual(
+            results["CrfRuleGroupWithSourceModel.crfs_male"],
+            {"edc_metadata.crffive": REQUIRED, "edc_metadata.crffour": REQUIRED},
+        )
+        crf_one.f1 = "bicycle"
+        crf_one.save()
+        self.assertNotEqual(
+            CrfRuleGroupWithSourceModel.get_fingerprint(
+                subject_visit, RuleEvaluationContext(subject_visit)
+            ),
+            fingerprint,
+        )
+
+    def test_rule_outcomes_last_rule_group_wins(self):
+        site_metadata_rules.register(rule_group_cls=CrfRuleGroupGenderReversed)
+        subject_visit = self.enroll(gender=MALE)
+        metadata_rule_evaluator = MetadataRuleEvaluator(related_visit=subject_visit)
+        metadata_rule_evaluator.evaluate_rules()
+        self.assertEqual(len(metadata_rule_evaluator.outcomes.conflicts), 1)
+        self.assertEqual(
+            metadata_rule_evaluator.outcomes.conflicts[0].target,
+            ("edc_metadata.crffour", None),
+        )
+        for target_model, entry_status in [
+            ("edc_metadata.crffour", NOT_REQUIRED),
+            ("edc_metadata.crffive", REQUIRED),
+            ("edc_metadata.crftwo", NOT_REQUIRED),
+        ]:
+            with self.subTest(target_model=target_model):
+                obj = CrfMetadata.objects.get(
+                    model=target_model,
+                    subject_identifier=subject_visit.subject_identifier,
+                    visit_code=subject_visit.visit_code,
+                )
+                self.assertEqual(obj.entry_status, entry_status)
+
+    def test_explain_does_not_write(self):
+        site_metadata_rules.register(rule_group_cls=CrfRuleGroupGenderReversed)
+        subject_visit = self.enroll(gender=MALE)
+        CrfMetadata.objects.filter(model="edc_metadata.crffour").update(entry_status=REQUIRED)
+        explanations = MetadataRuleEvaluator(related_visit=subject_visit).explain()
+        self.assertEqual(len(explanations), 3)
+        explanation = explanations[-1]
+        self.assertEqual(str(explanation.rule), "CrfRuleGroupGenderReversed.crfs_male")
+        self.assertTrue(explanation.predicate_result)
+        self.assertEqual(explanation.targets[0].target_model, "edc_metadata.crffour")
+        self.assertEqual(explanation.targets[0].entry_status, NOT_REQUIRED)
+        self.assertEqual(explanation.targets[0].current_entry_status, REQUIRED)
+        self.assertTrue(explanation.targets[0].would_change)
+        self.assertEqual(
+            CrfMetadata.objects.get(
+                model="edc_metadata.crffour",
+                subject_identifier=subject_visit.subject_identifier,
+                visit_code=subject_visit.visit_code,
+            ).entry_status,
+            REQUIRED,
+        )
+
+    def test_cohort_rule_evaluator(self):
+        self.assert_bulk_rule_evaluator(CohortRuleEvaluator)
+
+    @skipUnless(
+        connection.vendor in case_sensitive_vendors, "text is compared case-insensitively"
+    )
+    def test_pushdown_rule_evaluator(self):
+        self.assert_bulk_rule_evaluator(PushdownRuleEvaluator)
+
+    def assert_bulk_rule_evaluator(self, evaluator_cls):
+        site_metadata_rules.registry = {}
+        site_metadata_rules.register(rule_group_cls=CrfRuleGroupWithSourceModel)
+        subject_visits = [self.enroll(gender=MALE), self.enroll(gender=FEMALE)]
+        CrfOne.objects.create(subject_visit=subject_visits[0], f1="car")
+        CrfOne.objects.create(subject_visit=subject_visits[1], f1="bicycle")
+        CrfMetadata.objects.filter(
+            model__in=["edc_metadata.crffive", "edc_metadata.crftwo"]
+        ).update(entry_status=REQUIRED)
+        CrfMetadata.objects.filter(model="edc_metadata.crffour").update(
+            entry_status=NOT_REQUIRED
+        )
+        evaluator = evaluator_cls(SubjectVisit)
+        self.assertEqual(evaluator.rule_groups, [CrfRuleGroupWithSourceModel])
+        evaluator.evaluate()
+        self.assertEqual(evaluator.fallback, set())
+        for subject_visit, expected in [
+            (subject_visits[0], [REQUIRED, REQUIRED, NOT_REQUIRED, NOT_REQUIRED]),
+            (subject_visits[1], [NOT_REQUIRED, NOT_REQUIRED, REQUIRED, REQUIRED]),
+        ]:
+            for target_model, entry_status in zip(
+                ["crffive", "crffour", "crfthree", "crftwo"], expected
+            ):
+                with self.subTest(subject_visit=subject_visit, target_model=target_model):
+                    obj = CrfMetadata.objects.get(
+                        model=f"edc_metadata.{target_model}",
+                        subject_identifier=subject_visit.subject_identifier,
+                        visit_code=subject_visit.visit_code,
+                    )
+                    self.assertEqual(obj.entry_status, entry_status)
+
+    def test_cohort_rule_evaluator_matches_per_visit_evaluation(self):
+        self.assert_bulk_rule_evaluator_matches_per_visit(CohortRuleEvaluator)
+
+    @skipUnless(
+        connection.vendor in case_sensitive_vendors, "text is compared case-insensitively"
+    )
+    def test_pushdown_rule_evaluator_matches_per_visit_evaluation(self):
+        self.assert_bulk_rule_evaluator_matches_per_visit(PushdownRuleEvaluator)
+
+    def assert_bulk_rule_evaluator_matches_per_visit(self, evaluator_cls):
+        site_metadata_rules.registry = {}
+        site_metadata_rules.register(rule_group_cls=CrfRuleGroupWithSourceModel)
+        subject_visits = [self.enroll(gender=MALE), self.enroll(gender=FEMALE)]
+        CrfOne.objects.create(subject_visit=subject_visits[0], f1="car")
+        CrfOne.objects.create(subject_visit=subject_visits[1], f1="bicycle")
+        target_models = [
+            f"edc_metadata.{model}" for model in ["crffive", "crffour", "crfthree", "crftwo"]
+        ]
+
+        def reset():
+            CrfMetadata.objects.filter(model__in=target_models).update(entry_status=REQUIRED)
+
+        def get_results():
+            return dict(
+                CrfMetadata.objects.filter(model__in=target_models).values_list(
+                    "pk", "entry_status"
+                )
+            )
+
+        reset()
+        for subject_visit in subject_visits:
+            MetadataRuleEvaluator(related_visit=subject_visit).evaluate_rules()
+        per_visit_results = get_results()
+        reset()
+        evaluator = evaluator_cls(SubjectVisit)
+        evaluator.evaluate()
+        self.assertEqual(evaluator.fallback, set())
+        self.assertEqual(get_results(), per_visit_results)
+
+    def test_rules_compiled_by_metaclass(self):
+        compiled_rules = {}
+        for rule in CrfRuleGroupGender._meta.options.get("rules"):
+            with self.subTest(rule=rule):
+                compiled = rule.compiled
+                self.assertIsInstance(compiled, CompiledRule)
+                self.assertFalse(hasattr(compiled, "__dict__"))
+                self.assertEqual(compiled.target_models, tuple(rule.target_models))
+                self.assertEqual(compiled.logic.consequence, REQUIRED)
+                compiled_rules[rule.name] = compiled
+        subject_visit = self.enroll(gender=MALE)
+        CrfRuleGroupGender().evaluate_rules(related_visit=subject_visit)
+        for rule in CrfRuleGroupGender._meta.options.get("rules"):
+            self.assertIs(rule.compiled, compiled_rules[rule.name])
+
     def test_rule_group_rule_results(self):
         subject_visit = self.enroll(gender=MALE)
         rule_results, _ = CrfRuleGroupGender().evaluate_rules(related_visit=subject_visit)
@@ -0,0 +1,59 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase, override_settings
+from edc_visit_tracking.constants import MISSED_VISIT, SCHEDULED
+
+from edc_metadata.form_plan import get_form_plan
+
+from ..models import SubjectVisit
+from .metadata_test_mixin import TestMetadataMixin
+
+test_datetime = datetime(2019, 6, 11, 8, 00, tzinfo=ZoneInfo("UTC"))
+
+
+@override_settings(
+    EDC_PROTOCOL_STUDY_OPEN_DATETIME=test_datetime - relativedelta(years=3),
+    EDC_PROTOCOL_STUDY_CLOSE_DATETIME=test_datetime + relativedelta(years=3),
+)
+class TestFormPlan(TestMetadataMixin, TestCase):
+    def test_form_plan_scheduled(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        form_plan = get_form_plan(subject_visit)
+        self.assertIn("edc_metadata.crfone", form_plan.crf_models)
+        self.assertIn("edc_metadata.prnone", form_plan.crf_models)
+        self.assertNotIn("edc_metadata.crfsix", form_plan.crf_models)
+        self.assertIn("one", form_plan.panel_names)
+        self.assertTrue(form_plan.crf_required["edc_metadata.crfone"])
+        self.assertEqual(form_plan.crf_show_order["edc_metadata.crfone"], 1)
+        self.assertEqual(
+            [crf.model for crf in form_plan.crfs],
+            [crf.model for crf in subject_visit.visit.crfs]
+            + [
+                crf.model
+                for crf in subject_visit.visit.crfs_prn
+                if crf.model not in [c.model for c in subject_visit.visit.crfs]
+            ],
+        )
+
+    def test_form_plan_is_cached(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        self.assertIs(get_form_plan(subject_visit), get_form_plan(subject_visit))
+        self.assertIsNot(get_form_plan(subject_visit), get_form_plan(subject_visit, True))
+
+    def test_form_plan_missed(self):
+        # visit 1000 has no missed visit CRFs, use visit 2000
+        SubjectVisit.objects.create(appointment=self.appointment, reason=SCHEDULED)
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment_2000, reason=SCHEDULED
+        )
+        subject_visit.reason = MISSED_VISIT
+        form_plan = get_form_plan(subject_visit)
+        self.assertEqual(form_plan.crf_models, frozenset(["edc_metadata.subjectvisitmissed"]))
+        self.assertEqual(form_plan.panel_names, frozenset())
+        self.assertIn("edc_metadata.crffour", get_form_plan(subject_visit, False).crf_models)
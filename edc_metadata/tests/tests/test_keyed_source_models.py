@@ -0,0 +1,83 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from dateutil.relativedelta import relativedelta
+from django.test import TestCase, override_settings
+from edc_visit_tracking.constants import SCHEDULED
+
+from edc_metadata.constants import KEYED
+from edc_metadata.dashboard_metadata import DashboardMetadata
+from edc_metadata.keyed_source_models import KeyedSourceModels
+from edc_metadata.metadata_updater import MetadataUpdater
+
+from ..models import CrfOne, SubjectRequisition, SubjectVisit
+from .metadata_test_mixin import TestMetadataMixin
+
+test_datetime = datetime(2019, 6, 11, 8, 00, tzinfo=ZoneInfo("UTC"))
+
+
+@override_settings(
+    EDC_PROTOCOL_STUDY_OPEN_DATETIME=test_datetime - relativedelta(years=3),
+    EDC_PROTOCOL_STUDY_CLOSE_DATETIME=test_datetime + relativedelta(years=3),
+)
+class TestKeyedSourceModels(TestMetadataMixin, TestCase):
+    def test_keyed_source_models(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        crf_one = CrfOne.objects.create(subject_visit=subject_visit)
+        requisition = SubjectRequisition.objects.create(
+            subject_visit=subject_visit, panel=self.panel_one
+        )
+        keyed_source_models = KeyedSourceModels(subject_visit)
+        with self.assertNumQueries(1):
+            self.assertTrue(keyed_source_models.exists("edc_metadata.crfone"))
+        self.assertEqual(keyed_source_models.get("edc_metadata.crfone").pk, crf_one.pk)
+        self.assertFalse(keyed_source_models.exists("edc_metadata.crftwo"))
+        self.assertEqual(
+            keyed_source_models.get("edc_metadata.subjectrequisition", "one").pk,
+            requisition.pk,
+        )
+        self.assertFalse(keyed_source_models.exists("edc_metadata.subjectrequisition", "two"))
+        self.assertTrue(keyed_source_models.covers("edc_metadata.crfone"))
+        self.assertFalse(keyed_source_models.covers("edc_metadata.crfsix"))
+
+    def test_updater_with_keyed_source_models(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        CrfOne.objects.create(subject_visit=subject_visit)
+        keyed_source_models = KeyedSourceModels(subject_visit)
+        for source_model, exists in [
+            ("edc_metadata.crfone", True),
+            ("edc_metadata.crftwo", False),
+        ]:
+            with self.subTest(source_model=source_model):
+                metadata_updater = MetadataUpdater(
+                    related_visit=subject_visit,
+                    source_model=source_model,
+                    keyed_source_models=keyed_source_models,
+                )
+                self.assertEqual(metadata_updater.source_model_obj_exists, exists)
+
+    def test_dashboard_metadata(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        crf_one = CrfOne.objects.create(subject_visit=subject_visit)
+        requisition = SubjectRequisition.objects.create(
+            subject_visit=subject_visit, panel=self.panel_one
+        )
+        dashboard_metadata = DashboardMetadata(subject_visit.appointment)
+        with self.assertNumQueries(2):
+            crfs = {obj.model: obj for obj in dashboard_metadata.crfs}
+            requisitions = {obj.panel_name: obj for obj in dashboard_metadata.requisitions}
+        self.assertEqual(crfs["edc_metadata.crfone"].entry_status, KEYED)
+        self.assertEqual(crfs["edc_metadata.crfone"].source_pk, crf_one.pk)
+        self.assertIsNone(crfs["edc_metadata.crftwo"].source_pk)
+        self.assertEqual(requisitions["one"].source_pk, requisition.pk)
+        self.assertIsNone(requisitions["two"].source_pk)
+        self.assertEqual(
+            dashboard_metadata.crfs.filter(source_pk__isnull=False).get().model,
+            "edc_metadata.crfone",
+        )
@@ -3,14 +3,16 @@ from zoneinfo import ZoneInfo
 
 from dateutil.relativedelta import relativedelta
 from django.test import TestCase, override_settings
+from django_audit_fields.models.audit_model_mixin import update_device_fields
 from edc_appointment.constants import IN_PROGRESS_APPT, MISSED_APPT
 from edc_visit_tracking.constants import SCHEDULED, UNSCHEDULED
 
-from edc_metadata.metadata import CreatesMetadataError
+from edc_metadata.constants import KEYED, NOT_REQUIRED, REQUIRED
+from edc_metadata.metadata import CreatesMetadataError, Creator, Metadata
 from edc_metadata.metadata_updater import MetadataUpdater
 from edc_metadata.models import CrfMetadata, RequisitionMetadata
 
-from ..models import SubjectVisit
+from ..models import CrfOne, SubjectVisit
 from .metadata_test_mixin import TestMetadataMixin
 
 test_datetime = datetime(2019, 6, 11, 8, 00, tzinfo=ZoneInfo("UTC"))
@@ -71,3 +73,118 @@ class TestCreatesMetadata(TestMetadataMixin, TestCase):
         obj = SubjectVisit.objects.create(appointment=self.appointment, reason=SCHEDULED)
         obj.reason = "ERIK"
         self.assertRaises(CreatesMetadataError, obj.save)
+
+    def test_bulk_create_same_as_create(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        CrfOne.objects.create(subject_visit=subject_visit)
+        results = {}
+        for bulk in [False, True]:
+            CrfMetadata.objects.all().delete()
+            RequisitionMetadata.objects.all().delete()
+            Creator(related_visit=subject_visit, update_keyed=True, bulk=bulk).create()
+            results[bulk] = (
+                list(
+                    CrfMetadata.objects.values_list(
+                        "model", "entry_status", "show_order"
+                    ).order_by("show_order", "model")
+                ),
+                list(
+                    RequisitionMetadata.objects.values_list(
+                        "panel_name", "entry_status", "show_order"
+                    ).order_by("show_order", "panel_name")
+                ),
+            )
+        self.assertEqual(results[False], results[True])
+        self.assertIn(("edc_metadata.crfone", KEYED, 1), results[True][0])
+
+    def test_bulk_create_sets_pk_and_audit_fields(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        CrfMetadata.objects.all().delete()
+        RequisitionMetadata.objects.all().delete()
+        Creator(related_visit=subject_visit, update_keyed=True, bulk=True).create()
+        for model_cls in [CrfMetadata, RequisitionMetadata]:
+            with self.subTest(model_cls=model_cls):
+                # values save() would set on a new instance
+                device_created, device_modified = update_device_fields(model_cls())
+                objs = model_cls.objects.all()
+                self.assertGreater(objs.count(), 0)
+                self.assertEqual(len({obj.id for obj in objs}), objs.count())
+                for obj in objs:
+                    self.assertIsNotNone(obj.id)
+                    self.assertIsNotNone(obj.created)
+                    self.assertEqual(obj.created, obj.modified)
+                    self.assertTrue(obj.hostname_created)
+                    self.assertTrue(obj.hostname_modified)
+                    self.assertEqual(obj.device_created, device_created)
+                    self.assertEqual(obj.device_modified, device_modified)
+
+    def test_bulk_create_resets_entry_status_to_default(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        CrfMetadata.objects.filter(model="edc_metadata.crftwo").update(
+            entry_status=NOT_REQUIRED
+        )
+        Creator(related_visit=subject_visit, update_keyed=True, bulk=True).create()
+        self.assertEqual(
+            CrfMetadata.objects.get(model="edc_metadata.crftwo").entry_status, REQUIRED
+        )
+
+    def test_reconcile_unchanged_visit_keeps_metadata(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        before = dict(CrfMetadata.objects.values_list("id", "modified"))
+        Metadata(related_visit=subject_visit, update_keyed=True, reconcile=True).prepare()
+        self.assertEqual(dict(CrfMetadata.objects.values_list("id", "modified")), before)
+
+    def test_reconcile_deletes_required_metadata_not_in_visit(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        CrfMetadata.objects.filter(model="edc_metadata.crfone").update(
+            model="edc_metadata.crfseven"
+        )
+        Metadata(related_visit=subject_visit, update_keyed=True, reconcile=True).prepare()
+        self.assertFalse(CrfMetadata.objects.filter(model="edc_metadata.crfseven").exists())
+        self.assertTrue(CrfMetadata.objects.filter(model="edc_metadata.crfone").exists())
+
+    def test_reconcile_updates_stale_due_datetime(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        CrfMetadata.objects.all().update(
+            due_datetime=subject_visit.report_datetime - relativedelta(days=7)
+        )
+        Metadata(related_visit=subject_visit, update_keyed=True, reconcile=True).prepare()
+        self.assertEqual(
+            set(CrfMetadata.objects.values_list("due_datetime", flat=True)),
+            {subject_visit.report_datetime},
+        )
+
+    def test_reconcile_updates_fill_datetime_and_document_user_of_keyed(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        crf_one = CrfOne.objects.create(subject_visit=subject_visit, user_created="erik")
+        # as if keyed before the metadata was last re-created
+        CrfMetadata.objects.filter(model="edc_metadata.crfone").update(
+            entry_status=REQUIRED, fill_datetime=None, document_user=""
+        )
+        Metadata(related_visit=subject_visit, update_keyed=True, reconcile=True).prepare()
+        metadata_obj = CrfMetadata.objects.get(model="edc_metadata.crfone")
+        self.assertEqual(metadata_obj.entry_status, KEYED)
+        self.assertEqual(metadata_obj.fill_datetime, crf_one.created)
+        self.assertEqual(metadata_obj.document_user, "erik")
+        self.assertEqual(metadata_obj.document_name, CrfOne._meta.verbose_name)
+
+        crf_one.delete()
+        Metadata(related_visit=subject_visit, update_keyed=True, reconcile=True).prepare()
+        metadata_obj = CrfMetadata.objects.get(model="edc_metadata.crfone")
+        self.assertEqual(metadata_obj.entry_status, REQUIRED)
+        self.assertIsNone(metadata_obj.fill_datetime)
+        self.assertEqual(metadata_obj.document_user, subject_visit.user_created)
@@ -1,13 +1,20 @@
 from datetime import datetime
+from unittest.mock import patch
 from zoneinfo import ZoneInfo
 
 from dateutil.relativedelta import relativedelta
 from django.test import TestCase, override_settings
 from edc_visit_tracking.constants import SCHEDULED
 
-from ...constants import REQUIRED
+from ...cache import visit_metadata_cache
+from ...constants import KEYED, REQUIRED
+from ...dashboard_metadata import DashboardMetadata
 from ...metadata import CrfMetadataGetter
+from ...metadata.crf_metadata_getter import CrfMetadataValidator
+from ...metadata_wrappers.crf_metadata_wrappers import CrfMetadataWrappers
+from ...models import CrfMetadata
 from ...next_form_getter import NextFormGetter
+from ...utils import get_visit_crf_metadata
 from ..models import CrfOne, CrfThree, CrfTwo, SubjectVisit
 from .metadata_test_mixin import TestMetadataMixin
 
@@ -36,6 +43,83 @@ class TestMetadataGetter(TestMetadataMixin, TestCase):
         getter = CrfMetadataGetter(self.appointment)
         self.assertGreater(getter.metadata_objects.count(), 0)
 
+    def test_validation_skipped_until_metadata_changes(self):
+        CrfMetadataGetter(self.appointment)
+        with patch.object(CrfMetadataValidator, "validate_metadata_object") as validate:
+            CrfMetadataGetter(self.appointment)
+            validate.assert_not_called()
+            CrfMetadataGetter(self.appointment, force_validation=True)
+            validate.assert_called()
+        with patch.object(CrfMetadataValidator, "validate_metadata_object") as validate:
+            CrfOne.objects.create(subject_visit=self.subject_visit)
+            CrfMetadataGetter(self.appointment)
+            validate.assert_called()
+        with patch.object(CrfMetadataValidator, "validate_metadata_object") as validate:
+            with override_settings(EDC_METADATA_VALIDATION_VERSION="2"):
+                CrfMetadataGetter(self.appointment)
+            validate.assert_called()
+
+    def test_validation_skipped_with_one_query(self):
+        CrfMetadataGetter(self.appointment)
+        with self.assertNumQueries(1):
+            CrfMetadataGetter(self.appointment)
+
+    def test_validation_not_skipped_if_source_model_saved(self):
+        crf_one = CrfOne.objects.create(subject_visit=self.subject_visit)
+        CrfMetadataGetter(self.appointment)
+        with patch.object(CrfMetadataValidator, "validate_metadata_object") as validate:
+            CrfMetadataGetter(self.appointment)
+            validate.assert_not_called()
+        with patch.object(CrfMetadataValidator, "validate_metadata_object") as validate:
+            # metadata is already KEYED and is not changed
+            crf_one.save()
+            CrfMetadataGetter(self.appointment)
+            validate.assert_called()
+
+    def test_metadata_wrappers_prefetch_source_model_objs(self):
+        crf_one = CrfOne.objects.create(subject_visit=self.subject_visit)
+        metadata_wrappers = CrfMetadataWrappers(appointment=self.appointment)
+        with self.assertNumQueries(0):
+            source_model_objs = {
+                obj.metadata_obj.model: obj.source_model_obj
+                for obj in metadata_wrappers.objects
+            }
+        self.assertEqual(source_model_objs.get("edc_metadata.crfone"), crf_one)
+        self.assertIsNone(source_model_objs.get("edc_metadata.crftwo"))
+        metadata_wrappers = CrfMetadataWrappers.bulk([self.appointment])
+        with self.assertNumQueries(0):
+            source_model_objs = [obj.source_model_obj for obj in metadata_wrappers[0].objects]
+        self.assertIn(crf_one, source_model_objs)
+
+    @override_settings(EDC_METADATA_CACHE_ENABLED=True)
+    def test_visit_metadata_cache(self):
+        visit_metadata_cache.invalidate_all()
+        visit_metadata_cache.reset_counters()
+        get_visit_crf_metadata(self.appointment)
+        get_visit_crf_metadata(self.appointment)
+        self.assertEqual(visit_metadata_cache.misses, 1)
+        self.assertEqual(visit_metadata_cache.hits, 1)
+        # saving the CRF updates its metadata
+        CrfOne.objects.create(subject_visit=self.subject_visit)
+        metadata = {obj.model: obj for obj in get_visit_crf_metadata(self.appointment)}
+        self.assertEqual(metadata["edc_metadata.crfone"].entry_status, KEYED)
+        self.assertEqual(visit_metadata_cache.misses, 2)
+        # bulk update
+        CrfMetadata.objects.filter(model="edc_metadata.crftwo").update(entry_status=KEYED)
+        metadata = {obj.model: obj for obj in get_visit_crf_metadata(self.appointment)}
+        self.assertEqual(metadata["edc_metadata.crftwo"].entry_status, KEYED)
+        # invalidate all
+        get_visit_crf_metadata(self.appointment)
+        visit_metadata_cache.invalidate_all()
+        get_visit_crf_metadata(self.appointment)
+        self.assertEqual(visit_metadata_cache.misses, 4)
+
+    @override_settings(EDC_METADATA_CACHE_ENABLED=True)
+    def test_validation_skipped_without_query_if_cached(self):
+        CrfMetadataGetter(self.appointment)
+        with self.assertNumQueries(0):
+            CrfMetadataGetter(self.appointment)
+
     def test_next_object(self):
         getter = CrfMetadataGetter(self.appointment)
         visit = self.schedule.visits.get(getter.visit_code)
@@ -65,6 +149,20 @@ class TestMetadataGetter(TestMetadataMixin, TestCase):
         getter = NextFormGetter(model_obj=crf_three)
         self.assertEqual(getter.next_form.model, "edc_metadata.crffour")
 
+    def test_next_required_form_from_snapshot(self):
+        crf_two = CrfTwo.objects.create(subject_visit=self.subject_visit)
+        snapshot = DashboardMetadata(self.appointment).snapshot
+        crf_getter = NextFormGetter(model_obj=crf_two, snapshot=snapshot)
+        requisition_getter = NextFormGetter(
+            appointment=self.appointment,
+            model="edc_metadata.subjectrequisition",
+            panel_name="one",
+            snapshot=snapshot,
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(crf_getter.next_form.model, "edc_metadata.crfthree")
+            self.assertEqual(requisition_getter.next_form.panel.name, "two")
+
     def test_next_requisition(self):
         getter = NextFormGetter(
             appointment=self.appointment,
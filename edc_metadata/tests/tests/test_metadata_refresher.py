@@ -3,6 +3,7 @@ from zoneinfo import ZoneInfo
 
 from dateutil.relativedelta import relativedelta
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
 from django.test import TestCase, override_settings
 from edc_consent import site_consents
 from edc_consent.consent_definition import ConsentDefinition
@@ -14,10 +15,12 @@ from edc_visit_schedule.visit_schedule import VisitSchedule
 from edc_visit_tracking.constants import SCHEDULED
 
 from edc_metadata.constants import KEYED, REQUIRED
+from edc_metadata.metadata_refresh_worker import MetadataRefreshWorker
 from edc_metadata.metadata_refresher import MetadataRefresher
-from edc_metadata.models import CrfMetadata
+from edc_metadata.models import CrfMetadata, MetadataRefreshQueue
+from edc_metadata.refresh_coalescer import coalesce_metadata_refresh
 
-from ..models import CrfFive, CrfOne, SubjectVisit
+from ..models import CrfFive, CrfOne, CrfTwo, SubjectVisit
 from .metadata_test_mixin import TestMetadataMixin
 
 test_datetime = datetime(2019, 6, 11, 8, 00, tzinfo=ZoneInfo("UTC"))
@@ -62,6 +65,84 @@ class TestMetadataRefresher(TestMetadataMixin, TestCase):
         metadata_refresher.run()
         self.check(expected, subject_visit=subject_visit)
 
+    def test_coalesce_metadata_refresh(self):
+        with coalesce_metadata_refresh() as refresh_coalescer:
+            subject_visit = SubjectVisit.objects.create(
+                appointment=self.appointment,
+                visit_code=self.appointment.visit_code,
+                visit_code_sequence=self.appointment.visit_code_sequence,
+                visit_schedule_name=self.appointment.visit_schedule_name,
+                schedule_name=self.appointment.schedule_name,
+                reason=SCHEDULED,
+            )
+            CrfOne.objects.create(subject_visit=subject_visit)
+            CrfTwo.objects.create(subject_visit=subject_visit)
+            self.assertEqual(len(refresh_coalescer.dirty), 1)
+            dirty_related_visit = list(refresh_coalescer.dirty.values())[0]
+            self.assertTrue(dirty_related_visit.create)
+            self.assertIsNone(dirty_related_visit.source_models)
+        self.assertEqual(refresh_coalescer.dirty, {})
+        self.assertEqual(
+            CrfMetadata.objects.filter(
+                visit_code=subject_visit.visit_code, entry_status=KEYED
+            ).count(),
+            2,
+        )
+
+    @override_settings(EDC_METADATA_COALESCE_REFRESH=True)
+    def test_coalesce_metadata_refresh_after_savepoint_rollback(self):
+        class RolledBack(Exception):
+            pass
+
+        opts = dict(
+            appointment=self.appointment,
+            visit_code=self.appointment.visit_code,
+            visit_code_sequence=self.appointment.visit_code_sequence,
+            visit_schedule_name=self.appointment.visit_schedule_name,
+            schedule_name=self.appointment.schedule_name,
+            reason=SCHEDULED,
+        )
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    SubjectVisit.objects.create(**opts)
+                    raise RolledBack()
+            except RolledBack:
+                pass
+            subject_visit = SubjectVisit.objects.create(**opts)
+        self.assertEqual(len(callbacks), 1)
+        self.assertGreater(
+            CrfMetadata.objects.filter(visit_code=subject_visit.visit_code).count(), 0
+        )
+
+    @override_settings(EDC_METADATA_ASYNC_REFRESH=True, EDC_METADATA_ASYNC_REFRESH_DEBOUNCE=0)
+    def test_async_metadata_refresh(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment,
+            visit_code=self.appointment.visit_code,
+            visit_code_sequence=self.appointment.visit_code_sequence,
+            visit_schedule_name=self.appointment.visit_schedule_name,
+            schedule_name=self.appointment.schedule_name,
+            reason=SCHEDULED,
+        )
+        CrfOne.objects.create(subject_visit=subject_visit)
+        CrfTwo.objects.create(subject_visit=subject_visit)
+        self.assertEqual(MetadataRefreshQueue.objects.all().count(), 1)
+        obj = MetadataRefreshQueue.objects.get(related_visit_id=subject_visit.id)
+        self.assertTrue(obj.create)
+        self.assertIsNone(obj.source_model)
+        self.assertTrue(MetadataRefreshQueue.objects.pending(subject_visit))
+        worker = MetadataRefreshWorker()
+        worker.run(once=True)
+        self.assertEqual(worker.processed, 1)
+        self.assertEqual(MetadataRefreshQueue.objects.all().count(), 0)
+        self.assertEqual(
+            CrfMetadata.objects.filter(
+                visit_code=subject_visit.visit_code, entry_status=KEYED
+            ).count(),
+            2,
+        )
+
     def test_updates_after_manual_change(self):
         subject_visit = SubjectVisit.objects.create(
             appointment=self.appointment,
@@ -1,4 +1,5 @@
 from datetime import datetime
+from unittest.mock import patch
 from zoneinfo import ZoneInfo
 
 from dateutil.relativedelta import relativedelta
@@ -9,7 +10,7 @@ from edc_visit_tracking.constants import SCHEDULED
 from edc_metadata.constants import KEYED, NOT_REQUIRED, REQUIRED
 from edc_metadata.metadata_handler import MetadataHandlerError
 from edc_metadata.metadata_inspector import MetaDataInspector
-from edc_metadata.metadata_updater import MetadataUpdater
+from edc_metadata.metadata_updater import MetadataUpdater, MetadataUpdaterError
 from edc_metadata.models import CrfMetadata, RequisitionMetadata
 
 from ..models import CrfOne, CrfThree, CrfTwo, SubjectRequisition, SubjectVisit
@@ -132,6 +133,26 @@ class TestMetadataUpdater(TestMetadataMixin, TestCase):
             1,
         )
 
+    @override_settings(EDC_METADATA_SCOPED_RULES=False)
+    def test_crf_save_and_delete_do_not_recreate_metadata(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        with patch.object(SubjectVisit, "metadata_create") as metadata_create:
+            crf_one = CrfOne.objects.create(subject_visit=subject_visit)
+            crf_one.delete()
+            metadata_create.assert_not_called()
+            subject_visit.save()
+            metadata_create.assert_called()
+        self.assertEqual(
+            CrfMetadata.objects.filter(
+                entry_status=REQUIRED,
+                model="edc_metadata.crfone",
+                visit_code=subject_visit.visit_code,
+            ).count(),
+            1,
+        )
+
     def test_resets_requisition_metadata_on_delete1(self):
         subject_visit = SubjectVisit.objects.create(
             appointment=self.appointment, reason=SCHEDULED
@@ -303,3 +324,89 @@ class TestMetadataUpdater(TestMetadataMixin, TestCase):
             metadata_updater.get_and_update,
             entry_status=NOT_REQUIRED,
         )
+
+    def test_compare_and_set_entry_status(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        metadata_obj = CrfMetadata.objects.get(
+            subject_identifier=subject_visit.subject_identifier,
+            visit_code=subject_visit.visit_code,
+            model="edc_metadata.crftwo",
+            entry_status=REQUIRED,
+        )
+        modified = metadata_obj.modified
+        self.assertFalse(metadata_obj.compare_and_set_entry_status(KEYED, NOT_REQUIRED))
+        self.assertEqual(metadata_obj.entry_status, REQUIRED)
+        self.assertTrue(metadata_obj.compare_and_set_entry_status(REQUIRED, NOT_REQUIRED))
+        self.assertEqual(metadata_obj.entry_status, NOT_REQUIRED)
+        metadata_obj.refresh_from_db()
+        self.assertEqual(metadata_obj.entry_status, NOT_REQUIRED)
+        # audit fields are updated as by save()
+        self.assertGreater(metadata_obj.modified, modified)
+        self.assertTrue(metadata_obj.hostname_modified)
+        self.assertTrue(metadata_obj.device_modified)
+
+    def test_compare_and_set_fails_if_changed_by_another_process(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        metadata_updater = MetadataUpdater(
+            related_visit=subject_visit, source_model="edc_metadata.crftwo"
+        )
+        metadata_obj = metadata_updater.metadata_handler.metadata_obj
+        CrfMetadata.objects.filter(pk=metadata_obj.pk).update(entry_status=KEYED)
+        self.assertFalse(metadata_obj.compare_and_set_entry_status(REQUIRED, NOT_REQUIRED))
+        self.assertEqual(metadata_obj.entry_status, KEYED)
+
+    def test_compare_and_set_succeeds_if_set_by_another_process(self):
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        metadata_updater = MetadataUpdater(
+            related_visit=subject_visit, source_model="edc_metadata.crftwo"
+        )
+        metadata_obj = metadata_updater.metadata_handler.metadata_obj
+        CrfMetadata.objects.filter(pk=metadata_obj.pk).update(entry_status=NOT_REQUIRED)
+        self.assertTrue(metadata_obj.compare_and_set_entry_status(REQUIRED, NOT_REQUIRED))
+        self.assertEqual(metadata_obj.entry_status, NOT_REQUIRED)
+
+    def get_and_update_racing(self, entry_status: str, raced_entry_status: str | None = None):
+        """Calls `get_and_update` with the metadata row set to
+        `raced_entry_status`, or deleted, by "another process" just
+        before the compare-and-set.
+        """
+        subject_visit = SubjectVisit.objects.create(
+            appointment=self.appointment, reason=SCHEDULED
+        )
+        metadata_updater = MetadataUpdater(
+            related_visit=subject_visit, source_model="edc_metadata.crftwo"
+        )
+        compare_and_set_entry_status = CrfMetadata.compare_and_set_entry_status
+
+        def race(metadata_obj, *args, **kwargs):
+            queryset = CrfMetadata.objects.filter(pk=metadata_obj.pk)
+            if raced_entry_status:
+                queryset.update(entry_status=raced_entry_status)
+            else:
+                queryset.delete()
+            return compare_and_set_entry_status(metadata_obj, *args, **kwargs)
+
+        with patch.object(
+            CrfMetadata, "compare_and_set_entry_status", autospec=True, side_effect=race
+        ):
+            return metadata_updater.get_and_update(entry_status=entry_status)
+
+    def test_get_and_update_with_same_entry_status_set_by_another_process(self):
+        metadata_obj = self.get_and_update_racing(NOT_REQUIRED, NOT_REQUIRED)
+        self.assertEqual(metadata_obj.entry_status, NOT_REQUIRED)
+
+    def test_get_and_update_raises_with_entry_status_set_by_another_process(self):
+        with self.assertRaises(MetadataUpdaterError) as cm:
+            self.get_and_update_racing(NOT_REQUIRED, KEYED)
+        self.assertIn(f"Got {NOT_REQUIRED} != {KEYED}.", str(cm.exception))
+
+    def test_get_and_update_raises_if_deleted_by_another_process(self):
+        with self.assertRaises(MetadataUpdaterError) as cm:
+            self.get_and_update_racing(NOT_REQUIRED)
+        self.assertIn("deleted by another process", str(cm.exception))
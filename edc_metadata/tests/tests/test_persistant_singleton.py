@@ -33,6 +33,7 @@ from edc_metadata.metadata_rules import (
     site_metadata_rules,
 )
 from edc_metadata.models import CrfMetadata
+from edc_metadata.utils import update_singleton_metadata_for_previous_timepoints
 
 from ..models import CrfOne, SubjectConsent
 from ..visit_schedule2 import get_visit_schedule
@@ -440,3 +441,51 @@ class TestPersistantSingleton(TestCaseMixin, TestCase):
                 model="edc_metadata.crfone", entry_status=NOT_REQUIRED
             ).exists()
         )
+
+    @time_machine.travel(test_datetime)
+    def test_reconcile_persistant_singleton(self):
+        site_metadata_rules.registry = {}
+        site_metadata_rules.register(self.rule_group)
+        subject_visit = self.get_next_subject_visit(self.subject_visit)
+        subject_visit = self.get_next_subject_visit(subject_visit)
+        self.assertEqual(subject_visit.visit_code, MONTH1)
+        CrfMetadata.objects.filter(model="edc_metadata.crfone").update(entry_status=REQUIRED)
+        with self.assertNumQueries(3):
+            updated = PersistantSingletonMixin.reconcile_persistant_singleton(
+                model="edc_metadata.crfone",
+                visit_schedule_name=subject_visit.visit_schedule_name,
+                schedule_name=subject_visit.schedule_name,
+                exclude_visit_codes=[DAY1],
+            )
+        self.assertEqual(updated, 1)
+        self.assertEqual(
+            [(WEEK2, NOT_REQUIRED), (MONTH1, REQUIRED)],
+            [
+                (obj.visit_code, obj.entry_status)
+                for obj in CrfMetadata.objects.filter(model="edc_metadata.crfone").order_by(
+                    "timepoint"
+                )
+            ],
+        )
+
+    @time_machine.travel(test_datetime)
+    def test_update_singleton_metadata_for_previous_timepoints(self):
+        site_metadata_rules.registry = {}
+        subject_visit_1005 = self.get_next_subject_visit(self.subject_visit)
+        subject_visit_1010 = self.get_next_subject_visit(subject_visit_1005)
+        crf_one = CrfOne.objects.create(subject_visit=subject_visit_1010)
+        CrfMetadata.objects.filter(model="edc_metadata.crfone", visit_code=WEEK2).update(
+            entry_status=REQUIRED
+        )
+        with self.assertNumQueries(1):
+            updated = update_singleton_metadata_for_previous_timepoints(crf_one)
+        self.assertEqual(updated, 1)
+        self.assertEqual(
+            [(WEEK2, NOT_REQUIRED), (MONTH1, KEYED)],
+            [
+                (obj.visit_code, obj.entry_status)
+                for obj in CrfMetadata.objects.filter(model="edc_metadata.crfone").order_by(
+                    "timepoint"
+                )
+            ],
+        )
@@ -3,6 +3,7 @@ from zoneinfo import ZoneInfo
 
 import time_machine
 from dateutil.relativedelta import relativedelta
+from django.db import connection
 from django.test import TestCase, override_settings
 from edc_appointment.models import Appointment
 from edc_consent import site_consents
@@ -16,7 +17,13 @@ from edc_visit_tracking.constants import SCHEDULED
 from edc_visit_tracking.models import SubjectVisit
 from faker import Faker
 
-from edc_metadata.metadata_rules import PF, P
+from edc_metadata.metadata_rules import PF, P, PredicateError
+from edc_metadata.metadata_rules.predicate import get_source_row
+from edc_metadata.metadata_rules.pushdown_evaluator import (
+    PushdownRuleEvaluator,
+    case_sensitive_vendors,
+)
+from edc_metadata.metadata_rules.rule_evaluation_context import RuleEvaluationContext
 
 from ..models import CrfOne, SubjectConsentV1
 from ..visit_schedule import get_visit_schedule
@@ -59,10 +66,13 @@ class TestPredicates(TestCase):
 
     def enroll(self, gender=None):
         subject_identifier = fake.credit_card_number()
+        identity = fake.unique.numerify("#########")
         subject_consent = SubjectConsentV1.objects.create(
             subject_identifier=subject_identifier,
             consent_datetime=get_utcnow(),
             gender=gender,
+            identity=identity,
+            confirm_identity=identity,
         )
         self.registered_subject = RegisteredSubject.objects.get(
             subject_identifier=subject_identifier
@@ -199,3 +209,88 @@ class TestPredicates(TestCase):
         )
         CrfOne.objects.create(subject_visit=visit, f1="car", f2="bicycle")
         self.assertTrue(PF("f1", "f2", func=func)(**opts))
+
+    @time_machine.travel(test_datetime)
+    def test_pf_with_source_row(self):
+        def func(f1, f2):
+            return f1 == "car" and f2 == "bicycle"
+
+        visit = self.enroll(gender=FEMALE)
+        CrfOne.objects.create(subject_visit=visit, f1="car", f2="bicycle")
+        with self.assertNumQueries(1):
+            source_row = get_source_row("edc_metadata.crfone", visit, ["f1", "f2", "gender"])
+        opts = dict(
+            source_model="edc_metadata.crfone",
+            registered_subject=self.registered_subject,
+            visit=visit,
+            source_row=source_row,
+        )
+        with self.assertNumQueries(0):
+            self.assertTrue(PF("f1", "f2", func=func)(**opts))
+            self.assertTrue(P("gender", "eq", FEMALE)(**opts))
+
+    @time_machine.travel(test_datetime)
+    def test_source_row_without_source_obj(self):
+        visit = self.enroll(gender=FEMALE)
+        source_row = get_source_row("edc_metadata.crfone", visit, ["f1"])
+        self.assertIsNone(source_row.f1)
+        self.assertRaises(AttributeError, getattr, source_row, "f2")
+        self.assertIsNone(get_source_row("edc_metadata.crfone", visit, ["blah"]))
+
+    @time_machine.travel(test_datetime)
+    def test_rule_evaluation_context(self):
+        visit = self.enroll(gender=FEMALE)
+        CrfOne.objects.create(subject_visit=visit, f1="car")
+        context = RuleEvaluationContext(visit)
+        self.assertEqual(context.registered_subject, self.registered_subject)
+        source_row = context.get_source_row("edc_metadata.crfone", ["f1"])
+        self.assertEqual(source_row.f1, "car")
+        with self.assertNumQueries(0):
+            self.assertEqual(context.registered_subject, self.registered_subject)
+            self.assertIs(context.get_source_row("edc_metadata.crfone", ["f1"]), source_row)
+            self.assertEqual(context.appointment, self.appointment)
+
+    @time_machine.travel(test_datetime)
+    def test_p_get_q(self):
+        CrfOne.objects.create(subject_visit=self.enroll(gender=FEMALE), f1="car")
+        CrfOne.objects.create(subject_visit=self.enroll(gender=FEMALE), f1="bicycle")
+        CrfOne.objects.create(subject_visit=self.enroll(gender=FEMALE), f1=None)
+        for predicate in [
+            P("f1", "eq", "car"),
+            P("f1", "!=", "car"),
+            P("f1", "is", None),
+            P("f1", "is not", None),
+            P("f1", "in", ["car", None]),
+        ]:
+            with self.subTest(predicate=predicate):
+                self.assertEqual(
+                    set(CrfOne.objects.filter(predicate.get_q()).values_list("id", flat=True)),
+                    {
+                        obj.id
+                        for obj in CrfOne.objects.all()
+                        if predicate.func(obj.f1, predicate.expected_value)
+                    },
+                )
+        self.assertRaises(PredicateError, P("f1", "in", "car").get_q)
+        self.assertRaises(PredicateError, P("f1", "gt", None).get_q)
+
+    def test_pushdown_is_comparable(self):
+        f1 = CrfOne._meta.get_field("f1")
+        report_datetime = SubjectVisit._meta.get_field("report_datetime")
+        visit_code_sequence = SubjectVisit._meta.get_field("visit_code_sequence")
+        for predicate, field, comparable in [
+            (P("f1", "eq", "car"), f1, connection.vendor in case_sensitive_vendors),
+            (P("f1", "gt", "car"), f1, False),
+            (P("f1", "eq", 1), f1, False),
+            (P("report_datetime", "gt", test_datetime), report_datetime, True),
+            (P("report_datetime", "gt", test_datetime.date()), report_datetime, False),
+            (P("visit_code_sequence", "eq", 0), visit_code_sequence, True),
+            (P("visit_code_sequence", "in", [0, None]), visit_code_sequence, True),
+            (P("visit_code_sequence", "eq", "0"), visit_code_sequence, False),
+            (P("visit_code_sequence", "in", [0, "1"]), visit_code_sequence, False),
+            (P("visit_code_sequence", "is", True), visit_code_sequence, False),
+        ]:
+            with self.subTest(predicate=predicate):
+                self.assertEqual(
+                    PushdownRuleEvaluator.is_comparable(predicate, field), comparable
+                )
@@ -55,6 +55,45 @@ class RuleGroupWithRules2(CrfRuleGroup):
         source_model = "edc_visit_tracking.subjectvisit"
 
 
+class CrfOneRuleGroup(CrfRuleGroup):
+    rule1 = CrfRule(
+        predicate=P("f1", "eq", "car"),
+        consequence=REQUIRED,
+        alternative=NOT_REQUIRED,
+        target_models=["crftwo"],
+    )
+
+    class Meta:
+        app_label = "edc_metadata"
+        source_model = "edc_metadata.crfone"
+
+
+class CrfThreeRuleGroup(CrfRuleGroup):
+    rule1 = CrfRule(
+        predicate=P("f1", "eq", "bicycle"),
+        consequence=REQUIRED,
+        alternative=NOT_REQUIRED,
+        target_models=["crffour"],
+    )
+
+    class Meta:
+        app_label = "edc_metadata"
+        source_model = "edc_metadata.crfthree"
+
+
+class CrfFiveRuleGroup(CrfRuleGroup):
+    rule1 = CrfRule(
+        predicate=P("f2", "eq", "bicycle"),
+        consequence=REQUIRED,
+        alternative=NOT_REQUIRED,
+        target_models=["crftwo"],
+    )
+
+    class Meta:
+        app_label = "edc_metadata"
+        source_model = "edc_metadata.crffive"
+
+
 @override_settings(
     EDC_PROTOCOL_STUDY_OPEN_DATETIME=test_datetime - relativedelta(years=3),
     EDC_PROTOCOL_STUDY_CLOSE_DATETIME=test_datetime + relativedelta(years=3),
@@ -144,3 +183,57 @@ class TestSiteMetadataRules(TestCase):
             pass
         else:
             self.fail("RegisterRuleGroupError unexpectedly not raised.")
+
+    def test_rule_groups_for_source_model(self):
+        for rule_group in [CrfOneRuleGroup, CrfThreeRuleGroup, CrfFiveRuleGroup]:
+            site_metadata_rules.register(rule_group)
+        self.assertEqual(
+            site_metadata_rules.get_rule_groups_for_source_model("edc_metadata.crfthree"),
+            [CrfThreeRuleGroup],
+        )
+        # CrfFiveRuleGroup also targets crftwo
+        self.assertEqual(
+            site_metadata_rules.get_rule_groups_for_source_model("edc_metadata.crfone"),
+            [CrfOneRuleGroup, CrfFiveRuleGroup],
+        )
+        self.assertEqual(
+            site_metadata_rules.get_rule_groups_for_source_model(
+                "edc_metadata.crfthree", field_names=["f2"]
+            ),
+            [],
+        )
+        self.assertEqual(
+            site_metadata_rules.get_rule_groups_for_source_model("edc_metadata.crfsix"), []
+        )
+
+    def test_rule_groups_for_source_model_index_reset(self):
+        site_metadata_rules.register(CrfOneRuleGroup)
+        self.assertEqual(
+            site_metadata_rules.get_rule_groups_for_source_model("edc_metadata.crfone"),
+            [CrfOneRuleGroup],
+        )
+        site_metadata_rules.registry = {}
+        self.assertEqual(
+            site_metadata_rules.get_rule_groups_for_source_model("edc_metadata.crfone"), []
+        )
+
+    def test_rule_group_indexes(self):
+        for rule_group in [CrfOneRuleGroup, CrfThreeRuleGroup, CrfFiveRuleGroup]:
+            site_metadata_rules.register(rule_group)
+        related_visit_model = CrfOneRuleGroup._meta.related_visit_model
+        self.assertEqual(
+            site_metadata_rules.get_app_labels(related_visit_model), ["edc_metadata"]
+        )
+        self.assertEqual(
+            site_metadata_rules.get_rule_groups_for_related_visit_model(related_visit_model),
+            [CrfOneRuleGroup, CrfThreeRuleGroup, CrfFiveRuleGroup],
+        )
+        self.assertEqual(
+            site_metadata_rules.source_models,
+            ["edc_metadata.crffive", "edc_metadata.crfone", "edc_metadata.crfthree"],
+        )
+        site_metadata_rules.register(RuleGroupWithRules)
+        self.assertEqual(
+            site_metadata_rules.get_rule_groups_for_related_visit_model(related_visit_model),
+            [CrfOneRuleGroup, CrfThreeRuleGroup, CrfFiveRuleGroup, RuleGroupWithRules],
+        )
@@ -5,9 +5,11 @@ from typing import TYPE_CHECKING, Type
 from django.apps import apps as django_apps
 from django.conf import settings
 from django.db import models
-from django.db.models import QuerySet
+from django.db.models import Q, QuerySet
+from django.utils import timezone
 
-from .constants import CRF, KEYED, REQUISITION
+from .cache import get_metadata_cache, visit_metadata_cache
+from .constants import CRF, KEYED, NOT_REQUIRED, REQUISITION
 
 if TYPE_CHECKING:
     from edc_appointment.models import Appointment
@@ -67,12 +69,203 @@ def verify_model_cls_registered_with_admin():
     return getattr(settings, "EDC_METADATA_VERIFY_MODELS_REGISTERED_WITH_ADMIN", False)
 
 
+def bulk_create_metadata_enabled() -> bool:
+    """Returns True if `Creator` should create/update metadata for a
+    visit in bulk.
+
+    See also settings.EDC_METADATA_BULK_CREATE
+    """
+    return getattr(settings, "EDC_METADATA_BULK_CREATE", True)
+
+
+def get_audit_update_values(model_cls: Type[models.Model]) -> dict:
+    """Returns the audit field values `AuditModelMixin.save` sets
+    on every save, for writes that do not call `save()`, such as
+    `bulk_update` and `QuerySet.update`.
+
+    As with `save()`, `user_modified` is not changed.
+    """
+    from django_audit_fields.models.audit_model_mixin import update_device_fields
+
+    instance = model_cls()
+    return dict(
+        modified=timezone.now(),
+        hostname_modified=model_cls._meta.get_field("hostname_modified").pre_save(
+            instance, False
+        ),
+        device_modified=update_device_fields(instance)[1],
+        revision=model_cls._meta.get_field("revision").pre_save(instance, False),
+    )
+
+
+def reconcile_metadata_enabled() -> bool:
+    """Returns True if `Metadata.prepare` should update existing
+    metadata to match the visit instead of deleting and re-creating.
+
+    See also settings.EDC_METADATA_RECONCILE
+    """
+    return getattr(settings, "EDC_METADATA_RECONCILE", True)
+
+
+def scoped_metadata_rules_enabled() -> bool:
+    """Returns True if saving a CRF/Requisition should only run the
+    metadata rules that depend on the saved model.
+
+    See also settings.EDC_METADATA_SCOPED_RULES
+    """
+    return getattr(settings, "EDC_METADATA_SCOPED_RULES", True)
+
+
+def memoize_metadata_rules_enabled() -> bool:
+    """Returns True if rule groups with P/PF predicates should reuse
+    the rule results stored for an unchanged input fingerprint.
+
+    See also settings.EDC_METADATA_MEMOIZE_RULES
+    """
+    return getattr(settings, "EDC_METADATA_MEMOIZE_RULES", False)
+
+
+def cohort_metadata_rules_enabled() -> bool:
+    """Returns True if `MetadataRefresher` should evaluate simple
+    CRF rule groups for all related visits in chunks.
+
+    See also settings.EDC_METADATA_COHORT_RULES
+    """
+    return getattr(settings, "EDC_METADATA_COHORT_RULES", False)
+
+
+def pushdown_metadata_rules_enabled() -> bool:
+    """Returns True if `MetadataRefresher` should apply simple CRF
+    rule groups to all metadata with set-based UPDATEs.
+
+    See also settings.EDC_METADATA_PUSHDOWN_RULES
+    """
+    return getattr(settings, "EDC_METADATA_PUSHDOWN_RULES", False)
+
+
+def batch_singleton_metadata_enabled() -> bool:
+    """Returns True if saving a singleton CRF should only update the
+    CRF's own metadata at earlier timepoints instead of refreshing
+    each earlier timepoint.
+
+    See also settings.EDC_METADATA_BATCH_SINGLETON
+    """
+    return getattr(settings, "EDC_METADATA_BATCH_SINGLETON", True)
+
+
+def coalesce_metadata_refresh_enabled() -> bool:
+    """Returns True if metadata refreshes triggered by signals
+    inside a transaction should be deferred to on_commit and run
+    once per related visit.
+
+    See also settings.EDC_METADATA_COALESCE_REFRESH
+    """
+    return getattr(settings, "EDC_METADATA_COALESCE_REFRESH", False)
+
+
+def async_metadata_refresh_enabled() -> bool:
+    """Returns True if metadata refreshes triggered by signals
+    should be queued for the `process_metadata_refresh_queue`
+    worker instead of run on the request path.
+
+    See also settings.EDC_METADATA_ASYNC_REFRESH
+    """
+    return getattr(settings, "EDC_METADATA_ASYNC_REFRESH", False)
+
+
+def async_metadata_refresh_debounce() -> float:
+    """Returns the number of seconds a queued related visit waits
+    for further requests before it is refreshed.
+
+    See also settings.EDC_METADATA_ASYNC_REFRESH_DEBOUNCE
+    """
+    return getattr(settings, "EDC_METADATA_ASYNC_REFRESH_DEBOUNCE", 2.0)
+
+
+def metadata_validation_version() -> str:
+    """Returns the version of validated metadata. Bump to force
+    metadata to be validated again, for example, on deploy.
+
+    See also settings.EDC_METADATA_VALIDATION_VERSION
+    """
+    return str(getattr(settings, "EDC_METADATA_VALIDATION_VERSION", "1"))
+
+
+def get_metadata_validation_key(
+    metadata_model: str, instance: Appointment | RelatedVisitModel
+) -> str:
+    """Returns the cache key that records the metadata of
+    `metadata_model` for the timepoint of `instance`, an appointment
+    or related visit, as validated.
+    """
+    return "edc_metadata:validated:{}:{}".format(
+        metadata_model,
+        ":".join(
+            [
+                str(instance.subject_identifier),
+                str(instance.visit_code),
+                str(instance.visit_code_sequence),
+                str(instance.visit_schedule_name),
+                str(instance.schedule_name),
+            ]
+        ),
+    )
+
+
+def reset_metadata_validation(related_visit: RelatedVisitModel) -> None:
+    """Forgets that the metadata for the timepoint was validated so
+    the next `MetadataGetter` validates it again.
+
+    Called when a CRF/Requisition is saved or deleted since
+    validation also checks the source model instances.
+    """
+    get_metadata_cache().delete_many(
+        [
+            get_metadata_validation_key(metadata_model, related_visit)
+            for metadata_model in [
+                "edc_metadata.crfmetadata",
+                "edc_metadata.requisitionmetadata",
+            ]
+        ]
+    )
+
+
+def metadata_cache_enabled() -> bool:
+    """Returns True if the metadata of a visit should be read
+    through the cache. See `VisitMetadataCache`.
+
+    See also settings.EDC_METADATA_CACHE_ENABLED
+    """
+    return getattr(settings, "EDC_METADATA_CACHE_ENABLED", False)
+
+
+def rebuilds_metadata(
+    instance: CrfModel | RequisitionModel | Appointment | RelatedVisitModel,
+    allow_create: bool | None = None,
+    source_model: str | None = None,
+) -> bool:
+    """Returns True if refreshing the timepoint for `instance` should
+    re-create all metadata for the timepoint.
+
+    Only the related visit or appointment does. A CRF or requisition
+    updates its own metadata (`metadata_update`) and then only needs
+    its rules run.
+    """
+    return bool(allow_create and not source_model and not hasattr(instance, "metadata_update"))
+
+
 def refresh_metadata_for_timepoint(
     instance: CrfModel | RequisitionModel | Appointment | RelatedVisitModel,
     allow_create: bool | None = None,
+    source_model: str | None = None,
 ):
     """Refresh (or creates) metadata for the given timepoint.
 
+    If `source_model`, metadata is not re-created and only the
+    rules that depend on the source model are run. Metadata is
+    also not re-created for a CRF or requisition, see
+    `rebuilds_metadata`.
+
     See also `metadata_create_on_post_save` and `CreatesMetadataModelMixin`.
     """
     if instance:
@@ -80,10 +273,45 @@ def refresh_metadata_for_timepoint(
             related_visit = instance.related_visit
         except AttributeError:
             related_visit = instance
-        if allow_create:
+        if rebuilds_metadata(instance, allow_create=allow_create, source_model=source_model):
             related_visit.metadata_create()
         if django_apps.get_app_config("edc_metadata").metadata_rules_enabled:
-            related_visit.run_metadata_rules(allow_create=allow_create)
+            related_visit.run_metadata_rules(
+                allow_create=allow_create, source_model=source_model
+            )
+
+
+def update_singleton_metadata_for_previous_timepoints(instance: CrfModel) -> int:
+    """Sets CRF metadata for the singleton CRF at all earlier
+    timepoints of the schedule to NOT_REQUIRED in one UPDATE and
+    returns the number of rows updated.
+
+    KEYED metadata is not changed. The UPDATE sets the audit fields
+    but signals are not sent.
+
+    See also `metadata_update_previous_timepoints_for_singleton_on_post_save`.
+    """
+    related_visit = instance.related_visit
+    appointment = related_visit.appointment
+    return (
+        get_crf_metadata_model_cls()
+        .objects.filter(
+            Q(timepoint__lt=appointment.timepoint)
+            | Q(
+                timepoint=appointment.timepoint,
+                visit_code_sequence__lt=appointment.visit_code_sequence,
+            ),
+            subject_identifier=related_visit.subject_identifier,
+            visit_schedule_name=related_visit.visit_schedule_name,
+            schedule_name=related_visit.schedule_name,
+            model=instance._meta.label_lower,
+        )
+        .exclude(entry_status__in=[KEYED, NOT_REQUIRED])
+        .update(
+            entry_status=NOT_REQUIRED,
+            **get_audit_update_values(get_crf_metadata_model_cls()),
+        )
+    )
 
 
 def get_crf_metadata(instance: ScheduledLikeModel | Appointment) -> QuerySet[CrfMetadata]:
@@ -112,6 +340,31 @@ def get_requisition_metadata(
     return get_requisition_metadata_model_cls().objects.filter(**opts)
 
 
+def get_visit_crf_metadata(instance: ScheduledLikeModel | Appointment) -> list[CrfMetadata]:
+    """Returns a list of crf metadata ordered by show_order, read
+    through the cache if settings.EDC_METADATA_CACHE_ENABLED=True.
+    """
+    return _get_visit_metadata(CRF, instance, get_crf_metadata)
+
+
+def get_visit_requisition_metadata(
+    instance: ScheduledLikeModel | Appointment,
+) -> list[RequisitionMetadata]:
+    """Returns a list of requisition metadata ordered by show_order,
+    read through the cache if settings.EDC_METADATA_CACHE_ENABLED=True.
+    """
+    return _get_visit_metadata(REQUISITION, instance, get_requisition_metadata)
+
+
+def _get_visit_metadata(category: str, instance, get_metadata) -> list:
+    def fetch() -> list:
+        return list(get_metadata(instance).order_by("show_order"))
+
+    if metadata_cache_enabled():
+        return visit_metadata_cache.get(category, instance, fetch)
+    return fetch()
+
+
 def has_keyed_metadata(appointment, raise_on_true=None) -> bool:
     """Return True if data has been submitted for this timepoint."""
     exists = any(
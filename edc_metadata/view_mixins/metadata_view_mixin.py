@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+from django.apps import apps as django_apps
 from edc_appointment.utils import update_appt_status_for_timepoint
 
 from ..constants import KEYED, NOT_REQUIRED, REQUIRED
+from ..dashboard_metadata import DashboardMetadata
 from ..utils import (
+    async_metadata_refresh_enabled,
     get_crf_metadata,
     get_requisition_metadata,
     refresh_metadata_for_timepoint,
@@ -20,15 +23,16 @@ class MetadataViewMixin:
 
     def get_context_data(self, **kwargs) -> dict:
         if self.appointment:
-            # always refresh metadata / run rules
-            refresh_metadata_for_timepoint(self.appointment, allow_create=True)
+            self.refresh_metadata()
             referer = self.request.headers.get("Referer")
             if referer and "subject_review_listboard" in referer:
                 if self.appointment.related_visit:
                     update_appt_status_for_timepoint(self.appointment.related_visit)
-            crf_qs = self.get_crf_metadata()
-            requisition_qs = self.get_requisition_metadata()
-            kwargs.update(crfs=crf_qs, requisitions=requisition_qs)
+            dashboard_metadata = self.get_dashboard_metadata()
+            kwargs.update(
+                crfs=dashboard_metadata.crfs,
+                requisitions=dashboard_metadata.requisitions,
+            )
         kwargs.update(
             NOT_REQUIRED=NOT_REQUIRED,
             REQUIRED=REQUIRED,
@@ -36,6 +40,31 @@ class MetadataViewMixin:
         )
         return super().get_context_data(**kwargs)
 
+    def refresh_metadata(self) -> None:
+        """Refreshes metadata / runs rules for the timepoint.
+
+        If settings.EDC_METADATA_ASYNC_REFRESH=True, only refreshes
+        if the related visit has a queued refresh, then removes it
+        from the queue.
+        """
+        if not async_metadata_refresh_enabled():
+            refresh_metadata_for_timepoint(self.appointment, allow_create=True)
+        elif self.appointment.related_visit:
+            queue_model_cls = django_apps.get_model("edc_metadata.metadatarefreshqueue")
+            if queue_model_cls.objects.pending(self.appointment.related_visit):
+                refresh_metadata_for_timepoint(self.appointment, allow_create=True)
+                queue_model_cls.objects.discard(self.appointment.related_visit)
+
+    def get_dashboard_metadata(self) -> DashboardMetadata:
+        """Returns the metadata to show, each with the pk of its
+        keyed source model instance, if any (`source_pk`).
+        """
+        return DashboardMetadata(
+            self.appointment,
+            crf_metadata=self.get_crf_metadata(),
+            requisition_metadata=self.get_requisition_metadata(),
+        )
+
     def get_crf_metadata(self):
         return (
             get_crf_metadata(self.appointment)